@@ -3,33 +3,48 @@ Client Onboarding System - Main Application
 JFSC-compliant client onboarding for Jersey fund administration
 """
 
+import io
 import os
+import atexit
 import logging
+import secrets
 import threading
-from datetime import datetime
-from functools import wraps
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from functools import lru_cache, wraps
+from itertools import chain
+from operator import itemgetter
+import orjson
 from flask import (
     Flask, render_template, request, jsonify,
-    redirect, url_for, flash, session, g, make_response, Response
+    redirect, url_for, flash, session, g, make_response, Response, send_file
 )
+from flask.json.provider import DefaultJSONProvider
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from flask_cors import CORS
+from flask_session import Session
 from dotenv import load_dotenv
-from services.sheets_db import get_client as get_sheets_client
+from werkzeug.local import LocalProxy
+from services.sheets_db import get_client as _get_sheets_client
 from services.pdf_report import generate_report, generate_screening_report, _get_screening_demo_data, generate_admin_agreement, REPORT_TYPES
 from services import (
     notify_edd_triggered,
     notify_approval_required,
     notify_screening_complete
 )
-from services.gdrive_audit import save_form_data, ensure_folder_structure, save_api_response
-import json
-
+from services.fee_calculator import calculate_fees, get_available_services, get_setup_fees, SERVICE_FEES
+from services.kyc_checklist import session_kyc_documents
+from services.gdrive_audit import (
+    save_form_data, save_form_data_batch, save_screening_results, ensure_folder_structure, save_api_response
+)
 
-def run_in_background(func, *args, **kwargs):
-    """Run a function in a background thread without blocking the response"""
-    thread = threading.Thread(target=func, args=args, kwargs=kwargs, daemon=True)
-    thread.start()
-    return thread
 
 # Load environment variables
 load_dotenv()
@@ -41,8 +56,56 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+# Shared worker pool for background jobs, so threads are reused rather
+# than spawned per request
+_BG_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BG_WORKERS', 8)),
+    thread_name_prefix='bg'
+)
+atexit.register(_BG_POOL.shutdown, wait=False)
+
+
+# Single writer for background Sheets saves: queued jobs run one at a time
+# on one thread, sharing the gspread session and keeping the read-max-then-
+# append ID allocation in SheetsDB from racing between requests
+_SHEETS_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sheets')
+atexit.register(_SHEETS_WRITER.shutdown, wait=False)
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run a function on the background pool without blocking the response"""
+    return _BG_POOL.submit(func, *args, **kwargs)
+
+
+def queue_sheets_write(func, *args, **kwargs):
+    """Queue a Sheets write on the single background writer"""
+    return _SHEETS_WRITER.submit(func, *args, **kwargs)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, used by jsonify() and request.get_json()"""
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app, origins=['https://coreworker-landing.onrender.com', 'http://localhost:*'])
 
 # Configuration
@@ -51,11 +114,88 @@ app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV', 'development')
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
+# Server-side sessions: the cookie only carries a session ID, so growing
+# onboarding/KYC state is not re-signed and re-sent on every response
+app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE', 'filesystem')
+app.config['SESSION_PERMANENT'] = False
+if app.config['SESSION_TYPE'] == 'redis' and os.environ.get('REDIS_URL'):
+    import redis
+    app.config['SESSION_REDIS'] = redis.from_url(os.environ['REDIS_URL'])
+Session(app)
+
+# Identifies the running deploy, for ETags on pages that only change per release
+APP_BUILD_ID = os.environ.get('RENDER_GIT_COMMIT') or datetime.now().strftime('%Y%m%d%H%M%S')
+
+# Let browsers reuse static assets briefly instead of revalidating each load
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = int(os.environ.get('STATIC_MAX_AGE', 3600))
+
 # Demo mode for POC
 DEMO_MODE = os.environ.get('DEMO_MODE', 'true').lower() == 'true'
 
-# Initialize Google Sheets database
-sheets_db = get_sheets_client()
+# Google Sheets database, connected and seeded on first use rather than
+# at import so workers start without waiting on OAuth/Sheets round-trips
+_sheets_client = None
+_sheets_client_lock = threading.Lock()
+
+
+def get_sheets_client():
+    """Get the shared SheetsDB client, initializing it on first use"""
+    global _sheets_client
+    if _sheets_client is None:
+        with _sheets_client_lock:
+            if _sheets_client is None:
+                client = _get_sheets_client()
+                init_app(client)
+                _sheets_client = client
+    return _sheets_client
+
+
+sheets_db = LocalProxy(get_sheets_client)
+
+# Latest risk assessment per onboarding, shared across requests for a short
+# TTL so moving between phases 5-7 doesn't re-read the RiskAssessments tab
+RISK_CACHE_TTL = int(os.environ.get('RISK_CACHE_TTL', 30))
+_RISK_CACHE_MAX = 512
+_risk_cache = {}  # onboarding_id -> (fetched_at, assessment)
+_risk_cache_generation = 0
+_risk_cache_lock = threading.Lock()
+
+
+def get_risk_assessment(onboarding_id):
+    """Get the latest risk assessment (memoized on g and cached for RISK_CACHE_TTL)"""
+    memo = g.setdefault('_risk_assessments', {})
+    if onboarding_id in memo:
+        return memo[onboarding_id]
+
+    now = time.monotonic()
+    with _risk_cache_lock:
+        cached = _risk_cache.get(onboarding_id)
+        generation = _risk_cache_generation
+    if cached is not None and now - cached[0] < RISK_CACHE_TTL:
+        risk_data = cached[1]
+    else:
+        risk_data = sheets_db.get_risk_assessment(onboarding_id)
+        with _risk_cache_lock:
+            # Don't store a result that raced with a new assessment being saved
+            if generation == _risk_cache_generation:
+                if len(_risk_cache) >= _RISK_CACHE_MAX:
+                    # Drop the oldest entry (dicts keep insertion order)
+                    _risk_cache.pop(next(iter(_risk_cache)), None)
+                _risk_cache.pop(onboarding_id, None)
+                _risk_cache[onboarding_id] = (now, risk_data)
+
+    memo[onboarding_id] = risk_data
+    return risk_data
+
+
+def invalidate_risk_assessment(onboarding_id):
+    """Forget any cached risk assessment after a new one is saved"""
+    global _risk_cache_generation
+    with _risk_cache_lock:
+        _risk_cache.pop(onboarding_id, None)
+        _risk_cache_generation += 1
+    g.get('_risk_assessments', {}).pop(onboarding_id, None)
+
 
 # User roles
 ROLES = {
@@ -73,320 +213,61 @@ DEMO_USERS = {
     'admin_user': {'name': 'Michael Brown', 'role': 'admin', 'email': 'michael.brown@example.com'}
 }
 
-# Mock completed enquiry submissions
-MOCK_ENQUIRIES = {
-    'ENQ-001': {
-        'id': 'ENQ-001',
-        'status': 'pending',
-        'submitted_at': '2026-02-01 09:30',
-        'sponsor_name': 'Granite Capital Partners LLP',
-        'entity_type': 'llp',
-        'jurisdiction': 'UK',
-        'registration_number': 'OC123456',
-        'registered_address': '100 Liverpool Street, London, EC2M 2RH',
-        'business_address': '100 Liverpool Street, 5th Floor, London, EC2M 2RH',
-        'trading_name': 'Granite Capital',
-        'regulatory_status': 'regulated',
-        'regulator': 'FCA',
-        'license_number': '123456',
-        'date_of_incorporation': '2015-03-15',
-        'website': 'https://www.granitecapital.com',
-        'lei': '5493001KJTIIGC8Y1R17',
-        'tax_id': 'GB123456789',
-        'business_activities': 'Private equity fund management, mid-market buyout investments in technology and healthcare sectors. Managed assets under management of approximately $2 billion across three funds.',
-        'source_of_wealth': 'Management fees from previous funds (Granite I and II totaling $1.2B AUM), carried interest from successful exits, and personal capital contributions from founding partners.',
-        'source_of_funds': 'Institutional investors (pension funds, endowments), family offices, and high net worth individuals. Anchor commitments from UK pension funds totaling $150M.',
-        'fund_name': 'Granite Capital Fund III LP',
-        'fund_type': 'jpf',
-        'legal_structure': 'lp',
-        'target_size': '500,000,000',
-        'investment_strategy': 'Mid-market buyout investments in UK and European technology and healthcare sectors. Target companies with EBITDA of $10-50M.',
-        'target_countries': ['uk', 'eu'],
-        'services_required': ['nav', 'investor', 'accounting', 'ta', 'director', 'cosec'],
-        'principals': [
-            {
-                'name': 'John Smith',
-                'full_name': 'John Edward Smith',
-                'former_names': '',
-                'role': 'both',
-                'nationality': 'British',
-                'dob': '1972-05-15',
-                'residential_address': '45 Kensington Gardens, London, W8 4QS',
-                'country_of_residence': 'UK',
-                'ownership': '35',
-                'ownership_pct': 35,
-                'is_ubo': True
-            },
-            {
-                'name': 'Sarah Johnson',
-                'full_name': 'Sarah Anne Johnson',
-                'former_names': 'Sarah Anne Williams (maiden name)',
-                'role': 'both',
-                'nationality': 'British',
-                'dob': '1978-09-22',
-                'residential_address': '12 Chelsea Embankment, London, SW3 4LF',
-                'country_of_residence': 'UK',
-                'ownership': '35',
-                'ownership_pct': 35,
-                'is_ubo': True
-            },
-            {
-                'name': 'Michael Brown',
-                'full_name': 'Michael James Brown',
-                'former_names': '',
-                'role': 'both',
-                'nationality': 'British',
-                'dob': '1980-01-10',
-                'residential_address': '8 Hampstead Heath, London, NW3 1AA',
-                'country_of_residence': 'UK',
-                'ownership': '30',
-                'ownership_pct': 30,
-                'is_ubo': True
-            }
-        ],
-        'gp_directors': [
-            {
-                'principal_id': 'principal_js_enq001',
-                'full_name': 'John Edward Smith',
-                'former_names': '',
-                'dob': '1972-05-15',
-                'nationality': 'British',
-                'residential_address': '45 Kensington Gardens, London, W8 4QS',
-                'country_of_residence': 'UK',
-                'position': 'director',
-                'source': 'enquiry'
-            },
-            {
-                'principal_id': 'principal_saj_enq001',
-                'full_name': 'Sarah Anne Johnson',
-                'former_names': 'Sarah Anne Williams (maiden name)',
-                'dob': '1978-09-22',
-                'nationality': 'British',
-                'residential_address': '12 Chelsea Embankment, London, SW3 4LF',
-                'country_of_residence': 'UK',
-                'position': 'director',
-                'source': 'enquiry'
-            }
-        ],
-        'initial_investors': [
-            {'name': 'UK Public Pension Fund', 'type': 'pension_fund', 'jurisdiction': 'UK', 'commitment_pct': 30, 'commitment_amount': '150,000,000'},
-            {'name': 'Smith Family Office', 'type': 'family_office', 'jurisdiction': 'UK', 'commitment_pct': 10, 'commitment_amount': '50,000,000'},
-            {'name': 'European Insurance Co', 'type': 'institutional', 'jurisdiction': 'EU', 'commitment_pct': 25, 'commitment_amount': '125,000,000'},
-            {'name': 'US University Endowment', 'type': 'institutional', 'jurisdiction': 'US', 'commitment_pct': 20, 'commitment_amount': '100,000,000'},
-            {'name': 'GP Commitment', 'type': 'sponsor_affiliate', 'jurisdiction': 'UK', 'commitment_pct': 15, 'commitment_amount': '75,000,000'}
-        ],
-        'contact_name': 'John Smith',
-        'contact_email': 'john.smith@granitecapital.com',
-        'contact_phone': '+44 20 7123 4567',
-        'enquiry_source': 'referral',
-        'referrer_name': 'James Wilson - Highland Ventures',
-        'declaration_accepted': True
-    },
-    'ENQ-002': {
-        'id': 'ENQ-002',
-        'status': 'pending',
-        'submitted_at': '2026-02-02 11:15',
-        'sponsor_name': 'Evergreen Capital Management Ltd',
-        'entity_type': 'company',
-        'jurisdiction': 'UK',
-        'registration_number': '12345678',
-        'registered_address': '25 Cannon Street, London, EC4M 5TA',
-        'business_address': '25 Cannon Street, 10th Floor, London, EC4M 5TA',
-        'trading_name': 'Evergreen Capital',
-        'regulatory_status': 'regulated',
-        'regulator': 'FCA',
-        'license_number': '654321',
-        'date_of_incorporation': '2018-07-01',
-        'website': 'https://www.evergreencap.com',
-        'lei': '549300EXAMPLE123456',
-        'tax_id': 'GB987654321',
-        'business_activities': 'ESG-focused investment management specializing in renewable energy and sustainable technology. First fund launched in 2019 with $100M AUM.',
-        'source_of_wealth': 'Seed capital from founders (prior careers in investment banking and asset management), anchor investor commitments, and management fees from Fund I.',
-        'source_of_funds': 'ESG-focused institutional investors, impact funds, sovereign wealth funds with sustainability mandates, and green bond investors.',
-        'fund_name': 'Evergreen Sustainable Growth Fund LP',
-        'fund_type': 'jpf',
-        'legal_structure': 'lp',
-        'target_size': '250,000,000',
-        'investment_strategy': 'ESG-focused growth equity investments in renewable energy infrastructure and sustainable technology across Europe.',
-        'target_countries': ['uk', 'eu', 'global'],
-        'principals': [
-            {
-                'name': 'Elizabeth Chen',
-                'full_name': 'Elizabeth Wei Chen',
-                'former_names': '',
-                'role': 'both',
-                'nationality': 'British',
-                'dob': '1975-03-28',
-                'residential_address': '22 Mayfair Place, London, W1K 3AE',
-                'country_of_residence': 'UK',
-                'ownership': '40',
-                'ownership_pct': 40,
-                'is_ubo': True
-            },
-            {
-                'name': 'David Kumar',
-                'full_name': 'David Raj Kumar',
-                'former_names': '',
-                'role': 'both',
-                'nationality': 'British',
-                'dob': '1979-11-05',
-                'residential_address': '15 Richmond Hill, Surrey, TW10 6QX',
-                'country_of_residence': 'UK',
-                'ownership': '30',
-                'ownership_pct': 30,
-                'is_ubo': True
-            },
-            {
-                'name': 'Anna Schmidt',
-                'full_name': 'Anna Maria Schmidt',
-                'former_names': 'Anna Maria Weber (maiden name)',
-                'role': 'both',
-                'nationality': 'German',
-                'dob': '1982-07-14',
-                'residential_address': 'Friedrichstrasse 123, 10117 Berlin, Germany',
-                'country_of_residence': 'Germany',
-                'ownership': '30',
-                'ownership_pct': 30,
-                'is_ubo': True
-            }
-        ],
-        'gp_directors': [
-            {
-                'full_name': 'Elizabeth Wei Chen',
-                'former_names': '',
-                'dob': '1975-03-28',
-                'nationality': 'British',
-                'residential_address': '22 Mayfair Place, London, W1K 3AE',
-                'country_of_residence': 'UK',
-                'position': 'chairman'
-            },
-            {
-                'full_name': 'David Raj Kumar',
-                'former_names': '',
-                'dob': '1979-11-05',
-                'nationality': 'British',
-                'residential_address': '15 Richmond Hill, Surrey, TW10 6QX',
-                'country_of_residence': 'UK',
-                'position': 'director'
-            }
-        ],
-        'initial_investors': [
-            {'name': 'Nordic Green Fund', 'type': 'fund_of_funds', 'jurisdiction': 'EU', 'commitment_pct': 30, 'commitment_amount': '75,000,000'},
-            {'name': 'Impact Capital Partners', 'type': 'institutional', 'jurisdiction': 'UK', 'commitment_pct': 25, 'commitment_amount': '62,500,000'},
-            {'name': 'Swiss Sustainability Fund', 'type': 'institutional', 'jurisdiction': 'Other', 'commitment_pct': 20, 'commitment_amount': '50,000,000'},
-            {'name': 'German Pension Alliance', 'type': 'pension_fund', 'jurisdiction': 'EU', 'commitment_pct': 15, 'commitment_amount': '37,500,000'},
-            {'name': 'Chen Family Trust', 'type': 'sponsor_affiliate', 'jurisdiction': 'UK', 'commitment_pct': 10, 'commitment_amount': '25,000,000'}
-        ],
-        'contact_name': 'Elizabeth Chen',
-        'contact_email': 'e.chen@evergreencap.com',
-        'contact_phone': '+44 20 7987 6543',
-        'enquiry_source': 'website',
-        'referrer_name': '',
-        'declaration_accepted': True
-    },
-    'ENQ-003': {
-        'id': 'ENQ-003',
-        'status': 'pending',
-        'submitted_at': '2026-02-02 14:45',
-        'sponsor_name': 'Nordic Ventures AS',
-        'entity_type': 'company',
-        'jurisdiction': 'Other',
-        'jurisdiction_other': 'Norway',
-        'registration_number': 'NO 912 345 678',
-        'registered_address': 'Aker Brygge, Stranden 1, 0250 Oslo, Norway',
-        'business_address': 'Aker Brygge, Stranden 1, 0250 Oslo, Norway',
-        'trading_name': 'Nordic Ventures',
-        'regulatory_status': 'regulated',
-        'regulator': 'Other',
-        'license_number': 'NV-2020-0456',
-        'date_of_incorporation': '2020-01-15',
-        'website': 'https://www.nordicventures.no',
-        'lei': '5493009NORDIC12345',
-        'tax_id': 'NO912345678MVA',
-        'business_activities': 'Venture capital and growth equity investments in Nordic technology companies. Focus on fintech, healthtech, and cleantech sectors.',
-        'source_of_wealth': 'Founder capital from successful prior technology exits, institutional investors including Nordic pension funds, and family office commitments.',
-        'source_of_funds': 'Nordic pension funds, Norwegian sovereign wealth fund co-investments, family offices with technology focus, and corporate venture capital arms.',
-        'fund_name': 'Nordic Technology Opportunities Fund LP',
-        'fund_type': 'jpf',
-        'legal_structure': 'lp',
-        'target_size': '150,000,000',
-        'investment_strategy': 'Early-stage and growth investments in Nordic technology companies, with focus on fintech, healthtech, and cleantech sectors.',
-        'target_countries': ['eu'],
-        'principals': [
-            {
-                'name': 'Erik Larsson',
-                'full_name': 'Erik Gustav Larsson',
-                'former_names': '',
-                'role': 'both',
-                'nationality': 'Norwegian',
-                'dob': '1976-08-20',
-                'residential_address': 'Bygdoy Alle 45, 0265 Oslo, Norway',
-                'country_of_residence': 'Norway',
-                'ownership': '50',
-                'ownership_pct': 50,
-                'is_ubo': True
-            },
-            {
-                'name': 'Ingrid Olsen',
-                'full_name': 'Ingrid Marie Olsen',
-                'former_names': 'Ingrid Marie Hansen (maiden name)',
-                'role': 'both',
-                'nationality': 'Norwegian',
-                'dob': '1981-04-12',
-                'residential_address': 'Frognerveien 88, 0271 Oslo, Norway',
-                'country_of_residence': 'Norway',
-                'ownership': '50',
-                'ownership_pct': 50,
-                'is_ubo': True
-            }
-        ],
-        'gp_directors': [
-            {
-                'full_name': 'Erik Gustav Larsson',
-                'former_names': '',
-                'dob': '1976-08-20',
-                'nationality': 'Norwegian',
-                'residential_address': 'Bygdoy Alle 45, 0265 Oslo, Norway',
-                'country_of_residence': 'Norway',
-                'position': 'chairman'
-            },
-            {
-                'full_name': 'Ingrid Marie Olsen',
-                'former_names': 'Ingrid Marie Hansen (maiden name)',
-                'dob': '1981-04-12',
-                'nationality': 'Norwegian',
-                'residential_address': 'Frognerveien 88, 0271 Oslo, Norway',
-                'country_of_residence': 'Norway',
-                'position': 'director'
-            }
-        ],
-        'initial_investors': [
-            {'name': 'Norwegian Tech Pension', 'type': 'pension_fund', 'jurisdiction': 'EU', 'commitment_pct': 35, 'commitment_amount': '52,500,000'},
-            {'name': 'Larsson Family Trust', 'type': 'sponsor_affiliate', 'jurisdiction': 'EU', 'commitment_pct': 15, 'commitment_amount': '22,500,000'},
-            {'name': 'Swedish Innovation Fund', 'type': 'fund_of_funds', 'jurisdiction': 'EU', 'commitment_pct': 25, 'commitment_amount': '37,500,000'},
-            {'name': 'Finnish Technology Ventures', 'type': 'institutional', 'jurisdiction': 'EU', 'commitment_pct': 15, 'commitment_amount': '22,500,000'},
-            {'name': 'Olsen Investment Holdings', 'type': 'family_office', 'jurisdiction': 'Other', 'commitment_pct': 10, 'commitment_amount': '15,000,000'}
-        ],
-        'contact_name': 'Erik Larsson',
-        'contact_email': 'erik@nordicventures.no',
-        'contact_phone': '+47 22 12 34 56',
-        'enquiry_source': 'event',
-        'referrer_name': 'Met at Jersey Finance Roadshow London',
-        'declaration_accepted': True
-    }
-}
+# Services assumed when an enquiry or fee request doesn't list any
+_DEFAULT_SERVICES = ('nav', 'investor', 'accounting', 'ta', 'director', 'cosec')
+
+
+# Phase 6/7 fee breakdowns, memoized on their inputs. The result dict is
+# shared between requests, so treat it as read-only; call cache_clear()
+# if the fee tables change.
+@lru_cache(maxsize=1024)
+def _calculate_fees_cached(fund_size, services, num_investors):
+    """Calculate fees for a services tuple (cached)"""
+    return calculate_fees(fund_size, list(services), num_investors=num_investors)
+
+
+# Mock completed enquiry submissions, loaded from data/ on first use
+MOCK_ENQUIRIES_PATH = Path(__file__).parent / 'data' / 'mock_enquiries.json'
+
+
+@lru_cache(maxsize=1)
+def get_mock_enquiries():
+    """Get mock enquiries keyed by enquiry ID (parsed once per process)"""
+    return orjson.loads(MOCK_ENQUIRIES_PATH.read_bytes())
+
+
+def _newest_first(enquiries):
+    """Sort enquiries by submission (or creation) time, newest first"""
+    # Decorate once with the timestamp, then sort on it with itemgetter
+    keyed = [(e.get('submitted_at') or e.get('created_at') or '', e) for e in enquiries]
+    keyed.sort(key=itemgetter(0), reverse=True)
+    return [e for _, e in keyed]
+
+
+@lru_cache(maxsize=1)
+def get_mock_enquiries_newest_first():
+    """Get mock enquiries newest first (sorted once per process)"""
+    return tuple(_newest_first(get_mock_enquiries().values()))
+
+
+@lru_cache(maxsize=1)
+def get_mock_enquiries_by_status():
+    """Get mock enquiries grouped by status (the mock data is read-only)"""
+    by_status = {}
+    for enquiry in get_mock_enquiries().values():
+        by_status.setdefault(enquiry['status'], []).append(enquiry)
+    return {status: tuple(enquiries) for status, enquiries in by_status.items()}
 
 
 # ========== Security Headers ==========
 
-@app.after_request
-def add_security_headers(response):
-    """Add security headers to all responses"""
-    response.headers['X-Frame-Options'] = 'SAMEORIGIN'
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-    response.headers['Content-Security-Policy'] = (
+# Headers added to every response, built once at import
+_SECURITY_HEADERS = (
+    ('X-Frame-Options', 'SAMEORIGIN'),
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-XSS-Protection', '1; mode=block'),
+    ('Referrer-Policy', 'strict-origin-when-cross-origin'),
+    ('Content-Security-Policy', (
         "default-src 'self'; "
         "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
         "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
@@ -394,22 +275,85 @@ def add_security_headers(response):
         "img-src 'self' data: https:; "
         "connect-src 'self' https://sheets.googleapis.com https://www.googleapis.com https://drive.googleapis.com; "
         "frame-ancestors 'self';"
-    )
+    )),
+)
+
+
+@app.after_request
+def add_security_headers(response):
+    """Add security headers to all responses"""
+    headers = response.headers
+    for key, value in _SECURITY_HEADERS:
+        headers[key] = value
+    return response
+
+
+# ========== Audit Trail ==========
+
+def queue_form_audit(form_data, phase, sponsor_name, fund_name):
+    """Queue a form submission for the audit trail, saved after the response"""
+    g.setdefault('audit_queue', []).append({
+        'form_data': form_data,
+        'phase': phase,
+        'sponsor_name': sponsor_name,
+        'fund_name': fund_name
+    })
+
+
+def _save_audit_queue(submissions):
+    """Background task to save queued form submissions to the audit trail"""
+    try:
+        results = save_form_data_batch(submissions)
+        for sub, result in zip(submissions, results):
+            logger.info(f"Audit trail save for phase {sub['phase']}: {result.get('status')}")
+    except Exception as e:
+        logger.error(f"Error saving form submissions to audit trail (background): {e}")
+
+
+@app.after_request
+def flush_audit_queue(response):
+    """Hand any audit writes queued during the request to the background pool"""
+    submissions = g.pop('audit_queue', None)
+    if submissions:
+        run_in_background(_save_audit_queue, submissions)
     return response
 
 
+# (sponsor, fund) pairs whose Drive folder structure is known to exist
+_ensured_folders = set()
+
+
+def ensure_folders_once(sponsor_name, fund_name):
+    """Ensure the client folder structure exists, once per sponsor/fund per process"""
+    key = (sponsor_name, fund_name)
+    if key in _ensured_folders:
+        return
+    folders = ensure_folder_structure(sponsor_name, fund_name)
+    # Only remember complete structures, so a failed run is retried
+    if folders.get('client') and all(folders.values()):
+        _ensured_folders.add(key)
+
+
 # ========== Context Processors ==========
 
+@lru_cache(maxsize=1)
+def _static_globals():
+    """Template globals that never change once Sheets is initialized"""
+    return {
+        'demo_mode': DEMO_MODE,
+        'sheets_demo_mode': sheets_db.demo_mode,
+        'roles': ROLES
+    }
+
+
 @app.context_processor
 def inject_globals():
     """Inject global variables into all templates"""
     user = get_current_user()
     return {
-        'demo_mode': DEMO_MODE,
-        'sheets_demo_mode': sheets_db.demo_mode,
+        **_static_globals(),
         'current_user': user,
         'current_role': ROLES.get(user['role']) if user else None,
-        'roles': ROLES,
         'now': datetime.now()
     }
 
@@ -417,28 +361,39 @@ def inject_globals():
 # ========== Authentication ==========
 
 def get_current_user():
-    """Get current user from session"""
+    """Get current user from session (cached on g for the request)"""
     user_id = session.get('user_id')
+    cached = g.get('_current_user')
+    # Re-resolve if the session user changed mid-request (login/switch)
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+
+    user = None
     if user_id and user_id in DEMO_USERS:
-        return {**DEMO_USERS[user_id], 'id': user_id}
-    return None
+        user = {**DEMO_USERS[user_id], 'id': user_id}
+    g._current_user = (user_id, user)
+    return user
 
 
 def login_required(f):
     """Decorator to require login for routes"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if DEMO_MODE and not session.get('user_id'):
+        user_id = session.get('user_id')
+        # Fast path: already logged in as a known user
+        if user_id in DEMO_USERS:
+            return f(*args, **kwargs)
+
+        if DEMO_MODE and not user_id:
             # Auto-login as BD user for demo
             session['user_id'] = 'bd_user'
+            return f(*args, **kwargs)
 
-        if not get_current_user():
-            # For API endpoints, return JSON error instead of redirect
-            if request.path.startswith('/api/'):
-                return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
-            flash('Please log in to access this page.', 'warning')
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
+        # For API endpoints, return JSON error instead of redirect
+        if request.path.startswith('/api/'):
+            return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
+        flash('Please log in to access this page.', 'warning')
+        return redirect(url_for('login'))
     return decorated_function
 
 
@@ -478,7 +433,19 @@ def login():
             return redirect(url_for('dashboard'))
         flash('Invalid user selection.', 'danger')
 
-    return render_template('login.html', users=DEMO_USERS)
+    # The page only varies by deploy and signed-in user, so repeat GETs can
+    # be answered with a 304 without rendering. Pending flashes must render.
+    if '_flashes' in session:
+        return render_template('login.html', users=DEMO_USERS)
+
+    etag = f"{APP_BUILD_ID}-{session.get('user_id', '')}"
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render_template('login.html', users=DEMO_USERS))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @app.route('/logout')
@@ -499,6 +466,52 @@ def switch_user(user_id):
     return redirect(url_for('dashboard'))
 
 
+_EMPTY_JSON_LISTS = frozenset(('[]', 'null'))
+
+
+def _parse_json_list(value):
+    """Decode a JSON list posted in a form field, falling back to [] if missing or malformed"""
+    # Empty forms post '[]' (or nothing), so skip the parser for those
+    if not value or value in _EMPTY_JSON_LISTS:
+        return []
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return []
+
+
+# Regulatory status values as stored by the form, plus common free-text variants
+_REGULATORY_STATUS_MAP = {
+    'regulated': 'regulated',
+    'not_regulated': 'not_regulated',
+    'not regulated': 'not_regulated',
+    'unregulated': 'not_regulated',
+    'exempt': 'exempt',
+    'pending_registration': 'pending_registration',
+    'pending registration': 'pending_registration'
+}
+
+
+@lru_cache(maxsize=256)
+def _normalize_regulatory_status(raw_status):
+    """Map a raw regulatory status onto the values the phase 1 form expects"""
+    status_lower = raw_status.strip().lower()
+    status = _REGULATORY_STATUS_MAP.get(status_lower)
+    if status:
+        return status
+
+    # Free text: fall back to keyword matching
+    if 'not' in status_lower or 'unregulated' in status_lower:
+        return 'not_regulated'
+    if 'regulated' in status_lower:
+        return 'regulated'
+    if 'exempt' in status_lower:
+        return 'exempt'
+    if 'pending' in status_lower:
+        return 'pending_registration'
+    return raw_status
+
+
 def _get_onboardings_with_session():
     """Get onboardings from Sheets with session overrides (shared by dashboard and reports API)."""
     onboardings = sheets_db.get_onboardings()
@@ -555,28 +568,36 @@ def _get_onboardings_with_session():
             }
         ]
     else:
+        # Resolve all missing sponsor names with one Sponsors read
+        missing_ids = {o['sponsor_id'] for o in onboardings
+                       if not o.get('sponsor_name') and o.get('sponsor_id')}
+        sponsor_names = sheets_db.get_sponsors_bulk(missing_ids) if missing_ids else {}
         for onb in onboardings:
-            if not onb.get('sponsor_name') and onb.get('sponsor_id'):
-                sponsor = sheets_db.get_sponsor(onb['sponsor_id'])
-                if sponsor:
-                    onb['sponsor_name'] = sponsor.get('legal_name', 'Unknown')
-            if isinstance(onb.get('is_existing_sponsor'), str):
-                onb['is_existing_sponsor'] = onb['is_existing_sponsor'].lower() == 'true'
-            if isinstance(onb.get('current_phase'), str):
-                onb['current_phase'] = int(onb['current_phase'])
-
-    # Filter out deleted onboardings
-    deleted_ids = session.get('deleted_onboardings', [])
-    onboardings = [o for o in onboardings if o.get('onboarding_id', o.get('id', '')) not in deleted_ids]
-
-    # Merge session phase progress
+            if not onb.get('sponsor_name') and onb.get('sponsor_id') in sponsor_names:
+                onb['sponsor_name'] = sponsor_names[onb['sponsor_id']]
+            existing = onb.get('is_existing_sponsor')
+            if isinstance(existing, str):
+                onb['is_existing_sponsor'] = existing.lower() == 'true'
+            phase = onb.get('current_phase')
+            if isinstance(phase, str):
+                # Blank or malformed cells fall back to the first phase
+                onb['current_phase'] = int(phase) if phase.isdigit() else 1
+
+    # Filter out deleted onboardings and merge session phase progress in one pass
+    deleted_ids = frozenset(session.get('deleted_onboardings') or ())
     phase_progress = session.get('phase_progress', {})
+    if not deleted_ids and not phase_progress:
+        return onboardings
+
+    merged = []
     for onb in onboardings:
         onb_id = onb.get('onboarding_id', onb.get('id', ''))
+        if onb_id in deleted_ids:
+            continue
         if onb_id in phase_progress:
             onb['current_phase'] = phase_progress[onb_id]
-
-    return onboardings
+        merged.append(onb)
+    return merged
 
 
 @app.route('/dashboard')
@@ -587,29 +608,45 @@ def dashboard():
 
     onboardings = _get_onboardings_with_session()
 
-    # Calculate stats
-    stats = {
-        'in_progress': sum(1 for o in onboardings if o.get('status') == 'in_progress'),
-        'pending_approval': sum(1 for o in onboardings if o.get('status') == 'pending_mlro'),
-        'approved_this_month': sum(1 for o in onboardings if o.get('status') == 'approved'),
-        'on_hold': 0
-    }
-
-    # Filter by role
-    if user['role'] == 'bd':
-        onboardings = [o for o in onboardings if o.get('assigned_to') == user['name'] or o.get('current_phase', 0) <= 2]
-    elif user['role'] == 'mlro':
-        onboardings = sorted(onboardings, key=lambda x: (x.get('status') != 'pending_mlro', x.get('updated_at', '')))
-
-    # Add phase_name for display
     phases = get_phases()
+    phase_names = get_phase_names()
+    role = user['role']
+    user_name = user['name']
+
+    # Single pass: tally stats, filter by role and add phase_name for display
+    in_progress = pending_approval = approved = 0
+    visible = []
     for onb in onboardings:
+        status = onb.get('status')
+        if status == 'in_progress':
+            in_progress += 1
+        elif status == 'pending_mlro':
+            pending_approval += 1
+        elif status == 'approved':
+            approved += 1
+
+        if role == 'bd' and not (onb.get('assigned_to') == user_name or onb.get('current_phase', 0) <= 2):
+            continue
+
         phase_num = onb.get('current_phase', 1)
-        if 1 <= phase_num <= len(phases):
-            onb['phase_name'] = phases[phase_num - 1]['name']
+        phase_name = phase_names.get(phase_num)
+        if phase_name:
+            onb['phase_name'] = phase_name
             onb['phase'] = phase_num
         if 'id' not in onb:
             onb['id'] = onb.get('onboarding_id', '')
+        visible.append(onb)
+
+    if role == 'mlro':
+        visible.sort(key=lambda x: (x.get('status') != 'pending_mlro', x.get('updated_at', '')))
+    onboardings = visible
+
+    stats = {
+        'in_progress': in_progress,
+        'pending_approval': pending_approval,
+        'approved_this_month': approved,
+        'on_hold': 0
+    }
 
     return render_template('dashboard.html',
                          onboardings=onboardings,
@@ -630,8 +667,7 @@ def new_onboarding():
 
             # Create new onboarding for existing sponsor's new fund
             # In demo mode, generate a new onboarding ID
-            import random
-            new_onboarding_id = f"ONB-{random.randint(100, 999):03d}"
+            new_onboarding_id = f"ONB-{secrets.randbelow(900) + 100:03d}"
 
             # Store minimal onboarding data in session for demo mode
             if not session.get('onboardings'):
@@ -663,6 +699,144 @@ def new_onboarding():
     return render_template('onboarding/new.html', existing_sponsors=existing_sponsors)
 
 
+def _save_phase1_to_sheets(enquiry_data, sponsor_data, sponsor_principals, gp_directors):
+    """Background task to save phase 1 (enquiry, sponsor and principals) to Google Sheets"""
+    try:
+        enquiry_id = sheets_db.create_enquiry(enquiry_data)
+        logger.info("Phase 1 (background): Created enquiry %s in Sheets", enquiry_id)
+
+        sponsor_id = sheets_db.create_sponsor(sponsor_data)
+        logger.info("Phase 1 (background): Created sponsor %s in Sheets", sponsor_id)
+
+        # Create person records for sponsor principals (directors/UBOs)
+        # and GP directors, then link them, with one append per tab
+        people = sponsor_principals + gp_directors
+        person_ids = sheets_db.create_persons_bulk([
+            {
+                'full_name': person.get('full_name'),
+                'former_names': person.get('former_names', ''),
+                'nationality': person.get('nationality'),
+                'dob': person.get('dob'),
+                'country_of_residence': person.get('country_of_residence'),
+                'residential_address': person.get('residential_address'),
+                'pep_status': 'unknown',
+                'id_verified': False
+            }
+            for person in people
+        ])
+
+        person_roles = [
+            # Link sponsor principals to the sponsor
+            {
+                'person_id': person_id,
+                'entity_id': sponsor_id,
+                'entity_type': 'Sponsor',
+                'role': principal.get('role'),
+                'ownership_pct': principal.get('ownership_pct'),
+                'is_ubo': principal.get('is_ubo', False)
+            }
+            for person_id, principal in zip(person_ids, sponsor_principals)
+        ] + [
+            # Link GP directors to the GP
+            {
+                'person_id': person_id,
+                'entity_id': sponsor_id,  # Will be updated to GP entity when created
+                'entity_type': 'GP',
+                'role': director.get('position', 'director'),
+                'ownership_pct': None,
+                'is_ubo': False
+            }
+            for person_id, director in zip(person_ids[len(sponsor_principals):], gp_directors)
+        ]
+        sheets_db.create_person_roles_bulk(person_roles)
+        logger.info(
+            "Phase 1 (background): Created %d sponsor principals and %d GP directors",
+            len(sponsor_principals), len(gp_directors)
+        )
+
+        logger.info("Phase 1 (background): Completed all Sheets saves")
+    except Exception as e:
+        logger.error(f"Error saving phase 1 to Sheets (background): {e}")
+
+
+def _update_onboarding_in_sheets(onboarding_id, phase, onboarding_data):
+    """Background task to update an onboarding record in Google Sheets"""
+    try:
+        sheets_db.update_onboarding(onboarding_id, onboarding_data)
+        logger.info("Phase %s (background): Updated onboarding in Sheets", phase)
+    except Exception as e:
+        logger.error(f"Error saving phase {phase} to Sheets (background): {e}")
+
+
+# ========== Phase 4 Screening Entities ==========
+
+@dataclass(slots=True)
+class ScreeningEntity:
+    """A person or company listed for screening on the Phase 4 page"""
+    name: str
+    type: str
+    role: str
+    nationality: str
+    group: str
+    registration_number: str = ''
+
+
+def _principal_entity(name, p):
+    """Screening entity for a sponsor principal"""
+    return ScreeningEntity(
+        name=name,
+        type='person',
+        role=p.get('role', 'Principal'),
+        nationality=p.get('nationality', ''),
+        group='principals'
+    )
+
+
+def _gp_director_entity(name, d):
+    """Screening entity for a GP director"""
+    return ScreeningEntity(
+        name=name,
+        type='person',
+        role='GP Director',
+        nationality=d.get('nationality', ''),
+        group='principals'
+    )
+
+
+def _fund_principal_entity(name, fp):
+    """Screening entity for a fund principal"""
+    return ScreeningEntity(
+        name=name,
+        type='person',
+        role=fp.get('position', 'Director').replace('_', ' ').title(),
+        nationality=fp.get('nationality', ''),
+        group='principals'
+    )
+
+
+def _investor_entity(name, inv):
+    """Screening entity for an initial investor"""
+    return ScreeningEntity(
+        name=name,
+        type='company' if inv.get('type', 'institutional') != 'individual' else 'person',
+        role=f"Investor ({inv.get('commitment_pct', '')}%)" if inv.get('commitment_pct') else 'Investor',
+        nationality=inv.get('jurisdiction', ''),
+        group='investors'
+    )
+
+
+def _sponsor_entity(name, enquiry):
+    """Screening entity for the sponsor company"""
+    return ScreeningEntity(
+        name=name,
+        type='company',
+        role='Sponsor Entity',
+        nationality=enquiry.get('jurisdiction', ''),
+        registration_number=enquiry.get('registration_number', ''),
+        group='companies'
+    )
+
+
 @app.route('/onboarding/<onboarding_id>/phase/<int:phase>', methods=['GET', 'POST'])
 @login_required
 def onboarding_phase(onboarding_id, phase):
@@ -682,189 +856,113 @@ def onboarding_phase(onboarding_id, phase):
         sponsor_name = request.form.get('sponsor_name', 'Unknown Sponsor')
         fund_name = request.form.get('fund_name', 'Unknown Fund')
 
-        # Store in session for subsequent phases
-        if sponsor_name and sponsor_name != 'Unknown Sponsor':
+        # Store in session for subsequent phases (only write on change)
+        if sponsor_name and sponsor_name != 'Unknown Sponsor' and session.get('current_sponsor') != sponsor_name:
             session['current_sponsor'] = sponsor_name
-        if fund_name and fund_name != 'Unknown Fund':
+        if fund_name and fund_name != 'Unknown Fund' and session.get('current_fund') != fund_name:
             session['current_fund'] = fund_name
 
         # Use session values if not in form
         sponsor_name = sponsor_name if sponsor_name != 'Unknown Sponsor' else session.get('current_sponsor', 'Unknown Sponsor')
         fund_name = fund_name if fund_name != 'Unknown Fund' else session.get('current_fund', 'Unknown Fund')
 
-        # Build form data dict once
-        form_data = {key: value for key, value in request.form.items() if key != 'action'}
+        # Sheets only has work to do for phase 1 or an existing onboarding;
+        # NEW onboardings past phase 1 have no record to update yet
+        needs_sheets_save = not sheets_db.demo_mode and (phase == 1 or onboarding_id != 'NEW')
+
+        # Build form data dict once, only when something will consume it
+        form_data = None
+        if not DEMO_MODE or needs_sheets_save:
+            form_data = request.form.to_dict()
+            form_data.pop('action', None)
 
-        # Save form data to audit trail (skip in demo mode for performance)
+        # Save form data to audit trail in the background (skip in demo mode)
         if not DEMO_MODE:
-            audit_result = save_form_data(form_data, phase, sponsor_name, fund_name)
-            logger.info(f"Audit trail save for phase {phase}: {audit_result.get('status')}")
+            queue_form_audit(form_data, phase, sponsor_name, fund_name)
 
         # Save to Google Sheets if not in demo mode
         # Run non-essential operations in background for faster phase transitions
-        if not sheets_db.demo_mode:
-            def save_phase_to_sheets():
-                """Background task to save phase data to Google Sheets"""
-                try:
-                    if phase == 1:
-                        # Phase 1: Create/update enquiry with merged form data
-                        # Parse sponsor principals, GP directors, and investors from JSON
-                        sponsor_principals_json = form_data.get('sponsor_principals_json', '[]')
-                        gp_directors_json = form_data.get('gp_directors_json', '[]')
-                        investors_json = form_data.get('investors_json', '[]')
-                        try:
-                            sponsor_principals = json.loads(sponsor_principals_json)
-                        except json.JSONDecodeError:
-                            sponsor_principals = []
-                        try:
-                            gp_directors = json.loads(gp_directors_json)
-                        except json.JSONDecodeError:
-                            gp_directors = []
-                        try:
-                            investors = json.loads(investors_json)
-                        except json.JSONDecodeError:
-                            investors = []
-
-                        # Create enquiry record with all new fields
-                        enquiry_data = {
-                            'sponsor_name': form_data.get('legal_name'),
-                            'trading_name': form_data.get('trading_name', ''),
-                            'fund_name': form_data.get('fund_name'),
-                            'contact_name': form_data.get('contact_name'),
-                            'contact_email': form_data.get('contact_email'),
-                            'entity_type': form_data.get('entity_type'),
-                            'jurisdiction': form_data.get('jurisdiction'),
-                            'registration_number': form_data.get('registration_number'),
-                            'date_incorporated': form_data.get('date_of_incorporation'),
-                            'registered_address': form_data.get('registered_address'),
-                            'business_address': form_data.get('business_address', ''),
-                            'regulatory_status': form_data.get('regulatory_status'),
-                            'regulator': form_data.get('regulator', ''),
-                            'license_number': form_data.get('license_number', ''),
-                            'business_activities': form_data.get('principal_business_activities'),
-                            'source_of_wealth': form_data.get('source_of_wealth', ''),
-                            'source_of_funds': form_data.get('source_of_funds', ''),
-                            'fund_type': form_data.get('fund_type'),
-                            'legal_structure': form_data.get('fund_legal_structure'),
-                            'investment_strategy': form_data.get('investment_strategy'),
-                            'target_size': form_data.get('target_fund_size'),
-                            'declaration_accepted': request.form.get('declaration') == 'on',
-                            'services_required': json.loads(form_data.get('services_required_json', '[]')),
-                            'status': 'in_progress',
-                            'notes': ''
-                        }
-                        enquiry_id = sheets_db.create_enquiry(enquiry_data)
-                        logger.info(f"Phase 1 (background): Created enquiry {enquiry_id} in Sheets")
-
-                        # Create sponsor record
-                        sponsor_data = {
-                            'legal_name': form_data.get('legal_name'),
-                            'trading_name': form_data.get('trading_name', ''),
-                            'entity_type': form_data.get('entity_type'),
-                            'jurisdiction': form_data.get('jurisdiction'),
-                            'registration_number': form_data.get('registration_number'),
-                            'date_incorporated': form_data.get('date_of_incorporation'),
-                            'registered_address': form_data.get('registered_address'),
-                            'business_address': form_data.get('business_address', ''),
-                            'business_activities': form_data.get('principal_business_activities'),
-                            'source_of_wealth': form_data.get('source_of_wealth', ''),
-                            'source_of_funds': form_data.get('source_of_funds', ''),
-                            'regulated_status': form_data.get('regulatory_status'),
-                            'cdd_status': 'in_progress'
-                        }
-                        sponsor_id = sheets_db.create_sponsor(sponsor_data)
-                        logger.info(f"Phase 1 (background): Created sponsor {sponsor_id} in Sheets")
-
-                        # Create person records for sponsor principals (directors/UBOs)
-                        for principal in sponsor_principals:
-                            person_data = {
-                                'full_name': principal.get('full_name'),
-                                'former_names': principal.get('former_names', ''),
-                                'nationality': principal.get('nationality'),
-                                'dob': principal.get('dob'),
-                                'country_of_residence': principal.get('country_of_residence'),
-                                'residential_address': principal.get('residential_address'),
-                                'pep_status': 'unknown',
-                                'id_verified': False
-                            }
-                            person_id = sheets_db.create_person(person_data)
-
-                            # Create person role linking person to sponsor
-                            person_role_data = {
-                                'person_id': person_id,
-                                'entity_id': sponsor_id,
-                                'entity_type': 'Sponsor',
-                                'role': principal.get('role'),
-                                'ownership_pct': principal.get('ownership_pct'),
-                                'is_ubo': principal.get('is_ubo', False)
-                            }
-                            sheets_db.create_person_role(person_role_data)
-                            logger.info(f"Phase 1 (background): Created sponsor principal {person_id}")
-
-                        # Create person records for GP directors
-                        for director in gp_directors:
-                            person_data = {
-                                'full_name': director.get('full_name'),
-                                'former_names': director.get('former_names', ''),
-                                'nationality': director.get('nationality'),
-                                'dob': director.get('dob'),
-                                'country_of_residence': director.get('country_of_residence'),
-                                'residential_address': director.get('residential_address'),
-                                'pep_status': 'unknown',
-                                'id_verified': False
-                            }
-                            person_id = sheets_db.create_person(person_data)
-
-                            # Create person role linking person to GP
-                            person_role_data = {
-                                'person_id': person_id,
-                                'entity_id': sponsor_id,  # Will be updated to GP entity when created
-                                'entity_type': 'GP',
-                                'role': director.get('position', 'director'),
-                                'ownership_pct': None,
-                                'is_ubo': False
-                            }
-                            sheets_db.create_person_role(person_role_data)
-                            logger.info(f"Phase 1 (background): Created GP director {person_id}")
-
-                        logger.info(f"Phase 1 (background): Completed all Sheets saves")
-
-                    elif phase == 2:
-                        # Phase 2 (Fund): Create/update onboarding record with fund details
-                        onboarding_data = {
-                            'fund_name': form_data.get('fund_name') or fund_name,
-                            'current_phase': phase,
-                            'status': 'in_progress',
-                            'is_existing_sponsor': form_data.get('is_existing_sponsor', False)
-                        }
-                        if onboarding_id != 'NEW':
-                            sheets_db.update_onboarding(onboarding_id, onboarding_data)
-                        logger.info(f"Phase 2 (background): Updated onboarding in Sheets")
-
-                    # Update onboarding phase for phases 3+
-                    if phase >= 3 and onboarding_id != 'NEW':
-                        sheets_db.update_onboarding(onboarding_id, {'current_phase': phase})
-                        logger.info(f"Phase {phase} (background): Updated phase in Sheets")
-
-                except Exception as e:
-                    logger.error(f"Error saving phase {phase} to Sheets (background): {e}")
-
-            # Run Sheets operations in background thread
-            run_in_background(save_phase_to_sheets)
+        if needs_sheets_save:
+            # Decode each phase 1 JSON field once, up front; the background
+            # save and the session writes share the results
+            if phase == 1:
+                parsed = {
+                    field: _parse_json_list(form_data.get(f'{field}_json'))
+                    for field in ('sponsor_principals', 'gp_directors', 'investors', 'services_required')
+                }
+
+            # Build the Sheets payloads here so the queued job only holds
+            # these small dicts, not form_data or the request
+            if phase == 1:
+                # Phase 1: Create/update enquiry with merged form data
+                # Sponsor details shared by the enquiry and sponsor records,
+                # read from the form once
+                legal_name = form_data.get('legal_name')
+                regulatory_status = form_data.get('regulatory_status')
+                sponsor_fields = {
+                    'trading_name': form_data.get('trading_name', ''),
+                    'entity_type': form_data.get('entity_type'),
+                    'jurisdiction': form_data.get('jurisdiction'),
+                    'registration_number': form_data.get('registration_number'),
+                    'date_incorporated': form_data.get('date_of_incorporation'),
+                    'registered_address': form_data.get('registered_address'),
+                    'business_address': form_data.get('business_address', ''),
+                    'business_activities': form_data.get('principal_business_activities'),
+                    'source_of_wealth': form_data.get('source_of_wealth', ''),
+                    'source_of_funds': form_data.get('source_of_funds', ''),
+                }
+                enquiry_data = {
+                    **sponsor_fields,
+                    'sponsor_name': legal_name,
+                    'fund_name': form_data.get('fund_name'),
+                    'contact_name': form_data.get('contact_name'),
+                    'contact_email': form_data.get('contact_email'),
+                    'regulatory_status': regulatory_status,
+                    'regulator': form_data.get('regulator', ''),
+                    'license_number': form_data.get('license_number', ''),
+                    'fund_type': form_data.get('fund_type'),
+                    'legal_structure': form_data.get('fund_legal_structure'),
+                    'investment_strategy': form_data.get('investment_strategy'),
+                    'target_size': form_data.get('target_fund_size'),
+                    'declaration_accepted': form_data.get('declaration') == 'on',
+                    'services_required': parsed['services_required'],
+                    'status': 'in_progress',
+                    'notes': ''
+                }
+                sponsor_data = {
+                    **sponsor_fields,
+                    'legal_name': legal_name,
+                    'regulated_status': regulatory_status,
+                    'cdd_status': 'in_progress'
+                }
+                queue_sheets_write(
+                    _save_phase1_to_sheets, enquiry_data, sponsor_data,
+                    parsed['sponsor_principals'], parsed['gp_directors']
+                )
+            else:
+                if phase == 2:
+                    # Phase 2 (Fund): Update onboarding record with fund details
+                    onboarding_data = {
+                        'fund_name': form_data.get('fund_name') or fund_name,
+                        'current_phase': phase,
+                        'status': 'in_progress',
+                        'is_existing_sponsor': form_data.get('is_existing_sponsor', False)
+                    }
+                else:
+                    # Phases 3+: Update onboarding phase
+                    onboarding_data = {'current_phase': phase}
+                queue_sheets_write(_update_onboarding_in_sheets, onboarding_id, phase, onboarding_data)
 
             # Store essential session data synchronously (before redirect)
             if phase == 1:
-                session['initial_investors'] = json.loads(form_data.get('investors_json', '[]'))
+                session['initial_investors'] = parsed['investors']
                 session['current_sponsor'] = form_data.get('legal_name')
                 session['current_fund'] = form_data.get('fund_name')
-                try:
-                    session['services_required'] = json.loads(form_data.get('services_required_json', '[]'))
-                except (json.JSONDecodeError, TypeError):
-                    session['services_required'] = []
+                session['services_required'] = parsed['services_required']
 
         # On phase 1, ensure folder structure is created
         if phase == 1 and sponsor_name != 'Unknown Sponsor':
-            ensure_folder_structure(sponsor_name, fund_name)
+            ensure_folders_once(sponsor_name, fund_name)
 
         if action == 'save':
             # Save draft - stay on current phase
@@ -904,7 +1002,7 @@ def onboarding_phase(onboarding_id, phase):
         if onboarding:
             enquiry_id = onboarding.get('enquiry_id')
             if enquiry_id:
-                logger.info(f"Loaded enquiry_id '{enquiry_id}' from onboarding {onboarding_id}")
+                logger.info("Loaded enquiry_id '%s' from onboarding %s", enquiry_id, onboarding_id)
 
     # For new onboardings, fall back to session
     if not enquiry_id and onboarding_id == 'NEW':
@@ -914,23 +1012,25 @@ def onboarding_phase(onboarding_id, phase):
     if enquiry_id:
         # Try to get from Sheets first
         sheets_enquiry = sheets_db.get_enquiry(enquiry_id)
-        mock_enquiry = MOCK_ENQUIRIES.get(enquiry_id)
+        mock_enquiry = get_mock_enquiries().get(enquiry_id)
 
         if sheets_enquiry:
             enquiry = sheets_enquiry
-            # Merge all missing fields from MOCK_ENQUIRIES into Sheets data
+            # Merge all missing fields from the mock enquiry into Sheets data
             # (Sheets may not have all fields, especially nested ones like principals)
             if mock_enquiry:
+                # Mock values fill any field Sheets lacks or left empty
+                # (None, '' or []), including regulatory_status
+                enquiry = {
+                    **mock_enquiry,
+                    **{key: value for key, value in sheets_enquiry.items()
+                       if key not in mock_enquiry or value not in (None, '', [])}
+                }
+
                 # Merge nested arrays (stored in separate Sheets tables)
-                for array_key in ['principals', 'gp_directors', 'initial_investors']:
-                    if array_key not in enquiry or not enquiry.get(array_key):
+                for array_key in ('principals', 'gp_directors', 'initial_investors'):
+                    if not enquiry.get(array_key):
                         enquiry[array_key] = mock_enquiry.get(array_key, [])
-
-                # Merge all other missing scalar fields (including regulatory_status)
-                for key, value in mock_enquiry.items():
-                    # Use mock value if key missing, empty string, or None
-                    if key not in enquiry or enquiry.get(key) in (None, '', []):
-                        enquiry[key] = value
         else:
             enquiry = mock_enquiry
 
@@ -938,23 +1038,19 @@ def onboarding_phase(onboarding_id, phase):
         if enquiry:
             raw_status = enquiry.get('regulatory_status', '')
             if raw_status:
-                status_lower = raw_status.lower()
-                if 'regulated' in status_lower and 'not' not in status_lower:
-                    enquiry['regulatory_status'] = 'regulated'
-                elif 'not' in status_lower or 'unregulated' in status_lower:
-                    enquiry['regulatory_status'] = 'not_regulated'
-                elif 'exempt' in status_lower:
-                    enquiry['regulatory_status'] = 'exempt'
-                elif 'pending' in status_lower:
-                    enquiry['regulatory_status'] = 'pending_registration'
-            logger.info(f"Enquiry {enquiry_id} loaded - regulatory_status: '{enquiry.get('regulatory_status')}', sponsor: '{enquiry.get('sponsor_name')}'")
-
-        # Update session with enquiry_id for subsequent phases
-        session['current_enquiry_id'] = enquiry_id
+                enquiry['regulatory_status'] = _normalize_regulatory_status(raw_status)
+            logger.info(
+                "Enquiry %s loaded - regulatory_status: '%s', sponsor: '%s'",
+                enquiry_id, enquiry.get('regulatory_status'), enquiry.get('sponsor_name')
+            )
+
+        # Update session with enquiry_id for subsequent phases (only write on change)
+        if session.get('current_enquiry_id') != enquiry_id:
+            session['current_enquiry_id'] = enquiry_id
     uploaded = request.args.get('uploaded') == '1'  # Flag if data came from uploaded document
 
     # Get list of pending enquiries for Phase 1 dropdown
-    pending_enquiries = [e for e in MOCK_ENQUIRIES.values() if e['status'] == 'pending'] if phase == 1 else []
+    pending_enquiries = get_mock_enquiries_by_status().get('pending', ()) if phase == 1 else ()
 
     # Prepare context for template
     context = {
@@ -974,7 +1070,7 @@ def onboarding_phase(onboarding_id, phase):
             # Count GP directors from enquiry
             num_directors += len(enquiry.get('gp_directors', []))
             # Count fund principals with director roles
-            fund_principals = sheets_db.query('FundPrincipals', filters={'onboarding_id': onboarding_id}) if onboarding_id != 'NEW' else []
+            fund_principals = sheets_db.get_fund_principals_by_onboarding(onboarding_id) if onboarding_id != 'NEW' else []
             for fp in fund_principals:
                 pos = (fp.get('position') or '').lower()
                 if 'director' in pos:
@@ -987,9 +1083,7 @@ def onboarding_phase(onboarding_id, phase):
     # Phase 2: Add additional principals (not from enquiry)
     if phase == 2 and onboarding_id != 'NEW':
         try:
-            added_principals = sheets_db.query('FundPrincipals', filters={
-                'onboarding_id': onboarding_id
-            })
+            added_principals = sheets_db.get_fund_principals_by_onboarding(onboarding_id)
             # Filter out enquiry principals - only get manually added ones
             added_principals = [p for p in added_principals if p.get('source') != 'enquiry']
             context['added_principals'] = added_principals
@@ -1014,82 +1108,40 @@ def onboarding_phase(onboarding_id, phase):
 
     # Phase 4: Build dynamic screening entities from enquiry data
     if phase == 4 and enquiry:
-        screening_entities = []
-        seen_names = set()
-
-        # Sponsor principals (individuals)
-        for p in enquiry.get('principals', []):
-            name = p.get('full_name') or p.get('name', '')
-            if name and name not in seen_names:
-                seen_names.add(name)
-                screening_entities.append({
-                    'name': name,
-                    'type': 'person',
-                    'role': p.get('role', 'Principal'),
-                    'nationality': p.get('nationality', ''),
-                    'group': 'principals'
-                })
-
-        # GP Directors (may overlap with principals)
-        for d in enquiry.get('gp_directors', []):
-            name = d.get('full_name') or d.get('name', '')
-            if name and name not in seen_names:
-                seen_names.add(name)
-                screening_entities.append({
-                    'name': name,
-                    'type': 'person',
-                    'role': 'GP Director',
-                    'nationality': d.get('nationality', ''),
-                    'group': 'principals'
-                })
-
         # Fund principals (e.g. Robert Jones)
         fund_principals = []
         if onboarding_id != 'NEW':
             try:
-                fund_principals = sheets_db.query('FundPrincipals', filters={'onboarding_id': onboarding_id})
+                fund_principals = sheets_db.get_fund_principals_by_onboarding(onboarding_id)
             except Exception:
                 fund_principals = []
         if not fund_principals and DEMO_MODE:
             fund_principals = [{'full_name': 'Robert Jones', 'nationality': 'British', 'position': 'director'}]
-        for fp in fund_principals:
-            name = fp.get('full_name') or fp.get('name', '')
-            if name and name not in seen_names:
-                seen_names.add(name)
-                screening_entities.append({
-                    'name': name,
-                    'type': 'person',
-                    'role': fp.get('position', 'Director').replace('_', ' ').title(),
-                    'nationality': fp.get('nationality', ''),
-                    'group': 'principals'
-                })
 
-        # Initial investors
-        for inv in enquiry.get('initial_investors', []):
-            name = inv.get('name', '')
-            inv_type = inv.get('type', 'institutional')
-            if name and name not in seen_names:
-                seen_names.add(name)
-                screening_entities.append({
-                    'name': name,
-                    'type': 'company' if inv_type != 'individual' else 'person',
-                    'role': f"Investor ({inv.get('commitment_pct', '')}%)" if inv.get('commitment_pct') else 'Investor',
-                    'nationality': inv.get('jurisdiction', ''),
-                    'group': 'investors'
-                })
-
-        # Sponsor entity
         sponsor_name = enquiry.get('sponsor_name', '')
-        if sponsor_name and sponsor_name not in seen_names:
-            seen_names.add(sponsor_name)
-            screening_entities.append({
-                'name': sponsor_name,
-                'type': 'company',
-                'role': 'Sponsor Entity',
-                'nationality': enquiry.get('jurisdiction', ''),
-                'registration_number': enquiry.get('registration_number', ''),
-                'group': 'companies'
-            })
+        candidates = chain(
+            # Sponsor principals (individuals)
+            ((p.get('full_name') or p.get('name', ''), p, _principal_entity)
+             for p in enquiry.get('principals', [])),
+            # GP Directors (may overlap with principals)
+            ((d.get('full_name') or d.get('name', ''), d, _gp_director_entity)
+             for d in enquiry.get('gp_directors', [])),
+            # Fund principals
+            ((fp.get('full_name') or fp.get('name', ''), fp, _fund_principal_entity)
+             for fp in fund_principals),
+            # Initial investors
+            ((inv.get('name', ''), inv, _investor_entity)
+             for inv in enquiry.get('initial_investors', [])),
+            # Sponsor entity
+            ((sponsor_name, enquiry, _sponsor_entity),)
+        )
+
+        # Keyed by name so the first occurrence of each participant wins
+        entities_by_name = {}
+        for name, source, build_entity in candidates:
+            if name and name not in entities_by_name:
+                entities_by_name[name] = build_entity(name, source)
+        screening_entities = list(entities_by_name.values())
 
         # Get stored screening results from session
         stored_screening = session.get('screening_results', {}).get(onboarding_id, {})
@@ -1101,31 +1153,24 @@ def onboarding_phase(onboarding_id, phase):
 
     # Clear kyc_phase_active flag when visiting non-KYC pages (Phase 5)
     # This ensures navigating through the workflow starts fresh
-    if phase != 5 and 'kyc_phase_active' in session:
-        session['kyc_phase_active'].pop(onboarding_id, None)
+    if phase != 5 and onboarding_id in session.get('kyc_phase_active', {}):
+        del session['kyc_phase_active'][onboarding_id]
         session.modified = True
 
     # Phase 5 (KYC & CDD): Clear stale documents on fresh entry
     if phase == 5:
-        if 'kyc_phase_active' not in session:
-            session['kyc_phase_active'] = {}
-
-        if not session['kyc_phase_active'].get(onboarding_id):
+        if not session.get('kyc_phase_active', {}).get(onboarding_id):
             # First visit to KYC phase for this onboarding - clear any stale documents
-            all_docs = session.get('kyc_documents', {})
-            stale_ids = [doc_id for doc_id, doc in all_docs.items()
-                         if doc.get('onboarding_id') == onboarding_id]
-            for doc_id in stale_ids:
-                del all_docs[doc_id]
+            stale_docs = _session_kyc_documents().pop(onboarding_id, None)
 
-            if stale_ids:
-                logger.info(f"KYC phase fresh entry: cleared {len(stale_ids)} stale documents for {onboarding_id}")
+            if stale_docs:
+                logger.info("KYC phase fresh entry: cleared %d stale documents for %s", len(stale_docs), onboarding_id)
 
-            session['kyc_phase_active'][onboarding_id] = True
+            session.setdefault('kyc_phase_active', {})[onboarding_id] = True
             session.modified = True
 
         # KYC phase also needs risk data for display
-        risk_data = sheets_db.get_risk_assessment(onboarding_id)
+        risk_data = get_risk_assessment(onboarding_id)
         kyc_approvals = session.get('kyc_approvals', {}).get(onboarding_id, {
             'compliance': {'status': 'pending'},
             'mlro': {'status': 'pending'}
@@ -1142,18 +1187,16 @@ def onboarding_phase(onboarding_id, phase):
     # Phase 6 (Approval): Add screening, risk, and Board approval data
     if phase == 6:
         screening_results = sheets_db.get_screenings(onboarding_id)
-        risk_data = sheets_db.get_risk_assessment(onboarding_id)
+        risk_data = get_risk_assessment(onboarding_id)
 
         # Pre-seed KYC approvals in demo mode for Phase 6
         # (In production, these would come from Phase 5 sign-offs)
-        if 'kyc_approvals' not in session:
-            session['kyc_approvals'] = {}
         if onboarding_id not in session.get('kyc_approvals', {}):
-            session['kyc_approvals'][onboarding_id] = {
+            session.setdefault('kyc_approvals', {})[onboarding_id] = {
                 'compliance': {'status': 'approved', 'approved': True, 'by': 'Jane Cooper (Compliance)', 'at': '2026-02-05 10:30'},
                 'mlro': {'status': 'approved', 'approved': True, 'by': 'David Wright (MLRO)', 'at': '2026-02-05 11:00'}
             }
-        session.modified = True
+            session.modified = True
 
         # Board approval state
         approvals = session.get('approvals', {}).get(onboarding_id, {
@@ -1163,12 +1206,11 @@ def onboarding_phase(onboarding_id, phase):
         # Calculate fees for display
         fee_data = None
         if enquiry:
-            from services.fee_calculator import calculate_fees
-            services = enquiry.get('services_required', ['nav', 'investor', 'accounting', 'ta', 'director', 'cosec'])
+            services = enquiry.get('services_required', _DEFAULT_SERVICES)
             fund_size_str = enquiry.get('target_size', '500000000')
             fund_size = int(str(fund_size_str).replace(',', ''))
             num_investors = len(enquiry.get('initial_investors', [])) or 50
-            fee_data = calculate_fees(fund_size, services, num_investors=num_investors)
+            fee_data = _calculate_fees_cached(fund_size, tuple(services), num_investors)
 
         context.update({
             'screening_results': screening_results,
@@ -1183,37 +1225,37 @@ def onboarding_phase(onboarding_id, phase):
 
     # Phase 7 (Complete): Add dates, risk, fee data, and signed agreement status
     if phase == 7:
-        risk_data = sheets_db.get_risk_assessment(onboarding_id)
+        risk_data = get_risk_assessment(onboarding_id)
 
         # Calculate fees for display
         fee_data = None
         if enquiry:
-            from services.fee_calculator import calculate_fees
-            services = enquiry.get('services_required', ['nav', 'investor', 'accounting', 'ta', 'director', 'cosec'])
+            services = enquiry.get('services_required', _DEFAULT_SERVICES)
             fund_size_str = enquiry.get('target_size', '500000000')
             fund_size = int(str(fund_size_str).replace(',', ''))
             num_investors = len(enquiry.get('initial_investors', [])) or 50
-            fee_data = calculate_fees(fund_size, services, num_investors=num_investors)
+            fee_data = _calculate_fees_cached(fund_size, tuple(services), num_investors)
 
         # Parse enquiry submitted_at to generate realistic phase dates
-        from datetime import timedelta
         enquiry_submitted = enquiry.get('submitted_at', '') if enquiry else ''
         try:
             base_date = datetime.strptime(enquiry_submitted, '%Y-%m-%d %H:%M')
         except (ValueError, TypeError):
             base_date = datetime.now()
 
-        # Generate phase completion dates relative to enquiry submission
+        # Generate phase completion dates relative to enquiry submission,
+        # as offsets from midnight on the submission day
+        day_start = base_date.replace(hour=0, minute=0, second=0, microsecond=0)
         phase_dates = {
             'enquiry_received': base_date,
-            'phase1': base_date.replace(hour=9, minute=0),
-            'phase2': base_date.replace(hour=14, minute=30),
-            'phase3': (base_date + timedelta(days=1)).replace(hour=10, minute=0),
-            'phase4': (base_date + timedelta(days=1)).replace(hour=11, minute=30),
+            'phase1': day_start + timedelta(hours=9),
+            'phase2': day_start + timedelta(hours=14, minutes=30),
+            'phase3': day_start + timedelta(days=1, hours=10),
+            'phase4': day_start + timedelta(days=1, hours=11, minutes=30),
             'phase5': None,  # EDD skipped for low risk
-            'phase6': (base_date + timedelta(days=1)).replace(hour=15, minute=0),
-            'phase7': (base_date + timedelta(days=2)).replace(hour=9, minute=30),
-            'completed': (base_date + timedelta(days=2)).replace(hour=10, minute=0),
+            'phase6': day_start + timedelta(days=1, hours=15),
+            'phase7': day_start + timedelta(days=2, hours=9, minutes=30),
+            'completed': day_start + timedelta(days=2, hours=10),
         }
 
         # Signed Admin Agreement status from session
@@ -1307,9 +1349,7 @@ def submit_enquiry():
 
     # Create folder structure and save enquiry to audit trail (skip in demo mode)
     if not DEMO_MODE and sponsor_name != 'Unknown Sponsor':
-        ensure_folder_structure(sponsor_name, fund_name)
-        audit_result = save_form_data(form_data, 1, sponsor_name, fund_name)
-        logger.info(f"Enquiry saved to audit trail: {audit_result.get('status')}")
+        queue_form_audit(form_data, 1, sponsor_name, fund_name)
 
     # In production, this would also save to Google Sheets
     # For POC, we'll just show a success message
@@ -1328,9 +1368,10 @@ def enquiry_submitted():
 def pending_enquiries():
     """View pending enquiries (internal staff)"""
     enquiries = sheets_db.get_enquiries()
-    if not enquiries:
-        enquiries = list(MOCK_ENQUIRIES.values())
-    enquiries.sort(key=lambda x: x.get('submitted_at', x.get('created_at', '')), reverse=True)
+    if enquiries:
+        enquiries = _newest_first(enquiries)
+    else:
+        enquiries = get_mock_enquiries_newest_first()
     return render_template('enquiries.html', enquiries=enquiries)
 
 
@@ -1340,143 +1381,144 @@ def view_enquiry(enquiry_id):
     """View details of a submitted enquiry"""
     enquiry = sheets_db.get_enquiry(enquiry_id)
     if not enquiry:
-        enquiry = MOCK_ENQUIRIES.get(enquiry_id)
+        enquiry = get_mock_enquiries().get(enquiry_id)
     if not enquiry:
         flash('Enquiry not found.', 'danger')
         return redirect(url_for('pending_enquiries'))
     return render_template('enquiry_detail.html', enquiry=enquiry)
 
 
+# Table styles for the enquiry review PDF, shared by every export
+# (setStyle only reads the commands, so one instance serves all tables)
+_PDF_LABEL_VALUE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+_PDF_GRID_HEADER_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+])
+
+
+@lru_cache(maxsize=1)
+def _enquiry_pdf_styles():
+    """Paragraph styles for the enquiry review PDF (built once per process)"""
+    styles = getSampleStyleSheet()
+    return {
+        'Normal': styles['Normal'],
+        'Title': ParagraphStyle('Title', parent=styles['Heading1'], fontSize=16, spaceAfter=20),
+        'Section': ParagraphStyle('Section', parent=styles['Heading2'], fontSize=12, textColor=colors.HexColor('#0d6efd'), spaceBefore=15, spaceAfter=10),
+        'Footer': ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.grey),
+    }
+
+
 @app.route('/enquiry/<enquiry_id>/export-pdf')
 @login_required
 def export_enquiry_pdf(enquiry_id):
     """Export enquiry as PDF for review"""
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.units import inch
-    import io
-
     # Get enquiry data
-    enquiry = MOCK_ENQUIRIES.get(enquiry_id)
+    enquiry = get_mock_enquiries().get(enquiry_id)
     if not enquiry:
         flash('Enquiry not found', 'danger')
         return redirect(url_for('pending_enquiries'))
 
+    # One timestamp for the header and the filename
+    now = datetime.now()
+
     # Create PDF
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=16, spaceAfter=20)
-    section_style = ParagraphStyle('Section', parent=styles['Heading2'], fontSize=12, textColor=colors.HexColor('#0d6efd'), spaceBefore=15, spaceAfter=10)
-    label_style = ParagraphStyle('Label', parent=styles['Normal'], fontSize=9, textColor=colors.grey)
-    value_style = ParagraphStyle('Value', parent=styles['Normal'], fontSize=10, spaceBefore=2, spaceAfter=8)
+    styles = _enquiry_pdf_styles()
+    title_style = styles['Title']
+    section_style = styles['Section']
 
     elements = []
 
     # Title
     elements.append(Paragraph(f"Enquiry Review: {enquiry_id}", title_style))
-    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%d %B %Y at %H:%M')}", styles['Normal']))
+    elements.append(Paragraph(f"Generated: {now.strftime('%d %B %Y at %H:%M')}", styles['Normal']))
     elements.append(Spacer(1, 20))
 
+    get = enquiry.get
+
     # Sponsor Information
     elements.append(Paragraph("1. Sponsor Entity Details", section_style))
     sponsor_data = [
-        ['Legal Name:', enquiry.get('sponsor_name', '-')],
-        ['Entity Type:', enquiry.get('entity_type', '-').upper()],
-        ['Jurisdiction:', enquiry.get('jurisdiction', '-')],
-        ['Registration No:', enquiry.get('registration_number', '-')],
-        ['Regulatory Status:', enquiry.get('regulatory_status', '-')],
-        ['Date of Incorporation:', enquiry.get('date_of_incorporation', '-')],
-        ['Website:', enquiry.get('website', '-')],
-        ['LEI:', enquiry.get('lei', '-')],
-        ['Tax ID:', enquiry.get('tax_id', '-')],
+        ['Legal Name:', get('sponsor_name', '-')],
+        ['Entity Type:', get('entity_type', '-').upper()],
+        ['Jurisdiction:', get('jurisdiction', '-')],
+        ['Registration No:', get('registration_number', '-')],
+        ['Regulatory Status:', get('regulatory_status', '-')],
+        ['Date of Incorporation:', get('date_of_incorporation', '-')],
+        ['Website:', get('website', '-')],
+        ['LEI:', get('lei', '-')],
+        ['Tax ID:', get('tax_id', '-')],
     ]
-    if enquiry.get('ultimate_parent'):
-        sponsor_data.append(['Ultimate Parent:', enquiry.get('ultimate_parent', '-')])
-        sponsor_data.append(['Parent Jurisdiction:', enquiry.get('parent_jurisdiction', '-')])
+    ultimate_parent = get('ultimate_parent')
+    if ultimate_parent:
+        sponsor_data.append(['Ultimate Parent:', ultimate_parent])
+        sponsor_data.append(['Parent Jurisdiction:', get('parent_jurisdiction', '-')])
 
     t = Table(sponsor_data, colWidths=[1.8*inch, 4.5*inch])
-    t.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
+    t.setStyle(_PDF_LABEL_VALUE_STYLE)
     elements.append(t)
 
     # Fund Information
     elements.append(Paragraph("2. Proposed Fund", section_style))
+    fund_type = get('fund_type')
+    investment_strategy = get('investment_strategy', '-')
     fund_data = [
-        ['Fund Name:', enquiry.get('fund_name', '-')],
-        ['Fund Type:', enquiry.get('fund_type', '-').upper() if enquiry.get('fund_type') else '-'],
-        ['Legal Structure:', enquiry.get('legal_structure', '-')],
-        ['Target Size:', f"${enquiry.get('target_size', '-')}"],
-        ['Investment Strategy:', enquiry.get('investment_strategy', '-')[:200] + '...' if len(enquiry.get('investment_strategy', '')) > 200 else enquiry.get('investment_strategy', '-')],
+        ['Fund Name:', get('fund_name', '-')],
+        ['Fund Type:', fund_type.upper() if fund_type else '-'],
+        ['Legal Structure:', get('legal_structure', '-')],
+        ['Target Size:', f"${get('target_size', '-')}"],
+        ['Investment Strategy:', investment_strategy[:200] + '...' if len(investment_strategy) > 200 else investment_strategy],
     ]
     t2 = Table(fund_data, colWidths=[1.8*inch, 4.5*inch])
-    t2.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
+    t2.setStyle(_PDF_LABEL_VALUE_STYLE)
     elements.append(t2)
 
     # Principals
-    if enquiry.get('principals'):
+    principals = get('principals')
+    if principals:
         elements.append(Paragraph("3. Key Principals", section_style))
         principal_data = [['Name', 'Role', 'Nationality', 'Ownership']]
-        for p in enquiry.get('principals', []):
+        for p in principals:
             principal_data.append([p.get('name', '-'), p.get('role', '-'), p.get('nationality', '-'), p.get('ownership', '-')])
         t3 = Table(principal_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.3*inch])
-        t3.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        t3.setStyle(_PDF_GRID_HEADER_STYLE)
         elements.append(t3)
 
     # Contact
     elements.append(Paragraph("4. Primary Contact", section_style))
     contact_data = [
-        ['Name:', enquiry.get('contact_name', '-')],
-        ['Email:', enquiry.get('contact_email', '-')],
-        ['Phone:', enquiry.get('contact_phone', '-')],
+        ['Name:', get('contact_name', '-')],
+        ['Email:', get('contact_email', '-')],
+        ['Phone:', get('contact_phone', '-')],
     ]
     t4 = Table(contact_data, colWidths=[1.8*inch, 4.5*inch])
-    t4.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
+    t4.setStyle(_PDF_LABEL_VALUE_STYLE)
     elements.append(t4)
 
     # Footer
     elements.append(Spacer(1, 30))
     elements.append(Paragraph("-" * 80, styles['Normal']))
-    elements.append(Paragraph("CONFIDENTIAL - For internal compliance review only",
-                             ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.grey)))
+    elements.append(Paragraph("CONFIDENTIAL - For internal compliance review only", styles['Footer']))
 
     # Build PDF
     doc.build(elements)
     buffer.seek(0)
 
-    filename = f"Enquiry-{enquiry_id}-{datetime.now().strftime('%Y%m%d')}.pdf"
-    return Response(
-        buffer.getvalue(),
-        mimetype='application/pdf',
-        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
-    )
+    # Serve straight from the buffer in chunks rather than copying it to bytes
+    filename = f"Enquiry-{enquiry_id}-{now.strftime('%Y%m%d')}.pdf"
+    return send_file(buffer, mimetype='application/pdf', as_attachment=True, download_name=filename)
 
 
 @app.route('/enquiry/<enquiry_id>/start-onboarding')
@@ -1485,7 +1527,7 @@ def start_onboarding_from_enquiry(enquiry_id):
     """Start onboarding process from a submitted enquiry"""
     enquiry = sheets_db.get_enquiry(enquiry_id)
     if not enquiry:
-        enquiry = MOCK_ENQUIRIES.get(enquiry_id)
+        enquiry = get_mock_enquiries().get(enquiry_id)
     if not enquiry:
         flash('Enquiry not found.', 'danger')
         return redirect(url_for('pending_enquiries'))
@@ -1530,7 +1572,6 @@ def sample_enquiries():
 def upload_enquiry():
     """Handle enquiry form upload and AI extraction"""
     from services.gdrive_audit import get_client as get_gdrive_client
-    import tempfile
 
     if 'enquiry_file' not in request.files:
         flash('No file uploaded.', 'danger')
@@ -1545,17 +1586,13 @@ def upload_enquiry():
     gdrive_client = get_gdrive_client()
 
     # For demo, use mock data; in production would extract from uploaded file
-    # Save the uploaded file temporarily and upload to GDrive
-    enquiry = MOCK_ENQUIRIES.get('ENQ-001')
+    enquiry = get_mock_enquiries().get('ENQ-001')
     sponsor_name = enquiry.get('sponsor_name', 'Unknown Sponsor') if enquiry else 'Unknown Sponsor'
     fund_name = enquiry.get('fund_name', 'Unknown Fund') if enquiry else 'Unknown Fund'
 
-    # Upload the file content to Google Drive
-    file_content = file.read()
-    file.seek(0)  # Reset file pointer
-
-    audit_result = gdrive_client.upload_content(
-        content=file_content,
+    # Stream the upload to Google Drive rather than reading it into memory
+    audit_result = gdrive_client.upload_stream(
+        stream=file.stream,
         filename=f"uploaded-enquiry-{file.filename}",
         sponsor_name=sponsor_name,
         fund_name=fund_name,
@@ -1577,12 +1614,58 @@ def upload_enquiry():
 
 # ========== API Routes ==========
 
+def _save_screening_audit(screening_data, sponsor_name, fund_name):
+    """Background task to save screening results to the Google Drive audit trail"""
+    try:
+        result = save_screening_results(screening_data, sponsor_name, fund_name)
+        logger.info(f"Screening audit trail save: {result.get('status')}")
+    except Exception as e:
+        logger.error(f"Error saving screening results to audit trail (background): {e}")
+
+
+def _save_screenings_to_sheets(onboarding_id, screening_results, screened_by):
+    """Background task to save individual screening results to Google Sheets"""
+    try:
+        # One append for the whole batch rather than a round-trip per entity
+        sheets_db.save_screenings_bulk([
+            {
+                'onboarding_id': onboarding_id,
+                'person_id': None,  # Can be linked if tracking persons
+                'screening_type': 'comprehensive',
+                'result': result.get('status', 'clear'),
+                'match_details': result.get('matches', []),  # Encoded by orjson when the row is built
+                'risk_level': result.get('risk_level', 'clear'),
+                'screened_by': screened_by
+            }
+            for result in screening_results
+        ])
+    except Exception as e:
+        logger.error(f"Error saving screenings to Sheets (background): {e}")
+
+
+def _send_screening_notifications(onboarding_data, screening_results, risk_assessment):
+    """Background task to send the screening email notifications"""
+    try:
+        # Notify screening complete
+        notify_screening_complete(onboarding_data, screening_results, risk_assessment)
+
+        # Notify if EDD required
+        if risk_assessment.get('edd_required'):
+            notify_edd_triggered(onboarding_data, risk_assessment)
+
+        # Notify if approval required (above compliance level)
+        if risk_assessment.get('approval_level') != 'compliance':
+            notify_approval_required(onboarding_data, risk_assessment)
+    except Exception as e:
+        logger.error(f"Error sending screening notifications (background): {e}")
+
+
 @app.route('/api/screening/run', methods=['POST'])
 @login_required
 def api_run_screening():
     """API: Run sanctions/PEP screening via OpenSanctions"""
     from services.opensanctions import batch_screen, get_client
-    from services.gdrive_audit import save_screening_results, get_client as get_gdrive_client
+    from services.gdrive_audit import get_client as get_gdrive_client
     from services.risk_scoring import calculate_risk
 
     data = request.get_json()
@@ -1599,6 +1682,8 @@ def api_run_screening():
 
     # Run batch screening
     results = batch_screen(entities, threshold=0.5)
+    # Shared by the audit trail and the session copy so they agree
+    screened_at = datetime.now().isoformat()
 
     # Format response
     screening_results = []
@@ -1636,51 +1721,31 @@ def api_run_screening():
             'edd_triggered': risk_assessment['edd_required']
         })
         risk_assessment['assessment_id'] = assessment_id
+        invalidate_risk_assessment(onboarding_id)
 
-    # Save screening results to Google Drive audit trail
+    # Save screening results to Google Drive audit trail (background)
     gdrive_client = get_gdrive_client()
-    audit_result = save_screening_results(
-        screening_results={
-            'entities_screened': entities,
-            'results': screening_results,
-            'screened_at': datetime.now().isoformat(),
-            'demo_mode': demo_mode
-        },
-        sponsor_name=sponsor_name,
-        fund_name=fund_name
-    )
+    run_in_background(_save_screening_audit, {
+        'entities_screened': entities,
+        'results': screening_results,
+        'screened_at': screened_at,
+        'demo_mode': demo_mode
+    }, sponsor_name, fund_name)
 
-    # Save individual screening results to Sheets database
+    # Save individual screening results to Sheets database (background writer)
     current_user = get_current_user()
-    for result in screening_results:
-        screening_data = {
-            'onboarding_id': onboarding_id or 'NEW',
-            'person_id': None,  # Can be linked if tracking persons
-            'screening_type': 'comprehensive',
-            'result': result.get('status', 'clear'),
-            'match_details': json.dumps(result.get('matches', [])),
-            'risk_level': result.get('risk_level', 'clear'),
-            'screened_by': current_user['name'] if current_user else 'System'
-        }
-        sheets_db.save_screening(screening_data)
+    queue_sheets_write(
+        _save_screenings_to_sheets, onboarding_id or 'NEW', screening_results,
+        current_user['name'] if current_user else 'System'
+    )
 
-    # Send email notifications
+    # Send email notifications (background)
     onboarding_data = {
         'onboarding_id': onboarding_id,
         'sponsor_name': sponsor_name,
         'fund_name': fund_name
     }
-
-    # Notify screening complete
-    notify_screening_complete(onboarding_data, screening_results, risk_assessment)
-
-    # Notify if EDD required
-    if risk_assessment.get('edd_required'):
-        notify_edd_triggered(onboarding_data, risk_assessment)
-
-    # Notify if approval required (above compliance level)
-    if risk_assessment.get('approval_level') != 'compliance':
-        notify_approval_required(onboarding_data, risk_assessment)
+    run_in_background(_send_screening_notifications, onboarding_data, screening_results, risk_assessment)
 
     # Store screening results in session for persistence across page navigation
     if 'screening_results' not in session:
@@ -1690,7 +1755,7 @@ def api_run_screening():
         'results': screening_results,
         'risk_assessment': risk_assessment,
         'demo_mode': demo_mode,
-        'screened_at': datetime.now().isoformat()
+        'screened_at': screened_at
     }
     session.modified = True
 
@@ -1701,7 +1766,7 @@ def api_run_screening():
         'screened_count': len(screening_results),
         'risk_assessment': risk_assessment,
         'audit_trail': {
-            'saved': audit_result.get('status') != 'error',
+            'queued': True,
             'gdrive_demo_mode': gdrive_client.demo_mode
         }
     })
@@ -1831,12 +1896,33 @@ def api_audit_create_folder():
     })
 
 
+# Page sizes for the onboardings list API
+ONBOARDINGS_PAGE_SIZE = 50
+ONBOARDINGS_MAX_PAGE_SIZE = 500
+
+
 @app.route('/api/onboardings')
 @login_required
 def api_onboardings():
-    """API: Get onboardings list"""
-    onboardings = sheets_db.get_onboardings()
-    return jsonify({'onboardings': onboardings, 'status': 'ok', 'demo_mode': sheets_db.demo_mode})
+    """API: Get a page of the onboardings list (?limit=&offset=)"""
+    try:
+        limit = int(request.args.get('limit', ONBOARDINGS_PAGE_SIZE))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'limit and offset must be integers'}), 400
+    if not 1 <= limit <= ONBOARDINGS_MAX_PAGE_SIZE or offset < 0:
+        return jsonify({
+            'status': 'error',
+            'message': f'limit must be 1-{ONBOARDINGS_MAX_PAGE_SIZE} and offset must not be negative'
+        }), 400
+
+    onboardings, next_offset = sheets_db.get_onboardings_page(limit, offset)
+    return jsonify({
+        'onboardings': onboardings,
+        'next_offset': next_offset,
+        'status': 'ok',
+        'demo_mode': sheets_db.demo_mode
+    })
 
 
 @app.route('/api/onboarding/<onboarding_id>')
@@ -1848,7 +1934,7 @@ def api_onboarding_detail(onboarding_id):
         onboarding['sponsor'] = sheets_db.get_sponsor(onboarding['sponsor_id'])
         onboarding['persons'] = sheets_db.get_persons_for_onboarding(onboarding_id)
         onboarding['screenings'] = sheets_db.get_screenings(onboarding_id)
-        onboarding['risk_assessment'] = sheets_db.get_risk_assessment(onboarding_id)
+        onboarding['risk_assessment'] = get_risk_assessment(onboarding_id)
     return jsonify({'onboarding': onboarding or {}, 'status': 'ok'})
 
 
@@ -1929,16 +2015,13 @@ def api_kyc_compliance_signoff(onboarding_id):
     status_map = {'approve': 'approved', 'reject': 'rejected'}
     new_status = status_map.get(action, 'pending')
 
-    # Initialise kyc_approvals in session
-    if 'kyc_approvals' not in session:
-        session['kyc_approvals'] = {}
-    if onboarding_id not in session['kyc_approvals']:
-        session['kyc_approvals'][onboarding_id] = {
-            'compliance': {'status': 'pending'},
-            'mlro': {'status': 'pending'}
-        }
+    # Initialise kyc_approvals in session, binding this onboarding's entry once
+    kyc_approvals = session.setdefault('kyc_approvals', {}).setdefault(onboarding_id, {
+        'compliance': {'status': 'pending'},
+        'mlro': {'status': 'pending'}
+    })
 
-    session['kyc_approvals'][onboarding_id][role_step] = {
+    kyc_approvals[role_step] = {
         'status': new_status,
         'signed_by': user['name'],
         'role': user_role,
@@ -1950,7 +2033,7 @@ def api_kyc_compliance_signoff(onboarding_id):
     return jsonify({
         'status': 'ok',
         'message': f'{role_step.title()} sign-off recorded',
-        'kyc_approvals': session['kyc_approvals'][onboarding_id]
+        'kyc_approvals': kyc_approvals
     })
 
 
@@ -1992,15 +2075,14 @@ def api_approve(onboarding_id):
 
     new_status = status_map[action]
 
-    # Initialise approval state in session
-    if 'approvals' not in session:
-        session['approvals'] = {}
-    if onboarding_id not in session['approvals']:
-        session['approvals'][onboarding_id] = {
-            'board': {'status': 'pending'}
-        }
+    # One timestamp for the session, Sheets and the audit trail
+    now = datetime.now()
+    now_iso = now.isoformat()
 
-    approvals = session['approvals'][onboarding_id]
+    # Initialise approval state in session
+    approvals = session.setdefault('approvals', {}).setdefault(onboarding_id, {
+        'board': {'status': 'pending'}
+    })
 
     # Update board step
     approvals['board'] = {
@@ -2008,7 +2090,7 @@ def api_approve(onboarding_id):
         'approved_by': user['name'],
         'approver_role': role,
         'comments': comments,
-        'timestamp': datetime.now().strftime('%d %b %Y, %H:%M')
+        'timestamp': now.strftime('%d %b %Y, %H:%M')
     }
 
     all_approved = approvals.get('board', {}).get('status') == 'approved'
@@ -2029,7 +2111,7 @@ def api_approve(onboarding_id):
         'approval_action': action,
         'approval_comments': comments,
         'approved_by': user['name'],
-        'approved_at': datetime.now().isoformat(),
+        'approved_at': now_iso,
         'approver_role': role
     })
 
@@ -2048,10 +2130,10 @@ def api_approve(onboarding_id):
                 'comments': comments,
                 'approved_by': user['name'],
                 'approver_role': role,
-                'approved_at': datetime.now().isoformat(),
+                'approved_at': now_iso,
                 'all_approved': all_approved
             },
-            filename=f'approval_{step}_{action}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
+            filename=f'approval_{step}_{action}_{now.strftime("%Y%m%d_%H%M%S")}.json',
             sponsor_name=sponsor_name,
             fund_name=fund_name
         )
@@ -2097,27 +2179,29 @@ def generate_memo(onboarding_id):
     if not enquiry_id:
         enquiry_id = session.get('current_enquiry_id', 'ENQ-001')
 
-    enquiry = MOCK_ENQUIRIES.get(enquiry_id) or MOCK_ENQUIRIES.get('ENQ-001')
+    mock_enquiries = get_mock_enquiries()
+    enquiry = mock_enquiries.get(enquiry_id) or mock_enquiries.get('ENQ-001')
 
     # Build memo data from enquiry
-    sponsor_name = enquiry.get('sponsor_name', 'Unknown Sponsor')
-    fund_name = enquiry.get('fund_name', 'Unknown Fund')
-    fund_type = enquiry.get('fund_type', 'jpf').upper()
-    jurisdiction = enquiry.get('jurisdiction', 'Jersey')
-    target_size = enquiry.get('target_size', '500,000,000')
-    investment_strategy = enquiry.get('investment_strategy', 'N/A')
-    regulatory_status = enquiry.get('regulatory_status', 'regulated')
-    regulator = enquiry.get('regulator', 'FCA')
-    license_number = enquiry.get('license_number', 'N/A')
-    date_of_incorporation = enquiry.get('date_of_incorporation', 'N/A')
-    principals = enquiry.get('principals', [])
-    source_of_wealth = enquiry.get('source_of_wealth', 'N/A')
+    get = enquiry.get
+    sponsor_name = get('sponsor_name', 'Unknown Sponsor')
+    fund_name = get('fund_name', 'Unknown Fund')
+    fund_type = get('fund_type', 'jpf').upper()
+    jurisdiction = get('jurisdiction', 'Jersey')
+    target_size = get('target_size', '500,000,000')
+    investment_strategy = get('investment_strategy', 'N/A')
+    regulatory_status = get('regulatory_status', 'regulated')
+    regulator = get('regulator', 'FCA')
+    license_number = get('license_number', 'N/A')
+    date_of_incorporation = get('date_of_incorporation', 'N/A')
+    principals = get('principals', [])
+    source_of_wealth = get('source_of_wealth', 'N/A')
 
     # Get risk data
-    risk_data = sheets_db.get_risk_assessment(onboarding_id)
-    risk_score = risk_data.get('score', 28) if risk_data else 28
-    risk_rating = risk_data.get('rating', 'Low') if risk_data else 'Low'
-    edd_required = risk_data.get('edd_required', False) if risk_data else False
+    risk_data = get_risk_assessment(onboarding_id) or {}
+    risk_score = risk_data.get('score', 28)
+    risk_rating = risk_data.get('rating', 'Low')
+    edd_required = risk_data.get('edd_required', False)
 
     # Build principal summary
     principal_lines = []
@@ -2201,12 +2285,10 @@ def generate_memo(onboarding_id):
 @login_required
 def api_calculate_fees():
     """API: Calculate dynamic fees based on fund parameters and services selected."""
-    from services.fee_calculator import calculate_fees, get_available_services
-
     data = request.get_json() or {}
 
     fund_size = data.get('fund_size', 500_000_000)  # Default $500M
-    services = data.get('services', ['nav', 'investor', 'accounting', 'ta', 'director', 'cosec'])
+    services = data.get('services', _DEFAULT_SERVICES)
     num_investors = data.get('num_investors', 50)
     num_directors = data.get('num_directors', 2)
     complexity = data.get('complexity', 'low')
@@ -2236,8 +2318,6 @@ def api_calculate_fees():
 @login_required
 def api_get_services():
     """API: Get list of available services and their base fees."""
-    from services.fee_calculator import get_available_services, get_setup_fees
-
     return jsonify({
         'status': 'ok',
         'services': get_available_services(),
@@ -2249,8 +2329,6 @@ def api_get_services():
 @login_required
 def api_admin_agreement(onboarding_id):
     """Generate Administration Agreement PDF for an onboarding."""
-    from services.fee_calculator import calculate_fees, SERVICE_FEES
-
     download = request.args.get('download', '0') == '1'
 
     try:
@@ -2273,15 +2351,15 @@ def api_admin_agreement(onboarding_id):
         else:
             enquiry_id = 'ENQ-001'
 
-        # Get enquiry from MOCK_ENQUIRIES or sheets
-        enquiry = MOCK_ENQUIRIES.get(enquiry_id)
+        # Get enquiry from mock enquiries or sheets
+        enquiry = get_mock_enquiries().get(enquiry_id)
         if not enquiry:
-            enquiry = MOCK_ENQUIRIES.get('ENQ-001', {})
+            enquiry = get_mock_enquiries().get('ENQ-001', {})
 
         # Extract parameters
         fund_name = enquiry.get('fund_name', 'Unknown Fund')
         sponsor_name = enquiry.get('sponsor_name', 'Unknown Sponsor')
-        services_required = enquiry.get('services_required', ['nav', 'investor', 'accounting', 'ta', 'director', 'cosec'])
+        services_required = enquiry.get('services_required', _DEFAULT_SERVICES)
 
         # Parse fund size
         target_size_str = enquiry.get('target_size', '500000000')
@@ -2577,7 +2655,7 @@ def api_reports_data():
 
     # Get phases from workflow configuration (consistent with dashboard)
     phases = get_phases()
-    phase_names = {p['num']: p['name'] for p in phases}
+    phase_names = get_phase_names()
 
     # Aggregate by phase (convert current_phase to int for comparison)
     def safe_int(val, default=0):
@@ -2762,7 +2840,7 @@ def api_workflow_status(onboarding_id):
         return jsonify({'status': 'error', 'message': 'Onboarding not found'}), 404
 
     # Get risk assessment if available
-    risk = sheets_db.get_risk_assessment(onboarding_id)
+    risk = get_risk_assessment(onboarding_id)
 
     summary = generate_workflow_summary(onboarding, risk)
 
@@ -2789,6 +2867,19 @@ def api_overdue_onboardings():
 
 # ========== KYC/CDD API Routes ==========
 
+def _session_kyc_documents(create=False):
+    """Get the session's KYC documents keyed by onboarding_id then document_id"""
+    return session_kyc_documents(session, create=create)
+
+
+def _find_kyc_document(doc_id):
+    """Find a session KYC document by ID when its onboarding isn't known"""
+    for docs in _session_kyc_documents().values():
+        if doc_id in docs:
+            return docs[doc_id]
+    return None
+
+
 @app.route('/api/kyc/<onboarding_id>/checklist', methods=['GET'])
 @login_required
 def api_kyc_checklist(onboarding_id):
@@ -2801,7 +2892,7 @@ def api_kyc_checklist(onboarding_id):
 
     if enquiry_id:
         sheets_enquiry = sheets_db.get_enquiry(enquiry_id)
-        mock_enquiry = MOCK_ENQUIRIES.get(enquiry_id)
+        mock_enquiry = get_mock_enquiries().get(enquiry_id)
 
         if sheets_enquiry:
             enquiry = sheets_enquiry
@@ -2815,7 +2906,7 @@ def api_kyc_checklist(onboarding_id):
 
     if not enquiry:
         # Use first mock enquiry as fallback for demo
-        enquiry = MOCK_ENQUIRIES.get('ENQ-001')
+        enquiry = get_mock_enquiries().get('ENQ-001')
 
     # Get risk assessment from session or default
     risk_assessment = session.get('risk_assessment', {})
@@ -2824,7 +2915,7 @@ def api_kyc_checklist(onboarding_id):
     fund_principals = []
     if onboarding_id != 'NEW':
         try:
-            fund_principals = sheets_db.query('FundPrincipals', filters={'onboarding_id': onboarding_id})
+            fund_principals = sheets_db.get_fund_principals_by_onboarding(onboarding_id)
         except Exception:
             fund_principals = []
     if not fund_principals and DEMO_MODE:
@@ -2835,9 +2926,7 @@ def api_kyc_checklist(onboarding_id):
     checklist['onboarding_id'] = onboarding_id
 
     # Merge session documents into checklist to reflect actual uploads
-    kyc_docs = session.get('kyc_documents', {})
-    onboarding_docs = [doc for doc in kyc_docs.values()
-                       if doc.get('onboarding_id') == onboarding_id]
+    onboarding_docs = list(_session_kyc_documents().get(onboarding_id, {}).values())
 
     if onboarding_docs:
         # Build lookup of verified docs by type and person
@@ -2896,11 +2985,11 @@ def api_kyc_upload(onboarding_id):
     # Get enquiry data for key parties (use same logic as phase rendering)
     enquiry_id = request.form.get('enquiry_id') or session.get('current_enquiry_id')
 
-    # Load enquiry from Sheets first, then merge with MOCK_ENQUIRIES if needed
+    # Load enquiry from Sheets first, then merge with mock enquiries if needed
     enquiry = None
     if enquiry_id:
         sheets_enquiry = sheets_db.get_enquiry(enquiry_id)
-        mock_enquiry = MOCK_ENQUIRIES.get(enquiry_id)
+        mock_enquiry = get_mock_enquiries().get(enquiry_id)
 
         if sheets_enquiry:
             enquiry = sheets_enquiry
@@ -2914,7 +3003,7 @@ def api_kyc_upload(onboarding_id):
 
     # Fallback to default mock
     if not enquiry:
-        enquiry = MOCK_ENQUIRIES.get('ENQ-001')
+        enquiry = get_mock_enquiries().get('ENQ-001')
 
     key_parties = []
     seen_names = set()
@@ -2931,7 +3020,7 @@ def api_kyc_upload(onboarding_id):
     upload_fund_principals = []
     if onboarding_id != 'NEW':
         try:
-            upload_fund_principals = sheets_db.query('FundPrincipals', filters={'onboarding_id': onboarding_id})
+            upload_fund_principals = sheets_db.get_fund_principals_by_onboarding(onboarding_id)
         except Exception:
             upload_fund_principals = []
     if not upload_fund_principals and DEMO_MODE:
@@ -2984,8 +3073,7 @@ def api_kyc_upload(onboarding_id):
     results = analyze_batch(documents, key_parties, sponsor_name)
 
     # Store results in session for now (in production, save to DB)
-    if 'kyc_documents' not in session:
-        session['kyc_documents'] = {}
+    onboarding_docs = _session_kyc_documents(create=True).setdefault(onboarding_id, {})
 
     processed_results = []
     for i, result in enumerate(results):
@@ -3000,7 +3088,7 @@ def api_kyc_upload(onboarding_id):
             'uploaded_at': datetime.now().isoformat(),
             'uploaded_by': get_current_user()['name']
         }
-        session['kyc_documents'][doc_id] = doc_record
+        onboarding_docs[doc_id] = doc_record
         processed_results.append(doc_record)
 
     session.modified = True
@@ -3033,16 +3121,12 @@ def api_kyc_reassign(onboarding_id, doc_id):
     logger.info(f"[REASSIGN API] assignment_type={assignment_type}, document_type={document_type}, person_id={person_id}")
 
     # Get document from session
-    all_docs = session.get('kyc_documents', {})
-    logger.info(f"[REASSIGN API] Total docs in session: {len(all_docs)}, doc_ids: {list(all_docs.keys())}")
+    onboarding_docs = _session_kyc_documents().get(onboarding_id, {})
+    logger.info(f"[REASSIGN API] Docs in session for {onboarding_id}: {len(onboarding_docs)}, doc_ids: {list(onboarding_docs)}")
 
-    doc = all_docs.get(doc_id)
+    doc = onboarding_docs.get(doc_id)
     if not doc:
-        logger.error(f"[REASSIGN API] Document {doc_id} not found in session")
-        return jsonify({'status': 'error', 'message': 'Document not found'}), 404
-
-    if doc.get('onboarding_id') != onboarding_id:
-        logger.error(f"[REASSIGN API] Document {doc_id} belongs to different onboarding: {doc.get('onboarding_id')} != {onboarding_id}")
+        logger.error(f"[REASSIGN API] Document {doc_id} not found in session for {onboarding_id}")
         return jsonify({'status': 'error', 'message': 'Document not found'}), 404
 
     # Update assignment
@@ -3068,15 +3152,19 @@ def api_kyc_reassign(onboarding_id, doc_id):
 @login_required
 def debug_session_documents():
     """Debug endpoint to check what documents are in session"""
-    all_docs = session.get('kyc_documents', {})
+    all_docs = [
+        (doc_id, doc)
+        for onboarding_docs in _session_kyc_documents().values()
+        for doc_id, doc in onboarding_docs.items()
+    ]
     return jsonify({
         'total': len(all_docs),
-        'document_ids': list(all_docs.keys()),
+        'document_ids': [doc_id for doc_id, _ in all_docs],
         'documents': [{
             'document_id': doc_id,
             'onboarding_id': doc.get('onboarding_id'),
             'filename': doc.get('filename')
-        } for doc_id, doc in all_docs.items()]
+        } for doc_id, doc in all_docs]
     })
 
 
@@ -3084,30 +3172,21 @@ def debug_session_documents():
 @login_required
 def get_kyc_documents(onboarding_id):
     """Get all KYC documents for a specific onboarding"""
-    all_docs = session.get('kyc_documents', {})
+    all_docs = _session_kyc_documents()
 
     # If onboarding_id is not 'NEW', migrate any documents from 'NEW' to this onboarding_id
     # This handles the case where documents were uploaded during initial onboarding creation
-    if onboarding_id != 'NEW':
-        migrated = False
-        for doc_id, doc in all_docs.items():
-            if doc.get('onboarding_id') == 'NEW':
-                doc['onboarding_id'] = onboarding_id
-                migrated = True
-                logger.info(f"Migrated document {doc_id} from NEW to {onboarding_id}")
-
-        if migrated:
-            session.modified = True
-
-    # Filter documents by onboarding_id
-    onboarding_docs = [
-        doc for doc_id, doc in all_docs.items()
-        if doc.get('onboarding_id') == onboarding_id
-    ]
+    if onboarding_id != 'NEW' and all_docs.get('NEW'):
+        new_docs = all_docs.pop('NEW')
+        for doc_id, doc in new_docs.items():
+            doc['onboarding_id'] = onboarding_id
+            logger.info(f"Migrated document {doc_id} from NEW to {onboarding_id}")
+        all_docs.setdefault(onboarding_id, {}).update(new_docs)
+        session.modified = True
 
     return jsonify({
         'status': 'ok',
-        'documents': onboarding_docs
+        'documents': list(all_docs.get(onboarding_id, {}).values())
     })
 
 
@@ -3125,13 +3204,10 @@ def api_kyc_override(onboarding_id, doc_id):
         return jsonify({'status': 'error', 'message': 'Override reason required'}), 400
 
     # Get document from session
-    doc = session.get('kyc_documents', {}).get(doc_id)
+    doc = _session_kyc_documents().get(onboarding_id, {}).get(doc_id)
     if not doc:
         return jsonify({'status': 'error', 'message': 'Document not found'}), 404
 
-    if doc.get('onboarding_id') != onboarding_id:
-        return jsonify({'status': 'error', 'message': 'Document not found'}), 404
-
     # Apply override
     doc['override'] = {
         'applied': True,
@@ -3158,9 +3234,8 @@ def get_document_status(onboarding_id):
     """Get current status of all documents."""
     try:
         # Get documents from session (POC uses session storage)
-        all_documents = session.get('kyc_documents', {})
+        all_documents = _session_kyc_documents().get(onboarding_id, {})
 
-        # Filter by onboarding_id
         onboarding_docs = [
             {
                 'id': doc_id,
@@ -3168,7 +3243,6 @@ def get_document_status(onboarding_id):
                 'filename': doc.get('filename', 'Unknown')
             }
             for doc_id, doc in all_documents.items()
-            if doc.get('onboarding_id') == onboarding_id
         ]
 
         # Map status values to display format
@@ -3277,9 +3351,7 @@ def api_generate_requirements(onboarding_id):
         requirements = generate_document_requirements(onboarding_id)
 
         # Link existing documents to newly generated requirements
-        from flask import session
-        kyc_docs = session.get('kyc_documents', {})
-        existing_docs = [doc for doc in kyc_docs.values() if doc.get('onboarding_id') == onboarding_id]
+        existing_docs = _session_kyc_documents().get(onboarding_id, {}).values()
         for doc in existing_docs:
             suggested = doc.get('suggested_assignment', {})
             person_name = suggested.get('person_name')
@@ -3347,9 +3419,7 @@ def api_sync_documents_to_requirements(onboarding_id):
         linked_count = 0
 
         # Get documents from session
-        kyc_docs = session.get('kyc_documents', {})
-        docs_for_onboarding = [doc for doc in kyc_docs.values()
-                              if doc.get('onboarding_id') == onboarding_id]
+        docs_for_onboarding = list(_session_kyc_documents().get(onboarding_id, {}).values())
 
         logger.info(f"[SYNC] Found {len(docs_for_onboarding)} documents in session for {onboarding_id}")
 
@@ -3484,8 +3554,7 @@ def get_document_detail(onboarding_id, doc_id):
     """Get full document details for viewing."""
     try:
         # Get document from session
-        all_documents = session.get('kyc_documents', {})
-        doc = all_documents.get(doc_id)
+        doc = _session_kyc_documents().get(onboarding_id, {}).get(doc_id)
 
         if not doc:
             return jsonify({
@@ -3493,12 +3562,6 @@ def get_document_detail(onboarding_id, doc_id):
                 'error': 'Document not found'
             }), 404
 
-        if doc.get('onboarding_id') != onboarding_id:
-            return jsonify({
-                'success': False,
-                'error': 'Document not found'
-            }), 404
-
         return jsonify({
             'success': True,
             'document': doc
@@ -3516,14 +3579,12 @@ def get_document_detail(onboarding_id, doc_id):
 @login_required
 def api_view_document(doc_id):
     """Serve PDF file for viewing."""
-    from flask import send_file
     import os
 
     try:
         # Check session documents (KYC uploads with AI analysis)
-        session_docs = session.get('kyc_documents', {})
-        if doc_id in session_docs:
-            document = session_docs[doc_id]
+        document = _find_kyc_document(doc_id)
+        if document:
             file_path = os.path.join(app.root_path, document['file_path'])
 
             if not os.path.exists(file_path):
@@ -3551,7 +3612,7 @@ def api_update_document(doc_id):
             return jsonify({'status': 'error', 'message': 'Invalid JSON payload'}), 400
 
         # Get document from session
-        doc = session.get('kyc_documents', {}).get(doc_id)
+        doc = _find_kyc_document(doc_id)
         if not doc:
             return jsonify({'status': 'error', 'message': 'Document not found'}), 404
 
@@ -3745,7 +3806,7 @@ def api_kyc_signoff(onboarding_id):
     current_user = get_current_user()
 
     # Check all documents are complete
-    docs = session.get('kyc_documents', {})
+    docs = _session_kyc_documents().get(onboarding_id, {})
 
     # Build sign-off record
     signoff_data = {
@@ -3838,8 +3899,7 @@ def generate_document_requirements(onboarding_id):
     sheets = get_sheets_client()
 
     # Get all principals for this onboarding
-    principals_data = sheets.query('FundPrincipals',
-                                   filters={'onboarding_id': onboarding_id})
+    principals_data = sheets.get_fund_principals_by_onboarding(onboarding_id)
 
     if not principals_data:
         logger.warning(f"No principals found for onboarding {onboarding_id}")
@@ -3895,9 +3955,10 @@ def generate_document_requirements(onboarding_id):
     return requirements
 
 
+@lru_cache(maxsize=1)
 def get_phases():
-    """Get workflow phases configuration"""
-    return [
+    """Get workflow phases configuration (built once, treat as read-only)"""
+    return (
         {'num': 1, 'name': 'Enquiry', 'icon': 'bi-clipboard-check', 'description': 'Merged enquiry, sponsor, and principals'},
         {'num': 2, 'name': 'Fund', 'icon': 'bi-diagram-3', 'description': 'Fund vehicles and GP setup'},
         {'num': 3, 'name': 'Commercial', 'icon': 'bi-currency-pound', 'description': 'Service agreement and fee schedule'},
@@ -3905,7 +3966,13 @@ def get_phases():
         {'num': 5, 'name': 'KYC & CDD', 'icon': 'bi-file-earmark-check', 'description': 'Document collection, AI review, and Compliance/MLRO sign-off'},
         {'num': 6, 'name': 'Approval', 'icon': 'bi-check-circle', 'description': 'Client acceptance memo and Board sign-off'},
         {'num': 7, 'name': 'Complete', 'icon': 'bi-flag', 'description': 'Onboarding finalization and contract execution'}
-    ]
+    )
+
+
+@lru_cache(maxsize=1)
+def get_phase_names():
+    """Get phase names keyed by phase number"""
+    return {p['num']: p['name'] for p in get_phases()}
 
 
 # ========== Error Handlers ==========
@@ -3939,14 +4006,11 @@ def handle_exception(e):
 
 # ========== Startup ==========
 
-def init_app():
+def init_app(db):
     """Initialize application - ensure schema and seed data."""
-    sheets_db.ensure_schema()
-    sheets_db.seed_initial_data()
-    logger.info(f"App initialized - Sheets demo_mode: {sheets_db.demo_mode}")
-
-# Run initialization
-init_app()
+    db.ensure_schema()
+    db.seed_initial_data()
+    logger.info(f"App initialized - Sheets demo_mode: {db.demo_mode}")
 
 
 # ========== Main ==========
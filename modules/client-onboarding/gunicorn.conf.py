@@ -0,0 +1,19 @@
+"""
+gunicorn settings (loaded via the Procfile)
+
+The worker class follows serving.use_gevent(), the same switch wsgi.py
+uses to decide on monkey-patching.
+"""
+
+import os
+
+from serving import use_gevent
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 3))
+
+if use_gevent():
+    worker_class = 'gevent'
+    worker_connections = 1000
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
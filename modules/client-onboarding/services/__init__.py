@@ -15,6 +15,7 @@ from .gdrive_audit import (
     get_client as get_gdrive_client,
     save_screening_results,
     save_form_data,
+    save_form_data_batch,
     upload_document,
     save_api_response,
     ensure_folder_structure
@@ -86,7 +87,9 @@ from .workflow import (
 
 from .kyc_checklist import (
     generate_checklist,
-    get_checklist_progress
+    get_checklist_progress,
+    session_kyc_documents,
+    KYC_DOCUMENTS_KEY
 )
 
 from .document_review import (
@@ -107,6 +110,7 @@ __all__ = [
     'get_gdrive_client',
     'save_screening_results',
     'save_form_data',
+    'save_form_data_batch',
     'upload_document',
     'save_api_response',
     'ensure_folder_structure',
@@ -163,6 +167,8 @@ __all__ = [
     # KYC Checklist
     'generate_checklist',
     'get_checklist_progress',
+    'session_kyc_documents',
+    'KYC_DOCUMENTS_KEY',
     # Document Review
     'analyze_document',
     'analyze_batch',
@@ -11,7 +11,7 @@ import json
 import logging
 import mimetypes
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, BinaryIO
 from io import BytesIO
 
 logger = logging.getLogger(__name__)
@@ -44,6 +44,9 @@ SCOPES = ['https://www.googleapis.com/auth/drive.file']
 # Root folder name for all onboarding documents
 ROOT_FOLDER_NAME = 'Client-Onboarding'
 
+# Chunk size for resumable uploads of large files
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 # Subfolder structure
 FOLDER_STRUCTURE = {
     '_COMPLIANCE': 'Key compliance documents (easy access)',
@@ -327,20 +330,49 @@ class GoogleDriveAuditClient:
             subfolder: Target subfolder
             mime_type: MIME type of the content
 
+        Returns:
+            Dict with upload status and file info
+        """
+        return self.upload_stream(BytesIO(content), filename, sponsor_name, fund_name, subfolder, mime_type)
+
+    def upload_stream(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        sponsor_name: str,
+        fund_name: str,
+        subfolder: str = None,
+        mime_type: str = 'application/octet-stream'
+    ) -> Dict[str, Any]:
+        """
+        Upload a readable binary stream to Google Drive without reading it into memory
+
+        Streams larger than UPLOAD_CHUNK_SIZE are sent as a resumable upload
+        in chunks of that size.
+
+        Args:
+            stream: Binary file-like object, read from its current position
+            filename: Filename to use
+            sponsor_name: Sponsor/client name
+            fund_name: Fund name
+            subfolder: Target subfolder
+            mime_type: MIME type of the content
+
         Returns:
             Dict with upload status and file info
         """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         timestamped_filename = f"{timestamp}_{filename}"
+        size = _remaining_size(stream)
 
         if self.demo_mode:
-            logger.info(f"[DEMO] Would upload content: {timestamped_filename} ({len(content)} bytes)")
+            logger.info(f"[DEMO] Would upload content: {timestamped_filename} ({size} bytes)")
             return {
                 'status': 'demo',
                 'filename': timestamped_filename,
                 'folder': subfolder,
                 'file_id': f'demo-file-{timestamp}',
-                'size': len(content),
+                'size': size,
                 'message': 'Content logged in demo mode (not actually uploaded)'
             }
 
@@ -366,7 +398,11 @@ class GoogleDriveAuditClient:
                 'parents': [parent_id]
             }
 
-            media = MediaIoBaseUpload(BytesIO(content), mimetype=mime_type)
+            # Small payloads go up in one request; larger ones in chunks
+            resumable = size is None or size > UPLOAD_CHUNK_SIZE
+            media = MediaIoBaseUpload(
+                stream, mimetype=mime_type, chunksize=UPLOAD_CHUNK_SIZE, resumable=resumable
+            )
             file = self.service.files().create(
                 body=file_metadata,
                 media_body=media,
@@ -503,6 +539,32 @@ class GoogleDriveAuditClient:
             subfolder=subfolder if subfolder in FOLDER_STRUCTURE else None
         )
 
+    def save_form_submissions(self, submissions: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Save several form submissions for audit in one pass
+
+        Folder structure is resolved once per sponsor/fund, then each
+        submission is uploaded. Drive batch requests cannot carry media
+        uploads, so the uploads themselves are still one request each.
+
+        Args:
+            submissions: Dicts with form_data, phase, sponsor_name and fund_name
+
+        Returns:
+            List of upload status dicts, in submission order
+        """
+        if not self.demo_mode:
+            clients = {(sub['sponsor_name'], sub['fund_name']) for sub in submissions}
+            for sponsor_name, fund_name in clients:
+                self.ensure_client_folder_structure(sponsor_name, fund_name)
+
+        return [
+            self.save_form_submission(
+                sub['form_data'], sub['phase'], sub['sponsor_name'], sub['fund_name']
+            )
+            for sub in submissions
+        ]
+
     def _get_phase_name(self, phase: int) -> str:
         """Get phase name from number"""
         phase_names = {
@@ -518,6 +580,17 @@ class GoogleDriveAuditClient:
         return phase_names.get(phase, 'Unknown')
 
 
+def _remaining_size(stream: BinaryIO) -> Optional[int]:
+    """Bytes left to read in a seekable stream, or None if it can't be measured"""
+    try:
+        position = stream.tell()
+        end = stream.seek(0, os.SEEK_END)
+        stream.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
 # Singleton instance
 _client = None
 
@@ -542,6 +615,11 @@ def save_form_data(form_data: Dict, phase: int, sponsor_name: str, fund_name: st
     return get_client().save_form_submission(form_data, phase, sponsor_name, fund_name)
 
 
+def save_form_data_batch(submissions: List[Dict]) -> List[Dict]:
+    """Save several form submissions to audit trail"""
+    return get_client().save_form_submissions(submissions)
+
+
 def upload_document(
     file_path: str,
     sponsor_name: str,
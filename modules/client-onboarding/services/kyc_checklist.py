@@ -9,6 +9,25 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Session KYC documents are stored as {onboarding_id: {document_id: doc}}
+KYC_DOCUMENTS_KEY = 'kyc_documents_by_onboarding'
+
+
+def session_kyc_documents(session_data, create: bool = False) -> Dict[str, Dict]:
+    """
+    Get a session's KYC documents keyed by onboarding_id then document_id.
+
+    Sessions saved with the old flat {document_id: doc} layout under
+    'kyc_documents' are reshaped in place first.
+    """
+    if 'kyc_documents' in session_data:
+        by_onboarding = session_data.setdefault(KYC_DOCUMENTS_KEY, {})
+        for doc_id, doc in session_data.pop('kyc_documents').items():
+            by_onboarding.setdefault(doc.get('onboarding_id'), {})[doc_id] = doc
+    if create:
+        return session_data.setdefault(KYC_DOCUMENTS_KEY, {})
+    return session_data.get(KYC_DOCUMENTS_KEY, {})
+
 # Document requirements by entity type
 ENTITY_DOCUMENTS = {
     'llp': [
@@ -247,8 +266,8 @@ def get_outstanding_requirements(onboarding_id: str, session_data) -> List[Dict[
     requirements = []
 
     # Get documents from session
-    documents = session_data.get('kyc_documents', {})
-    onboarding_docs = [d for d in documents.values() if d.get('onboarding_id') == onboarding_id]
+    documents = session_kyc_documents(session_data)
+    onboarding_docs = list(documents.get(onboarding_id, {}).values())
 
     # Check sponsor entity documents
     required_sponsor_docs = [
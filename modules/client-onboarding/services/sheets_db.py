@@ -7,9 +7,10 @@ for PoC demonstrations.
 """
 
 import os
-import json
+import orjson
 import base64
 import logging
+import time
 from datetime import datetime
 from typing import Optional, Any
 from pathlib import Path
@@ -104,6 +105,9 @@ ID_PREFIXES = {
     'FundPrincipals': 'PRI'
 }
 
+# Seconds before the FundPrincipals onboarding_id index is re-read from Sheets
+FUND_PRINCIPALS_TTL = int(os.environ.get('FUND_PRINCIPALS_TTL', 30))
+
 
 class SheetsDB:
     """Google Sheets database client for persistent storage"""
@@ -121,6 +125,10 @@ class SheetsDB:
         self.client = None
         self.spreadsheet = None
         self._sheet_cache: dict[str, Any] = {}
+        # FundPrincipals grouped by onboarding_id, rebuilt from one sheet read
+        # when older than FUND_PRINCIPALS_TTL or after a FundPrincipals write
+        self._fp_by_onboarding: Optional[dict[str, list[dict]]] = None
+        self._fp_indexed_at = 0.0
 
         # If DEMO_MODE is explicitly set to true, don't connect to Sheets
         if force_demo:
@@ -259,34 +267,39 @@ class SheetsDB:
 
     def _generate_id(self, prefix: str, sheet: Optional[Any]) -> str:
         """Generate unique ID like ENQ-001, SPO-002, etc."""
+        return self._generate_ids(prefix, sheet, 1)[0]
+
+    def _generate_ids(self, prefix: str, sheet: Optional[Any], count: int) -> list[str]:
+        """Generate consecutive unique IDs with a single read of the ID column"""
+        def timestamp_ids():
+            timestamp = datetime.now().strftime('%H%M%S')
+            if count == 1:
+                return [f"{prefix}-{timestamp}"]
+            return [f"{prefix}-{timestamp}-{i}" for i in range(1, count + 1)]
+
         if self.demo_mode or sheet is None:
             # In demo mode, generate based on timestamp
-            timestamp = datetime.now().strftime('%H%M%S')
-            return f"{prefix}-{timestamp}"
+            return timestamp_ids()
 
         try:
             # Get all values in first column (IDs)
             all_values = sheet.col_values(1)
-            # Filter to only IDs with this prefix
-            existing_ids = [v for v in all_values if v.startswith(prefix + '-')]
 
-            if not existing_ids:
-                return f"{prefix}-001"
-
-            # Extract numbers and find max
+            # Find the highest number among IDs with this prefix
             max_num = 0
-            for id_val in existing_ids:
+            for id_val in all_values:
+                if not id_val.startswith(prefix + '-'):
+                    continue
                 try:
                     num = int(id_val.split('-')[1])
                     max_num = max(max_num, num)
                 except (IndexError, ValueError):
                     continue
 
-            return f"{prefix}-{max_num + 1:03d}"
+            return [f"{prefix}-{num:03d}" for num in range(max_num + 1, max_num + count + 1)]
         except Exception as e:
             logger.error(f"Error generating ID for {prefix}: {e}")
-            timestamp = datetime.now().strftime('%H%M%S')
-            return f"{prefix}-{timestamp}"
+            return timestamp_ids()
 
     def _row_to_dict(self, headers: list[str], row: list[str]) -> dict[str, Any]:
         """Convert a row to a dictionary using headers"""
@@ -296,8 +309,8 @@ class SheetsDB:
             # Try to parse JSON for complex fields
             if header in ('match_details', 'risk_factors', 'details'):
                 try:
-                    value = json.loads(value) if value else {}
-                except json.JSONDecodeError:
+                    value = orjson.loads(value) if value else {}
+                except orjson.JSONDecodeError:
                     pass
             # Parse booleans
             elif header in ('is_ubo', 'id_verified', 'edd_triggered', 'is_existing_sponsor', 'declaration_accepted'):
@@ -312,7 +325,7 @@ class SheetsDB:
             value = data.get(header, '')
             # JSON serialize complex fields
             if header in ('match_details', 'risk_factors', 'details') and isinstance(value, (dict, list)):
-                value = json.dumps(value)
+                value = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
             # Convert booleans to strings
             elif isinstance(value, bool):
                 value = str(value).lower()
@@ -321,8 +334,13 @@ class SheetsDB:
 
     def _log_action(self, action: str, entity_type: str, entity_id: str, details: Optional[dict] = None):
         """Log action to AuditLog sheet"""
+        self._log_actions(action, entity_type, [(entity_id, details)])
+
+    def _log_actions(self, action: str, entity_type: str, entries: list[tuple[str, Optional[dict]]]):
+        """Log the same action for several entities with one AuditLog append"""
         if self.demo_mode:
-            logger.info(f"[DEMO] Audit log: {action} on {entity_type} {entity_id}")
+            for entity_id, _ in entries:
+                logger.info(f"[DEMO] Audit log: {action} on {entity_type} {entity_id}")
             return
 
         try:
@@ -330,21 +348,24 @@ class SheetsDB:
             if not sheet:
                 return
 
-            log_id = self._generate_id('LOG', sheet)
+            log_ids = self._generate_ids('LOG', sheet, len(entries))
             timestamp = datetime.now().isoformat()
             # Try to get current user from context (simplified for now)
             user = 'system'
 
-            row = self._dict_to_row(SCHEMA['AuditLog'], {
-                'log_id': log_id,
-                'timestamp': timestamp,
-                'user': user,
-                'action': action,
-                'entity_type': entity_type,
-                'entity_id': entity_id,
-                'details': details or {}
-            })
-            sheet.append_row(row)
+            rows = [
+                self._dict_to_row(SCHEMA['AuditLog'], {
+                    'log_id': log_id,
+                    'timestamp': timestamp,
+                    'user': user,
+                    'action': action,
+                    'entity_type': entity_type,
+                    'entity_id': entity_id,
+                    'details': details or {}
+                })
+                for log_id, (entity_id, details) in zip(log_ids, entries)
+            ]
+            sheet.append_rows(rows)
         except Exception as e:
             logger.error(f"Failed to log audit action: {e}")
 
@@ -570,6 +591,35 @@ class SheetsDB:
             logger.error(f"Error getting sponsor {sponsor_id}: {e}")
             return None
 
+    def get_sponsors_bulk(self, sponsor_ids: set[str]) -> dict[str, str]:
+        """Get legal names for several sponsors with a single sheet read"""
+        if self.demo_mode:
+            logger.info(f"[DEMO] Would get {len(sponsor_ids)} sponsors")
+            return {}
+
+        if not sponsor_ids:
+            return {}
+
+        try:
+            sheet = self._get_sheet('Sponsors')
+            if not sheet:
+                return {}
+
+            all_values = sheet.get_all_values()
+            if len(all_values) <= 1:
+                return {}
+
+            headers = all_values[0]
+            name_idx = headers.index('legal_name') if 'legal_name' in headers else 1
+            return {
+                row[0]: row[name_idx] if len(row) > name_idx else 'Unknown'
+                for row in all_values[1:]
+                if row and row[0] in sponsor_ids
+            }
+        except Exception as e:
+            logger.error(f"Error getting sponsors in bulk: {e}")
+            return {}
+
     def get_sponsor_by_name(self, name: str) -> Optional[dict]:
         """Get a sponsor by legal name"""
         if self.demo_mode:
@@ -684,6 +734,35 @@ class SheetsDB:
             logger.error(f"Error getting onboardings: {e}")
             return []
 
+    def get_onboardings_page(self, limit: int, offset: int = 0) -> tuple[list[dict], Optional[int]]:
+        """
+        Get one page of onboardings, reading only the header row and that slice of rows.
+
+        Returns the onboardings and the offset of the next page (None on the last page).
+        """
+        if self.demo_mode:
+            logger.info(f"[DEMO] Would get onboardings (limit={limit}, offset={offset})")
+            return [], None
+
+        try:
+            sheet = self._get_sheet('Onboardings')
+            if not sheet:
+                return [], None
+
+            # Data starts on row 2; fetch the headers and the page in one request
+            first_row = offset + 2
+            header_rows, rows = sheet.batch_get(['1:1', f'{first_row}:{first_row + limit - 1}'])
+            if not header_rows:
+                return [], None
+
+            headers = header_rows[0]
+            onboardings = [self._row_to_dict(headers, row) for row in rows if row and row[0]]
+            next_offset = offset + limit if len(rows) == limit else None
+            return onboardings, next_offset
+        except Exception as e:
+            logger.error(f"Error getting onboardings page: {e}")
+            return [], None
+
     def get_onboarding(self, onboarding_id: str) -> Optional[dict]:
         """Get a single onboarding by ID"""
         if self.demo_mode:
@@ -906,6 +985,33 @@ class SheetsDB:
             logger.error(f"Error creating person: {e}")
             return person_id
 
+    def create_persons_bulk(self, persons: list[dict]) -> list[str]:
+        """Create several persons with one append, returning their IDs in order"""
+        if not persons:
+            return []
+
+        sheet = self._get_sheet('Persons')
+        person_ids = self._generate_ids('PER', sheet, len(persons))
+
+        if self.demo_mode:
+            logger.info(f"[DEMO] Would create {len(persons)} persons: {person_ids}")
+            return person_ids
+
+        try:
+            created_at = datetime.now().isoformat()
+            rows = []
+            for person_id, data in zip(person_ids, persons):
+                data['person_id'] = person_id
+                data['created_at'] = data.get('created_at', created_at)
+                rows.append(self._dict_to_row(SCHEMA['Persons'], data))
+            sheet.append_rows(rows)
+            self._log_actions('create', 'Persons', list(zip(person_ids, persons)))
+            logger.info(f"Created {len(person_ids)} persons")
+            return person_ids
+        except Exception as e:
+            logger.error(f"Error creating persons: {e}")
+            return person_ids
+
     def add_person_role(self, person_id: str, onboarding_id: str, role_data: dict) -> str:
         """Add a role for a person on an onboarding"""
         sheet = self._get_sheet('PersonRoles')
@@ -939,13 +1045,7 @@ class SheetsDB:
 
         try:
             data['role_id'] = role_id
-            # Map 'role' to 'role_type' if present
-            if 'role' in data and 'role_type' not in data:
-                data['role_type'] = data.pop('role')
-            # Map 'entity_id' to 'sponsor_id' if entity_type is Sponsor
-            if data.get('entity_type') == 'Sponsor' and 'entity_id' in data:
-                data['sponsor_id'] = data.pop('entity_id')
-                data.pop('entity_type', None)
+            self._normalize_person_role(data)
             row = self._dict_to_row(SCHEMA['PersonRoles'], data)
             sheet.append_row(row)
             self._log_action('create', 'PersonRoles', role_id, data)
@@ -955,6 +1055,43 @@ class SheetsDB:
             logger.error(f"Error creating person role: {e}")
             return role_id
 
+    def create_person_roles_bulk(self, roles: list[dict]) -> list[str]:
+        """Create several person roles with one append, returning their IDs in order"""
+        if not roles:
+            return []
+
+        sheet = self._get_sheet('PersonRoles')
+        role_ids = self._generate_ids('ROL', sheet, len(roles))
+
+        if self.demo_mode:
+            logger.info(f"[DEMO] Would create {len(roles)} person roles: {role_ids}")
+            return role_ids
+
+        try:
+            rows = []
+            for role_id, data in zip(role_ids, roles):
+                data['role_id'] = role_id
+                self._normalize_person_role(data)
+                rows.append(self._dict_to_row(SCHEMA['PersonRoles'], data))
+            sheet.append_rows(rows)
+            self._log_actions('create', 'PersonRoles', list(zip(role_ids, roles)))
+            logger.info(f"Created {len(role_ids)} person roles")
+            return role_ids
+        except Exception as e:
+            logger.error(f"Error creating person roles: {e}")
+            return role_ids
+
+    @staticmethod
+    def _normalize_person_role(data: dict):
+        """Map generic role/entity keys onto the PersonRoles columns"""
+        # Map 'role' to 'role_type' if present
+        if 'role' in data and 'role_type' not in data:
+            data['role_type'] = data.pop('role')
+        # Map 'entity_id' to 'sponsor_id' if entity_type is Sponsor
+        if data.get('entity_type') == 'Sponsor' and 'entity_id' in data:
+            data['sponsor_id'] = data.pop('entity_id')
+            data.pop('entity_type', None)
+
     # ========== Screenings CRUD ==========
 
     def get_screenings(self, onboarding_id: str) -> list[dict]:
@@ -1005,6 +1142,33 @@ class SheetsDB:
             logger.error(f"Error saving screening: {e}")
             return screening_id
 
+    def save_screenings_bulk(self, screenings: list[dict]) -> list[str]:
+        """Save several screening results with one append, returning their IDs in order"""
+        if not screenings:
+            return []
+
+        sheet = self._get_sheet('Screenings')
+        screening_ids = self._generate_ids('SCR', sheet, len(screenings))
+
+        if self.demo_mode:
+            logger.info(f"[DEMO] Would save {len(screenings)} screenings: {screening_ids}")
+            return screening_ids
+
+        try:
+            screened_at = datetime.now().isoformat()
+            rows = []
+            for screening_id, data in zip(screening_ids, screenings):
+                data['screening_id'] = screening_id
+                data['screened_at'] = data.get('screened_at', screened_at)
+                rows.append(self._dict_to_row(SCHEMA['Screenings'], data))
+            sheet.append_rows(rows)
+            self._log_actions('create', 'Screenings', list(zip(screening_ids, screenings)))
+            logger.info(f"Saved {len(screening_ids)} screenings")
+            return screening_ids
+        except Exception as e:
+            logger.error(f"Error saving screenings: {e}")
+            return screening_ids
+
     # ========== Risk Assessments CRUD ==========
 
     def get_risk_assessment(self, onboarding_id: str) -> Optional[dict]:
@@ -1203,6 +1367,28 @@ class SheetsDB:
             logger.error(f"Error querying {table_name}: {e}")
             return []
 
+    def get_fund_principals_by_onboarding(self, onboarding_id: str) -> list[dict]:
+        """Get fund principals for an onboarding from the cached onboarding_id index"""
+        if self.demo_mode:
+            return self.query('FundPrincipals', filters={'onboarding_id': onboarding_id})
+
+        index = self._fp_by_onboarding
+        if index is None or time.monotonic() - self._fp_indexed_at > FUND_PRINCIPALS_TTL:
+            indexed_at = time.monotonic()
+            index = {}
+            for record in self.query('FundPrincipals'):
+                index.setdefault(record.get('onboarding_id', ''), []).append(record)
+            self._fp_by_onboarding = index
+            self._fp_indexed_at = indexed_at
+
+        # Copies, so callers can annotate records without touching the index
+        return [dict(record) for record in index.get(onboarding_id, ())]
+
+    def _invalidate_indexes(self, table_name: str):
+        """Drop cached indexes that a write to table_name makes stale"""
+        if table_name == 'FundPrincipals':
+            self._fp_by_onboarding = None
+
     def insert(self, table_name: str, data: dict) -> bool:
         """Insert a new record into a table."""
         if self.demo_mode:
@@ -1236,6 +1422,7 @@ class SheetsDB:
 
             row = self._dict_to_row(SCHEMA[table_name], data)
             sheet.append_row(row)
+            self._invalidate_indexes(table_name)
             self._log_action('insert', table_name, data.get(id_field, 'unknown'), data)
             logger.info(f"Inserted into {table_name}: {data.get(id_field)}")
             return True
@@ -1289,6 +1476,7 @@ class SheetsDB:
                     existing.update(data)
                     new_row = self._dict_to_row(headers, existing)
                     sheet.update(f'A{i}:{chr(65 + len(headers) - 1)}{i}', [new_row])
+                    self._invalidate_indexes(table_name)
                     self._log_action('update', table_name, record_id, data)
                     logger.info(f"Updated {table_name} record {record_id}")
                     return True
@@ -1333,6 +1521,7 @@ class SheetsDB:
             for i, row in enumerate(all_values[1:], start=2):
                 if row and row[0] == record_id:
                     sheet.delete_rows(i)
+                    self._invalidate_indexes(table_name)
                     self._log_action('delete', table_name, record_id, {})
                     logger.info(f"Deleted {table_name} record {record_id}")
                     return True
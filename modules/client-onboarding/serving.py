@@ -0,0 +1,20 @@
+"""
+Serving mode shared by gunicorn.conf.py and wsgi.py
+
+Decides once whether the app runs on gevent (monkey-patched, gevent
+worker) or on plain threads (gthread worker), so the worker class and the
+patching can't disagree. Only the standard library is imported here, since
+wsgi.py needs the answer before gevent patches it.
+"""
+
+import os
+import sys
+
+# On a free-threaded interpreter (python3.13t) plain threads already run in parallel
+FREE_THREADED = hasattr(sys, '_is_gil_enabled') and not sys._is_gil_enabled()
+
+
+def use_gevent() -> bool:
+    """Whether to serve with gevent; USE_GEVENT overrides the interpreter default"""
+    default = 'false' if FREE_THREADED else 'true'
+    return os.environ.get('USE_GEVENT', default).lower() == 'true'
@@ -0,0 +1,31 @@
+"""
+Tests for session KYC document handling in services/kyc_checklist.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+kyc_checklist = pytest.importorskip('services.kyc_checklist')
+
+PASSED_DOC = {
+    'onboarding_id': 'ONB-001',
+    'analysis': {'overall_status': 'pass', 'detected_type': 'certificate_of_incorporation'}
+}
+
+
+def test_legacy_flat_layout_is_migrated():
+    session_data = {'kyc_documents': {'DOC-1': PASSED_DOC}}
+    documents = kyc_checklist.session_kyc_documents(session_data)
+    assert documents == {'ONB-001': {'DOC-1': PASSED_DOC}}
+    assert 'kyc_documents' not in session_data
+    assert session_data[kyc_checklist.KYC_DOCUMENTS_KEY] is documents
+
+
+def test_outstanding_requirements_read_legacy_sessions():
+    legacy = {'kyc_documents': {'DOC-1': PASSED_DOC}}
+    current = {kyc_checklist.KYC_DOCUMENTS_KEY: {'ONB-001': {'DOC-1': PASSED_DOC}}}
+    assert (kyc_checklist.get_outstanding_requirements('ONB-001', legacy)
+            == kyc_checklist.get_outstanding_requirements('ONB-001', current))
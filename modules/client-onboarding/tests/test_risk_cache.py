@@ -0,0 +1,67 @@
+"""
+Tests for the risk assessment cache in app.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+onboarding_app = pytest.importorskip('app')
+
+
+class FakeSheetsDB:
+    """Records risk assessment reads instead of calling Google Sheets"""
+
+    def __init__(self, assessment):
+        self.assessment = assessment
+        self.calls = []
+
+    def get_risk_assessment(self, onboarding_id):
+        self.calls.append(onboarding_id)
+        return self.assessment
+
+
+@pytest.fixture
+def fake_sheets(monkeypatch):
+    fake = FakeSheetsDB({'score': 42, 'rating': 'Medium'})
+    monkeypatch.setattr(onboarding_app, 'sheets_db', fake)
+    monkeypatch.setattr(onboarding_app, '_risk_cache', {})
+    return fake
+
+
+def test_cache_miss_reads_from_sheets(fake_sheets):
+    with onboarding_app.app.test_request_context():
+        assert onboarding_app.get_risk_assessment('ONB-001') == {'score': 42, 'rating': 'Medium'}
+    assert fake_sheets.calls == ['ONB-001']
+
+
+def test_cache_hit_skips_sheets(fake_sheets):
+    with onboarding_app.app.test_request_context():
+        onboarding_app.get_risk_assessment('ONB-001')
+    with onboarding_app.app.test_request_context():
+        onboarding_app.get_risk_assessment('ONB-001')
+    assert fake_sheets.calls == ['ONB-001']
+
+
+def test_invalidate_forces_reread(fake_sheets):
+    with onboarding_app.app.test_request_context():
+        onboarding_app.get_risk_assessment('ONB-001')
+        onboarding_app.invalidate_risk_assessment('ONB-001')
+        onboarding_app.get_risk_assessment('ONB-001')
+    assert fake_sheets.calls == ['ONB-001', 'ONB-001']
+
+
+def test_invalidate_during_read_is_not_cached(fake_sheets, monkeypatch):
+    class RacingSheetsDB(FakeSheetsDB):
+        def get_risk_assessment(self, onboarding_id):
+            # A new assessment is saved while this read is in flight
+            onboarding_app.invalidate_risk_assessment(onboarding_id)
+            return super().get_risk_assessment(onboarding_id)
+
+    racing = RacingSheetsDB({'score': 10, 'rating': 'Low'})
+    monkeypatch.setattr(onboarding_app, 'sheets_db', racing)
+    with onboarding_app.app.test_request_context():
+        onboarding_app.get_risk_assessment('ONB-001')
+    assert 'ONB-001' not in onboarding_app._risk_cache
@@ -0,0 +1,24 @@
+"""
+WSGI entry point for gunicorn
+
+By default the app runs under gunicorn's gevent worker: it spends most of
+each request waiting on Google Sheets/Drive calls, so the standard library
+is monkey-patched before anything else is imported. gspread talks to
+Sheets through requests, which becomes cooperative once the socket module
+is patched.
+
+On a free-threaded interpreter (python3.13t) plain threads already run in
+parallel, so patching is skipped and gunicorn.conf.py picks the gthread
+worker instead. Both follow serving.use_gevent(); set USE_GEVENT to
+override the choice.
+"""
+
+from serving import use_gevent
+
+if use_gevent():
+    from gevent import monkey
+    monkey.patch_all()
+
+from app import app  # noqa: E402
+
+__all__ = ['app']
@@ -5,29 +5,36 @@ Handles invoice upload, OCR processing, and Google Sheets integration
 
 import os
 import io
-import json
+import operator
+import asyncio
+import orjson
 import logging
 import zipfile
 import gc
-from openpyxl import Workbook
-from openpyxl.styles import Font
-from openpyxl.utils import get_column_letter
+import hashlib
+import hmac
+import shutil
+import time
+import threading
+import xlsxwriter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import wraps
+from itertools import chain
 from flask import (
     Flask, render_template, request, jsonify,
-    redirect, url_for, flash, session, make_response, send_file
+    redirect, url_for, flash, session, send_file
 )
-from flask_cors import CORS
-from werkzeug.utils import secure_filename
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 
 # Import our custom modules
 from invoice_processor import InvoiceProcessor, process_invoice
+from helpers import (
+    ALLOWED_EXTENSIONS, allowed_file, generate_unique_filename, convert_dates_for_form
+)
 from sheets_manager import (
-    SheetsManager, SheetsManagerError, AuthenticationError,
-    save_to_sheets, save_payment_details as save_payment_to_sheets,
-    get_invoices, get_payments
+    SheetsManager, SheetsManagerError, AuthenticationError
 )
 
 # Load environment variables
@@ -40,15 +47,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, used by jsonify() and request.get_json()"""
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
+
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app, origins=['https://coreworker-landing.onrender.com', 'http://localhost:*'])  # Restrict CORS
+app.json = ORJSONProvider(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24))
 app.config['UPLOAD_FOLDER'] = os.path.abspath(os.getenv('UPLOAD_FOLDER', 'uploads'))
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))  # 16MB
-app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'png', 'jpg', 'jpeg'}
+app.config['ALLOWED_EXTENSIONS'] = ALLOWED_EXTENSIONS
 app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV', 'development') == 'production'
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
@@ -56,6 +84,60 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Payment report column headers and the payment dict keys they map to
+PAYMENT_REPORT_HEADERS = (
+    'Invoice Number', 'Supplier Name', 'Beneficiary Account Name', 'Account Number',
+    'IBAN', 'Sort Code', 'SWIFT/BIC Code', 'Bank Name', 'Bank Address',
+    'Payment Reference', 'Status', 'Upload Date', 'Notes'
+)
+PAYMENT_REPORT_KEYS = (
+    'invoice_number', 'supplier_name', 'beneficiary_account_name', 'account_number',
+    'iban', 'sort_code', 'swift_code', 'bank_name', 'bank_address',
+    'payment_reference', 'status', 'upload_date', 'notes'
+)
+
+# Invoice report column headers: invoice fields followed by payment details
+INVOICE_REPORT_HEADERS = (
+    'Invoice Number', 'Supplier Name', 'Contact Email', 'Contact Phone',
+    'Invoice Date', 'Due Date', 'Amount', 'Currency', 'Status',
+    'Payment Date', 'Notes',
+    'Beneficiary Account Name', 'Bank Name', 'Account Number', 'Sort Code',
+    'IBAN', 'SWIFT/BIC Code', 'Payment Reference', 'Bank Address'
+)
+INVOICE_REPORT_INVOICE_KEYS = (
+    'invoice_number', 'supplier_name', 'contact_email', 'contact_phone',
+    'invoice_date', 'due_date', 'amount', 'currency', 'status',
+    'payment_date', 'notes'
+)
+INVOICE_REPORT_PAYMENT_KEYS = (
+    'beneficiary_account_name', 'bank_name', 'account_number', 'sort_code',
+    'iban', 'swift_code', 'payment_reference', 'bank_address'
+)
+
+# Row extractors for the reports - SheetsManager always populates every key
+_payment_report_row = operator.itemgetter(*PAYMENT_REPORT_KEYS)
+_invoice_report_row = operator.itemgetter(*INVOICE_REPORT_INVOICE_KEYS)
+_invoice_report_payment_row = operator.itemgetter(*INVOICE_REPORT_PAYMENT_KEYS)
+_NO_PAYMENT_ROW = ('',) * len(INVOICE_REPORT_PAYMENT_KEYS)
+
+# Widest a report column is allowed to grow
+MAX_REPORT_COLUMN_WIDTH = 50
+
+
+def track_column_widths(widths, values):
+    """Widen column widths in place to fit a row that's being written"""
+    for col, value in enumerate(values):
+        if value:
+            length = len(str(value))
+            if length > widths[col]:
+                widths[col] = length
+
+
+def apply_column_widths(ws, widths):
+    """Size an xlsxwriter worksheet's columns from tracked widths"""
+    for col, width in enumerate(widths):
+        ws.set_column(col, col, min(width + 2, MAX_REPORT_COLUMN_WIDTH))
+
 
 # ========== Security Headers ==========
 
@@ -83,6 +165,36 @@ def add_security_headers(response):
     return response
 
 
+# ========== CORS ==========
+
+# Origins allowed to make cross-origin requests (plus any localhost port)
+CORS_ORIGINS = frozenset(
+    origin.strip()
+    for origin in os.getenv('CORS_ORIGINS', 'https://coreworker-landing.onrender.com').split(',')
+    if origin.strip()
+)
+
+
+def _cors_origin_allowed(origin):
+    """Check an Origin header against the allow-list"""
+    return origin in CORS_ORIGINS or origin == 'http://localhost' or origin.startswith('http://localhost:')
+
+
+@app.after_request
+def add_cors_headers(response):
+    """Echo allowed origins back, replacing the flask-cors extension"""
+    origin = request.headers.get('Origin')
+    if origin and _cors_origin_allowed(origin):
+        response.headers['Access-Control-Allow-Origin'] = origin
+        response.vary.add('Origin')
+        if request.method == 'OPTIONS':
+            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, DELETE, OPTIONS'
+            allow_headers = request.headers.get('Access-Control-Request-Headers')
+            if allow_headers:
+                response.headers['Access-Control-Allow-Headers'] = allow_headers
+    return response
+
+
 # ========== Demo Mode Configuration ==========
 
 # Set DEMO_MODE=true in environment to disable password protection
@@ -162,25 +274,6 @@ def login_required(f):
 
 # ========== Helper Functions ==========
 
-def allowed_file(filename):
-    """Check if file extension is allowed"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
-
-
-def get_file_extension(filename):
-    """Get file extension"""
-    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-
-
-def generate_unique_filename(original_filename):
-    """Generate a unique filename with timestamp"""
-    ext = get_file_extension(original_filename)
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    base_name = secure_filename(original_filename.rsplit('.', 1)[0])
-    return f"{base_name}_{timestamp}.{ext}"
-
-
 def handle_errors(f):
     """Decorator for handling errors in routes"""
     @wraps(f)
@@ -220,13 +313,241 @@ def handle_errors(f):
     return decorated_function
 
 
+# One SheetsManager per thread: reuses API clients and their HTTP
+# connections across requests (httplib2 connections aren't thread-safe,
+# so they can't be shared between threads). The OAuth credentials are
+# loaded once and shared by every thread's manager.
+_manager_local = threading.local()
+_shared_credentials = None
+
+
 def get_sheets_manager():
-    """Get or create a SheetsManager instance"""
+    """Get or create this thread's SheetsManager instance"""
+    global _shared_credentials
+    manager = getattr(_manager_local, 'manager', None)
+    if manager is not None:
+        return manager
     try:
-        return SheetsManager()
+        manager = SheetsManager(credentials=_shared_credentials)
     except Exception as e:
         logger.error(f"Failed to initialize SheetsManager: {e}")
         raise
+    _shared_credentials = manager.creds
+    _manager_local.manager = manager
+    return manager
+
+
+# Maximum number of Sheets API calls in flight per request
+SHEETS_CONCURRENCY = 8
+
+# Long-lived pool so each thread keeps its SheetsManager between requests
+_sheets_executor = ThreadPoolExecutor(max_workers=SHEETS_CONCURRENCY, thread_name_prefix='sheets')
+
+
+def run_concurrently(*calls):
+    """
+    Run independent blocking calls (e.g. Sheets reads) concurrently.
+
+    Each call runs on its own thread, so calls must not share a SheetsManager
+    (the underlying HTTP transport is not thread-safe) - fetch one inside the
+    call with get_sheets_manager() instead.
+
+    Returns:
+        List of results in the same order as the calls
+    """
+    async def gather():
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(SHEETS_CONCURRENCY)
+
+        async def run(call):
+            async with semaphore:
+                return await loop.run_in_executor(_sheets_executor, call)
+
+        return await asyncio.gather(*(run(call) for call in calls))
+
+    return asyncio.run(gather())
+
+
+# Short-lived cache of Sheets reads, so bursts of page loads and API polls
+# share one round-trip instead of each hitting the Sheets API
+SHEETS_CACHE_TTL = 15  # seconds
+SHEETS_CACHE_MAXSIZE = 16
+_sheets_cache = {}
+_sheets_cache_generation = 0
+_sheets_cache_lock = threading.Lock()
+
+
+def cached_sheets_read(key, loader, ttl=SHEETS_CACHE_TTL):
+    """
+    Return the cached result of a Sheets read, calling loader() on a miss
+
+    Args:
+        key: Cache key identifying the read
+        loader: Zero-argument callable performing the read
+        ttl: Seconds to keep the result
+
+    Returns:
+        The (possibly cached) result of loader()
+    """
+    with _sheets_cache_lock:
+        entry = _sheets_cache.get(key)
+        if entry and time.monotonic() < entry[0]:
+            return entry[1]
+        generation = _sheets_cache_generation
+
+    value = loader()
+
+    with _sheets_cache_lock:
+        # Don't store a result that raced with a write
+        if generation == _sheets_cache_generation:
+            if key not in _sheets_cache and len(_sheets_cache) >= SHEETS_CACHE_MAXSIZE:
+                _sheets_cache.pop(min(_sheets_cache, key=lambda k: _sheets_cache[k][0]))
+            _sheets_cache[key] = (time.monotonic() + ttl, value)
+    return value
+
+
+def invalidate_sheets_cache():
+    """Drop all cached Sheets reads after invoices or payment details change"""
+    global _sheets_cache_generation
+    with _sheets_cache_lock:
+        _sheets_cache.clear()
+        _sheets_cache_generation += 1
+
+
+def get_cached_sheet_data():
+    """
+    Get all invoices and payment details via the Sheets read cache
+
+    Both sheets are read with a single batchGet, so pages and API routes that
+    need either (or both) share one round-trip.
+
+    Returns:
+        Tuple of (invoices, payment details)
+    """
+    return cached_sheets_read('sheet_data', lambda: get_sheets_manager().get_invoices_and_payments())
+
+
+def get_cached_invoices():
+    """Get all invoices via the Sheets read cache"""
+    return get_cached_sheet_data()[0]
+
+
+def get_cached_payment_details():
+    """Get all payment details via the Sheets read cache"""
+    return get_cached_sheet_data()[1]
+
+
+def get_cached_invoice_stats():
+    """Get invoice statistics via the Sheets read cache"""
+    return cached_sheets_read(
+        'invoice_stats',
+        lambda: get_sheets_manager().get_invoice_stats(invoices=get_cached_invoices())
+    )
+
+
+def get_cached_recent_invoices(limit=5):
+    """Get the most recent invoices via the Sheets read cache"""
+    return get_cached_invoices()[-limit:]
+
+
+def get_cached_suppliers():
+    """Get unique supplier names via the Sheets read cache"""
+    def load():
+        invoices, payments = get_cached_sheet_data()
+        return get_sheets_manager().get_unique_suppliers(invoices=invoices, payments=payments)
+
+    return cached_sheets_read('suppliers', load)
+
+
+def get_payments_by_invoice():
+    """
+    Get payment details keyed by invoice number
+
+    Returns:
+        Dict mapping invoice number to its (first) payment details record
+    """
+    def build_index():
+        index = {}
+        for payment in get_cached_payment_details():
+            inv_num = payment.get('invoice_number')
+            if inv_num:
+                index.setdefault(inv_num, payment)
+        return index
+
+    return cached_sheets_read('payments_by_invoice', build_index, ttl=30)
+
+
+def cached_list_response(key, loader):
+    """
+    Build a JSON list response whose encoded body is cached with the data
+
+    Repeated polls within the cache window reuse the already-serialized
+    bytes instead of re-encoding every record, and clients sending a
+    matching If-None-Match get an empty 304.
+
+    Args:
+        key: Cache key for the encoded payload
+        loader: Zero-argument callable returning the list of records
+
+    Returns:
+        Flask response with {'success', 'data', 'count'}
+    """
+    def encode():
+        records = loader()
+        body = orjson.dumps({'success': True, 'data': records, 'count': len(records)})
+        return hashlib.blake2b(body, digest_size=16).hexdigest(), body
+
+    etag, body = cached_sheets_read(('json', key), encode)
+
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Always revalidate (the data changes on every save), but let unchanged
+    # lists come back as a bodiless 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def stream_invoices_response(manager):
+    """
+    Stream every invoice as JSON while paging through the sheet
+
+    Memory stays bounded by the page size instead of the whole sheet, at the
+    cost of bypassing the read cache.
+
+    Args:
+        manager: SheetsManager to read from
+
+    Returns:
+        Streaming Flask response with {'data', 'count', 'success'}, plus
+        'error' when a page fails after streaming has started ('success'
+        comes last so a partial list is never reported as successful)
+
+    Raises:
+        HttpError: If the first page can't be read (before any response is sent)
+    """
+    invoices = manager.iter_invoices()
+    # Read the first page up front so a failure there is still a proper error response
+    first = next(invoices, None)
+
+    def generate():
+        yield b'{"data":['
+        count = 0
+        error = None
+        try:
+            for invoice in chain(() if first is None else (first,), invoices):
+                yield (b',' if count else b'') + orjson.dumps(invoice)
+                count += 1
+        except Exception as e:
+            logger.error(f"Invoice stream failed after {count} invoices: {e}")
+            error = str(e)
+        tail = {'count': count, 'success': error is None}
+        if error:
+            tail['error'] = error
+        # Close the array and splice the remaining keys into the object
+        yield b'],' + orjson.dumps(tail)[1:]
+
+    return app.response_class(generate(), mimetype='application/json')
 
 
 # ========== Authentication Routes ==========
@@ -253,7 +574,8 @@ def login():
             flash('APP_PASSWORD not configured. Please set it in your .env file.', 'error')
             return render_template('login.html')
 
-        if password == app_password:
+        # Constant-time compare (encoded, as compare_digest rejects non-ASCII str)
+        if hmac.compare_digest(password.encode('utf-8'), app_password.encode('utf-8')):
             session['authenticated'] = True
             session.permanent = True
             logger.info("User logged in successfully")
@@ -282,10 +604,10 @@ def logout():
 def index():
     """Home page with dashboard"""
     try:
-        manager = get_sheets_manager()
-        stats = manager.get_invoice_stats()
-        recent_invoices = manager.get_recent_invoices(limit=5)
-        payment_details = manager.get_all_payment_details()
+        # One batched read backs all three
+        stats = get_cached_invoice_stats()
+        recent_invoices = get_cached_recent_invoices()
+        payment_details = get_cached_payment_details()
     except Exception as e:
         logger.warning(f"Could not load dashboard data: {e}")
         stats = {
@@ -306,10 +628,8 @@ def index():
 def dashboard():
     """Dashboard page showing all invoices"""
     try:
-        manager = get_sheets_manager()
-        invoices = manager.get_all_invoices()
-        stats = manager.get_invoice_stats()
-        payment_details = manager.get_all_payment_details()
+        invoices, payment_details = get_cached_sheet_data()
+        stats = get_cached_invoice_stats()
     except Exception as e:
         logger.warning(f"Could not load dashboard data: {e}")
         invoices = []
@@ -321,6 +641,296 @@ def dashboard():
 
 # ========== Upload Routes ==========
 
+# Background pool for Claude extraction, sized to stay within the API's
+# concurrent request limit
+INVOICE_WORKERS = int(os.getenv('INVOICE_CONCURRENCY', 4))
+_invoice_executor = ThreadPoolExecutor(max_workers=INVOICE_WORKERS, thread_name_prefix='invoice')
+
+# Jobs are keyed by their upload's unique filename and their outcome lives on
+# disk next to the upload (_data.json on success, _error.json on failure), so
+# polling still works after --max-requests recycles the worker. Only pending
+# jobs are held in memory. Each submission bumps an _attempts counter on disk,
+# so an upload that keeps killing the worker is given up on rather than
+# re-queued (and re-extracted and re-uploaded to Drive) forever.
+INVOICE_JOB_MAX_ATTEMPTS = int(os.getenv('INVOICE_JOB_MAX_ATTEMPTS', 2))
+_invoice_jobs = {}  # filename -> Future
+_invoice_jobs_lock = threading.Lock()
+
+
+def upload_sidecar_path(filename, suffix):
+    """Path of a file stored alongside an upload, e.g. its _data.json"""
+    return os.path.join(app.config['UPLOAD_FOLDER'], filename.rsplit('.', 1)[0] + suffix)
+
+
+def process_uploaded_invoice(filepath, filename):
+    """
+    Extract data from a saved upload and store it for the review page
+
+    Runs Claude extraction, flags potential duplicates, copies the file to
+    Google Drive and writes the extracted data next to the upload.
+
+    Args:
+        filepath: Path of the saved upload
+        filename: Unique filename the upload was saved under
+
+    Returns:
+        Extracted invoice data dictionary
+    """
+    logger.info(f"Processing invoice: {filepath}")
+    extracted_data = process_invoice(filepath)
+
+    # Check for processing errors
+    if extracted_data.get('error'):
+        logger.warning(f"Invoice processing returned error: {extracted_data.get('error')}")
+
+    logger.info(f"Invoice processed successfully: {extracted_data.get('invoice_number', 'N/A')}")
+
+    # Check for duplicate invoice (same supplier + invoice number)
+    try:
+        existing_invoices = get_cached_invoices()
+        new_invoice_num = extracted_data.get('invoice_number', '').strip().lower()
+        new_supplier = extracted_data.get('supplier_name', '').strip().lower()
+
+        for existing in existing_invoices:
+            existing_num = str(existing.get('invoice_number', '')).strip().lower()
+            existing_supplier = str(existing.get('supplier_name', '')).strip().lower()
+
+            if new_invoice_num and new_supplier and new_invoice_num == existing_num and new_supplier == existing_supplier:
+                extracted_data['_potential_duplicate'] = True
+                extracted_data['_duplicate_info'] = {
+                    'invoice_number': existing.get('invoice_number'),
+                    'supplier_name': existing.get('supplier_name'),
+                    'invoice_date': existing.get('invoice_date'),
+                    'amount': existing.get('amount')
+                }
+                logger.warning(f"Potential duplicate invoice detected: {new_invoice_num} from {new_supplier}")
+                break
+    except Exception as e:
+        logger.warning(f"Could not check for duplicates: {e}")
+
+    # Upload file to Google Drive for persistent storage
+    try:
+        manager = get_sheets_manager()
+        drive_result = manager.upload_file_to_drive(filepath, filename)
+        if drive_result.get('success'):
+            extracted_data['file_id'] = drive_result.get('file_id')
+            logger.info(f"File uploaded to Google Drive: {drive_result.get('file_id')}")
+        else:
+            logger.warning(f"Failed to upload to Google Drive: {drive_result.get('message')}")
+    except Exception as e:
+        logger.warning(f"Could not upload to Google Drive: {e}")
+
+    # Save extracted data to JSON file (session cookie is too small)
+    json_filepath = upload_sidecar_path(filename, '_data.json')
+    with open(json_filepath, 'wb') as f:
+        f.write(orjson.dumps(extracted_data))
+    logger.info(f"Extracted data saved to: {json_filepath}")
+
+    # Free up memory after processing
+    gc.collect()
+
+    return extracted_data
+
+
+# Local copies of uploads are only needed until the invoice is saved (or as a
+# fallback when the Drive upload failed), so old ones are swept periodically
+UPLOAD_RETENTION_DAYS = int(os.getenv('UPLOAD_RETENTION_DAYS', 30))
+UPLOAD_CLEANUP_INTERVAL = 3600  # seconds
+_last_upload_cleanup = 0.0
+_upload_cleanup_lock = threading.Lock()
+
+
+def remove_upload_files(filename):
+    """
+    Delete a saved upload and its extracted data JSON
+
+    Args:
+        filename: Upload filename (any directory part is ignored)
+    """
+    filename = os.path.basename(filename or '')
+    if not filename or not allowed_file(filename):
+        return
+
+    paths = (
+        os.path.join(app.config['UPLOAD_FOLDER'], filename),
+        upload_sidecar_path(filename, '_data.json'),
+        upload_sidecar_path(filename, '_error.json'),
+        upload_sidecar_path(filename, '_attempts')
+    )
+    for path in paths:
+        try:
+            os.remove(path)
+            logger.info(f"Removed local upload file: {path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+
+
+def cleanup_upload_folder():
+    """Delete uploads and extracted data older than UPLOAD_RETENTION_DAYS"""
+    cutoff = time.time() - UPLOAD_RETENTION_DAYS * 86400
+    removed = 0
+    with os.scandir(app.config['UPLOAD_FOLDER']) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove old upload {entry.path}: {e}")
+    if removed:
+        logger.info(f"Removed {removed} upload file(s) older than {UPLOAD_RETENTION_DAYS} days")
+
+
+def schedule_upload_cleanup():
+    """Run cleanup_upload_folder in the background at most once per interval"""
+    global _last_upload_cleanup
+    with _upload_cleanup_lock:
+        now = time.monotonic()
+        if _last_upload_cleanup and now - _last_upload_cleanup < UPLOAD_CLEANUP_INTERVAL:
+            return
+        _last_upload_cleanup = now
+    _invoice_executor.submit(cleanup_upload_folder)
+
+
+def run_invoice_job(filepath, filename):
+    """Process an upload in the background, recording a failure on disk"""
+    try:
+        return process_uploaded_invoice(filepath, filename)
+    except Exception as e:
+        logger.error(f"Invoice processing failed for {filename}: {e}", exc_info=True)
+        with open(upload_sidecar_path(filename, '_error.json'), 'wb') as f:
+            f.write(orjson.dumps({'error': str(e)}))
+        raise
+
+
+def read_job_attempts(filename):
+    """Number of times an upload has been queued for processing"""
+    try:
+        with open(upload_sidecar_path(filename, '_attempts'), 'rb') as f:
+            return int(f.read() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _submit_invoice_job_locked(filepath, filename):
+    """Count the attempt and queue the job (caller holds _invoice_jobs_lock)"""
+    attempts = read_job_attempts(filename) + 1
+    with open(upload_sidecar_path(filename, '_attempts'), 'wb') as f:
+        f.write(str(attempts).encode())
+
+    future = _invoice_executor.submit(run_invoice_job, filepath, filename)
+    _invoice_jobs[filename] = future
+
+    def forget(done_future):
+        # The outcome is on disk by now, so the entry isn't needed for polling
+        with _invoice_jobs_lock:
+            if _invoice_jobs.get(filename) is done_future:
+                del _invoice_jobs[filename]
+
+    future.add_done_callback(forget)
+    logger.info(f"Queued invoice processing job for {filename} (attempt {attempts})")
+    return future
+
+
+def submit_invoice_job(filepath, filename):
+    """
+    Queue a saved upload for background processing
+
+    Returns:
+        Job ID (the upload filename) to poll via /invoice-status/<job_id>
+    """
+    with _invoice_jobs_lock:
+        _submit_invoice_job_locked(filepath, filename)
+    return filename
+
+
+@app.route('/invoice-status/<job_id>')
+@handle_errors
+@login_required
+def invoice_status(job_id):
+    """Report the progress of a background invoice processing job"""
+    filename = os.path.basename(job_id)
+    if filename != job_id or not allowed_file(filename):
+        return jsonify({
+            'success': False,
+            'error': 'Unknown job'
+        }), 404
+
+    with _invoice_jobs_lock:
+        pending = filename in _invoice_jobs
+    if pending:
+        return jsonify({
+            'success': True,
+            'status': 'processing'
+        })
+
+    try:
+        with open(upload_sidecar_path(filename, '_data.json'), 'rb') as f:
+            extracted_data = orjson.loads(f.read())
+    except FileNotFoundError:
+        extracted_data = None
+
+    if extracted_data is None:
+        try:
+            with open(upload_sidecar_path(filename, '_error.json'), 'rb') as f:
+                error = orjson.loads(f.read()).get('error')
+            return jsonify({
+                'success': False,
+                'status': 'failed',
+                'error': f'Failed to process invoice: {error}'
+            }), 500
+        except FileNotFoundError:
+            pass
+
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if not os.path.exists(filepath):
+            return jsonify({
+                'success': False,
+                'error': 'Unknown job'
+            }), 404
+
+        # The upload is saved but has no outcome: the worker restarted
+        # mid-job, so queue it again unless it has used up its attempts.
+        # Checked under the lock so concurrent polls queue it only once
+        with _invoice_jobs_lock:
+            attempts = 0
+            if filename not in _invoice_jobs:
+                attempts = read_job_attempts(filename)
+                if attempts < INVOICE_JOB_MAX_ATTEMPTS:
+                    logger.warning(f"Re-queuing invoice job lost in a worker restart: {filename}")
+                    _submit_invoice_job_locked(filepath, filename)
+                else:
+                    error = f'Processing did not finish after {attempts} attempts'
+                    logger.error(f"Giving up on invoice job {filename}: {error}")
+                    with open(upload_sidecar_path(filename, '_error.json'), 'wb') as f:
+                        f.write(orjson.dumps({'error': error}))
+
+        if attempts >= INVOICE_JOB_MAX_ATTEMPTS:
+            return jsonify({
+                'success': False,
+                'status': 'failed',
+                'error': f'Failed to process invoice: {error}'
+            }), 500
+        return jsonify({
+            'success': True,
+            'status': 'processing'
+        })
+
+    session['invoice_filename'] = filename
+    return jsonify({
+        'success': True,
+        'status': 'done',
+        'data': extracted_data,
+        'filename': filename,
+        'warning': extracted_data.get('error'),
+        'redirect': url_for('review', filename=filename)
+    })
+
+
 @app.route('/upload', methods=['GET', 'POST'])
 @handle_errors
 @login_required
@@ -364,12 +974,17 @@ def upload():
             flash(error_msg, 'danger')
             return redirect(url_for('upload'))
 
+        # Sweep stale uploads while we're adding a new one
+        schedule_upload_cleanup()
+
         # Generate unique filename and save
         filename = generate_unique_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
 
         try:
-            file.save(filepath)
+            # Stream to disk in 1MB chunks rather than buffering the whole upload
+            with open(filepath, 'wb') as out:
+                shutil.copyfileobj(file.stream, out, length=1024 * 1024)
             logger.info(f"File saved: {filepath}")
         except Exception as e:
             logger.error(f"Failed to save file: {e}")
@@ -381,67 +996,27 @@ def upload():
             flash('Failed to save uploaded file', 'danger')
             return redirect(url_for('upload'))
 
+        # Hand off to the background pool when the client will poll for the result
+        if request.form.get('async') == '1':
+            job_id = submit_invoice_job(filepath, filename)
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'filename': filename,
+                'status_url': url_for('invoice_status', job_id=job_id)
+            }), 202
+
         # Process invoice with Claude API
         try:
-            logger.info(f"Processing invoice: {filepath}")
-            extracted_data = process_invoice(filepath)
+            extracted_data = process_uploaded_invoice(filepath, filename)
 
             # Check for processing errors
             if extracted_data.get('error'):
-                logger.warning(f"Invoice processing returned error: {extracted_data.get('error')}")
                 flash(f"Warning: {extracted_data.get('error')}", 'warning')
 
-            logger.info(f"Invoice processed successfully: {extracted_data.get('invoice_number', 'N/A')}")
-
-            # Check for duplicate invoice (same supplier + invoice number)
-            try:
-                manager = get_sheets_manager()
-                existing_invoices = manager.get_all_invoices()
-                new_invoice_num = extracted_data.get('invoice_number', '').strip().lower()
-                new_supplier = extracted_data.get('supplier_name', '').strip().lower()
-
-                for existing in existing_invoices:
-                    existing_num = str(existing.get('invoice_number', '')).strip().lower()
-                    existing_supplier = str(existing.get('supplier_name', '')).strip().lower()
-
-                    if new_invoice_num and new_supplier and new_invoice_num == existing_num and new_supplier == existing_supplier:
-                        extracted_data['_potential_duplicate'] = True
-                        extracted_data['_duplicate_info'] = {
-                            'invoice_number': existing.get('invoice_number'),
-                            'supplier_name': existing.get('supplier_name'),
-                            'invoice_date': existing.get('invoice_date'),
-                            'amount': existing.get('amount')
-                        }
-                        logger.warning(f"Potential duplicate invoice detected: {new_invoice_num} from {new_supplier}")
-                        break
-            except Exception as e:
-                logger.warning(f"Could not check for duplicates: {e}")
-
-            # Upload file to Google Drive for persistent storage
-            try:
-                manager = get_sheets_manager()
-                drive_result = manager.upload_file_to_drive(filepath, filename)
-                if drive_result.get('success'):
-                    extracted_data['file_id'] = drive_result.get('file_id')
-                    logger.info(f"File uploaded to Google Drive: {drive_result.get('file_id')}")
-                else:
-                    logger.warning(f"Failed to upload to Google Drive: {drive_result.get('message')}")
-            except Exception as e:
-                logger.warning(f"Could not upload to Google Drive: {e}")
-
-            # Save extracted data to JSON file (session cookie is too small)
-            json_filename = filename.rsplit('.', 1)[0] + '_data.json'
-            json_filepath = os.path.join(app.config['UPLOAD_FOLDER'], json_filename)
-            with open(json_filepath, 'w') as f:
-                json.dump(extracted_data, f)
-            logger.info(f"Extracted data saved to: {json_filepath}")
-
             # Store only the filename in session (small enough for cookie)
             session['invoice_filename'] = filename
 
-            # Free up memory after processing
-            gc.collect()
-
             # Always redirect to review page for verification
             if is_ajax:
                 return jsonify({
@@ -471,24 +1046,6 @@ def upload():
 
 # ========== Review Routes ==========
 
-def convert_date_for_form(date_str):
-    """Convert date from DD/MM/YYYY to YYYY-MM-DD format for HTML date inputs"""
-    if not date_str:
-        return ''
-    # If already in YYYY-MM-DD format, return as is
-    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
-        return date_str
-    # Try to parse DD/MM/YYYY format
-    try:
-        parts = date_str.split('/')
-        if len(parts) == 3:
-            day, month, year = parts
-            return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-    except (ValueError, IndexError):
-        pass
-    return date_str
-
-
 @app.route('/review')
 @app.route('/review/<filename>')
 @handle_errors
@@ -501,37 +1058,36 @@ def review(filename=None):
     if invoice_number:
         logger.info(f"Loading existing invoice for editing: {invoice_number}")
         try:
-            manager = get_sheets_manager()
-            invoice = manager.get_invoice_by_number(invoice_number)
+            # Fetch the invoice and payment details in parallel
+            invoice, payments_by_invoice = run_concurrently(
+                lambda: get_sheets_manager().get_invoice_by_number(invoice_number),
+                get_payments_by_invoice
+            )
 
             if not invoice:
                 flash(f'Invoice {invoice_number} not found.', 'warning')
                 return redirect(url_for('dashboard'))
 
             # Get associated payment details
-            payment_details = None
-            all_payments = manager.get_all_payment_details()
-            for payment in all_payments:
-                if payment.get('invoice_number') == invoice_number:
-                    payment_details = payment
-                    break
-
-            # Format invoice data for the template (convert dates for form inputs)
+            payment_details = payments_by_invoice.get(invoice_number)
+
+            # Format invoice data for the template
             invoice_data = {
                 'invoice_number': invoice.get('invoice_number', ''),
                 'supplier_name': invoice.get('supplier_name', ''),
                 'contact_email': invoice.get('contact_email', ''),
                 'contact_phone': invoice.get('contact_phone', ''),
-                'invoice_date': convert_date_for_form(invoice.get('invoice_date', '')),
-                'due_date': convert_date_for_form(invoice.get('due_date', '')),
+                'invoice_date': invoice.get('invoice_date', ''),
+                'due_date': invoice.get('due_date', ''),
                 'amount': invoice.get('amount', 0),
                 'currency': invoice.get('currency', 'GBP'),
                 'status': invoice.get('status', ''),
-                'payment_date': convert_date_for_form(invoice.get('payment_date', '')),
+                'payment_date': invoice.get('payment_date', ''),
                 'notes': invoice.get('notes', ''),
                 'payment_details': payment_details,
                 '_row_id': invoice.get('id')  # Row number for updates
             }
+            convert_dates_for_form([invoice_data])
 
             return render_template('review.html', invoice=invoice_data, is_editing=True)
 
@@ -563,8 +1119,8 @@ def review(filename=None):
 
         if os.path.exists(json_filepath):
             try:
-                with open(json_filepath, 'r') as f:
-                    invoice_data = json.load(f)
+                with open(json_filepath, 'rb') as f:
+                    invoice_data = orjson.loads(f.read())
                 logger.info(f"Loaded extracted data from: {json_filepath}")
             except Exception as e:
                 logger.warning(f"Could not load JSON data: {e}")
@@ -646,65 +1202,86 @@ def save_invoice():
                 'payment_reference': data.get('payment_reference', '').strip()
             }
 
+    # Payment details row saved alongside the invoice
+    has_payment_info = payment_details and any(payment_details.values())
+    payment_data = {
+        'invoice_number': invoice_data['invoice_number'],
+        'supplier_name': invoice_data['supplier_name'],
+        'beneficiary_account_name': payment_details.get('beneficiary_account_name', '') if payment_details else '',
+        'account_number': payment_details.get('account_number', '') if payment_details else '',
+        'iban': payment_details.get('iban', '') if payment_details else '',
+        'sort_code': payment_details.get('sort_code', '') if payment_details else '',
+        'swift_code': payment_details.get('swift_code', '') if payment_details else '',
+        'bank_name': payment_details.get('bank_name', '') if payment_details else '',
+        'bank_address': payment_details.get('bank_address', '') if payment_details else '',
+        'payment_reference': payment_details.get('payment_reference', '') if payment_details else '',
+        'status': 'Auto-populated' if has_payment_info else 'Pending Details',
+        'upload_date': '',
+        'notes': f'Auto-populated from invoice {invoice_data["invoice_number"]}' if has_payment_info else f'Awaiting payment details - from invoice {invoice_data["invoice_number"]}'
+    }
+
     # Save to Google Sheets (update or create)
     try:
         manager = get_sheets_manager()
 
+        # When editing, check if payment details already exist for this invoice.
+        # Read fresh rather than from the cached index: the row number is
+        # written to, and the sheet may have changed since it was cached
+        existing_payment = None
+        if is_editing:
+            try:
+                existing_payment = manager.get_payment_by_invoice(invoice_data['invoice_number'])
+            except Exception as e:
+                logger.warning(f"Could not look up existing payment details: {e}")
+
+        payment_saved = False
         if is_editing and row_id:
-            # Update existing invoice
             row_number = int(row_id)
-            result = manager.update_invoice(row_number, invoice_data)
+            if existing_payment:
+                # Both rows already exist - update them in a single batchUpdate
+                result = manager.batch_write([
+                    manager.build_invoice_update(row_number, invoice_data),
+                    manager.build_payment_update(existing_payment['id'], payment_data)
+                ])
+                payment_saved = result.get('success', False)
+                if payment_saved:
+                    logger.info(f"Payment details updated for invoice: {invoice_data['invoice_number']}")
+            else:
+                # Update existing invoice
+                result = manager.update_invoice(row_number, invoice_data)
             logger.info(f"Updated existing invoice: {invoice_data['invoice_number']} at row {row_number}")
         else:
             # Create new invoice
-            result = save_to_sheets(invoice_data)
+            result = manager.add_invoice(invoice_data)
 
         if result.get('success'):
-            # Handle payment details
-            has_payment_info = payment_details and any(payment_details.values())
-            payment_data = {
-                'invoice_number': invoice_data['invoice_number'],
-                'supplier_name': invoice_data['supplier_name'],
-                'beneficiary_account_name': payment_details.get('beneficiary_account_name', '') if payment_details else '',
-                'account_number': payment_details.get('account_number', '') if payment_details else '',
-                'iban': payment_details.get('iban', '') if payment_details else '',
-                'sort_code': payment_details.get('sort_code', '') if payment_details else '',
-                'swift_code': payment_details.get('swift_code', '') if payment_details else '',
-                'bank_name': payment_details.get('bank_name', '') if payment_details else '',
-                'bank_address': payment_details.get('bank_address', '') if payment_details else '',
-                'payment_reference': payment_details.get('payment_reference', '') if payment_details else '',
-                'status': 'Auto-populated' if has_payment_info else 'Pending Details',
-                'upload_date': '',
-                'notes': f'Auto-populated from invoice {invoice_data["invoice_number"]}' if has_payment_info else f'Awaiting payment details - from invoice {invoice_data["invoice_number"]}'
-            }
-
-            try:
-                if is_editing:
-                    # Check if payment details exist for this invoice and update them
-                    existing_payment = None
-                    all_payments = manager.get_all_payment_details()
-                    for p in all_payments:
-                        if p.get('invoice_number') == invoice_data['invoice_number']:
-                            existing_payment = p
-                            break
-
+            # Handle payment details not already written with the invoice
+            if not payment_saved:
+                try:
                     if existing_payment:
                         manager.update_payment_details(existing_payment['id'], payment_data)
                         logger.info(f"Payment details updated for invoice: {invoice_data['invoice_number']}")
-                    else:
-                        save_payment_to_sheets(payment_data)
+                    elif is_editing:
+                        manager.add_payment_details(payment_data)
                         logger.info(f"Payment details created for invoice: {invoice_data['invoice_number']}")
-                else:
-                    save_payment_to_sheets(payment_data)
-                    logger.info(f"Payment details saved for supplier: {invoice_data['supplier_name']}")
-            except Exception as e:
-                logger.warning(f"Failed to save payment details: {e}")
+                    else:
+                        manager.add_payment_details(payment_data)
+                        logger.info(f"Payment details saved for supplier: {invoice_data['supplier_name']}")
+                except Exception as e:
+                    logger.warning(f"Failed to save payment details: {e}")
+
+            invalidate_sheets_cache()
 
             # Clear session data (only for new uploads)
             if not is_editing:
                 session.pop('extracted_invoice', None)
                 session.pop('invoice_filename', None)
 
+                # The original is safely in Google Drive, so the local copy
+                # and its extracted data are no longer needed
+                if invoice_data['file_id']:
+                    remove_upload_files(data.get('file_path', ''))
+
             success_msg = 'Invoice updated successfully!' if is_editing else 'Invoice saved successfully!'
             logger.info(f"Invoice {'updated' if is_editing else 'saved'} to sheets: {invoice_data['invoice_number']}")
 
@@ -807,7 +1384,8 @@ def payment_details():
 
         # Save to Google Sheets
         try:
-            result = save_payment_to_sheets(payment_data)
+            result = get_sheets_manager().add_payment_details(payment_data)
+            invalidate_sheets_cache()
 
             if result.get('success'):
                 logger.info(f"Payment details saved for: {supplier_name}")
@@ -843,10 +1421,8 @@ def payment_details():
 
     # GET request - show payment details page
     try:
-        manager = get_sheets_manager()
-        payment_list = manager.get_all_payment_details()
-        suppliers = manager.get_unique_suppliers()
-        invoices = manager.get_all_invoices()
+        invoices, payment_list = get_cached_sheet_data()
+        suppliers = get_cached_suppliers()
     except Exception as e:
         logger.warning(f"Could not load payment details: {e}")
         payment_list = []
@@ -878,73 +1454,36 @@ def download_payment_report():
         manager = get_sheets_manager()
         payments = manager.get_all_payment_details()
 
-        # Create Excel workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Payment Details"
-
-        # Define headers
-        headers = [
-            'Invoice Number',
-            'Supplier Name',
-            'Beneficiary Account Name',
-            'Account Number',
-            'IBAN',
-            'Sort Code',
-            'SWIFT/BIC Code',
-            'Bank Name',
-            'Bank Address',
-            'Payment Reference',
-            'Status',
-            'Upload Date',
-            'Notes'
-        ]
+        # Stream rows straight to disk with xlsxwriter's constant_memory mode
+        output = io.BytesIO()
+        wb = xlsxwriter.Workbook(output, {'constant_memory': True})
+        ws = wb.add_worksheet("Payment Details")
+        bold = wb.add_format({'bold': True})
 
         # Write headers with bold formatting
-        bold_font = Font(bold=True)
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = bold_font
+        ws.write_row(0, 0, PAYMENT_REPORT_HEADERS, bold)
 
-        # Write data rows
-        for row_num, payment in enumerate(payments, 2):
-            ws.cell(row=row_num, column=1, value=payment.get('invoice_number', ''))
-            ws.cell(row=row_num, column=2, value=payment.get('supplier_name', ''))
-            ws.cell(row=row_num, column=3, value=payment.get('beneficiary_account_name', ''))
-            ws.cell(row=row_num, column=4, value=payment.get('account_number', ''))
-            ws.cell(row=row_num, column=5, value=payment.get('iban', ''))
-            ws.cell(row=row_num, column=6, value=payment.get('sort_code', ''))
-            ws.cell(row=row_num, column=7, value=payment.get('swift_code', ''))
-            ws.cell(row=row_num, column=8, value=payment.get('bank_name', ''))
-            ws.cell(row=row_num, column=9, value=payment.get('bank_address', ''))
-            ws.cell(row=row_num, column=10, value=payment.get('payment_reference', ''))
-            ws.cell(row=row_num, column=11, value=payment.get('status', ''))
-            ws.cell(row=row_num, column=12, value=payment.get('upload_date', ''))
-            ws.cell(row=row_num, column=13, value=payment.get('notes', ''))
-
-        # Auto-size columns
-        for col in range(1, len(headers) + 1):
-            max_length = 0
-            column_letter = get_column_letter(col)
-            for row in range(1, len(payments) + 2):
-                cell_value = ws.cell(row=row, column=col).value
-                if cell_value:
-                    max_length = max(max_length, len(str(cell_value)))
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Save to memory buffer
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        # Write data rows, tracking column widths as we go (autofit can't
+        # see rows that constant_memory mode has already flushed)
+        widths = [len(header) for header in PAYMENT_REPORT_HEADERS]
+        for row_num, payment in enumerate(payments, 1):
+            values = _payment_report_row(payment)
+            ws.write_row(row_num, 0, values)
+            track_column_widths(widths, values)
 
-        # Create response
-        today = datetime.now().strftime('%Y-%m-%d')
-        filename = f'Payment_Report_{today}.xlsx'
+        apply_column_widths(ws, widths)
 
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        wb.close()
+
+        # Stream the workbook back without copying the buffer
+        output.seek(0)
+        today = datetime.now().strftime('%Y-%m-%d')
+        response = send_file(
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=f'Payment_Report_{today}.xlsx'
+        )
 
         logger.info(f"Payment report downloaded: {len(payments)} records")
         return response
@@ -984,48 +1523,23 @@ def download_invoice_report():
             if inv_num:
                 payment_lookup[inv_num] = payment
 
-        # Create Excel workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Invoice Report"
-
-        # Define headers
-        headers = [
-            'Invoice Number',
-            'Supplier Name',
-            'Contact Email',
-            'Contact Phone',
-            'Invoice Date',
-            'Due Date',
-            'Amount',
-            'Currency',
-            'Status',
-            'Payment Date',
-            'Notes',
-            # Payment Details
-            'Beneficiary Account Name',
-            'Bank Name',
-            'Account Number',
-            'Sort Code',
-            'IBAN',
-            'SWIFT/BIC Code',
-            'Payment Reference',
-            'Bank Address'
-        ]
+        # Stream rows straight to disk with xlsxwriter's constant_memory mode
+        output = io.BytesIO()
+        wb = xlsxwriter.Workbook(output, {'constant_memory': True})
+        ws = wb.add_worksheet("Invoice Report")
+        bold = wb.add_format({'bold': True})
 
         # Write headers with bold formatting
-        bold_font = Font(bold=True)
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = bold_font
+        ws.write_row(0, 0, INVOICE_REPORT_HEADERS, bold)
+        widths = [len(header) for header in INVOICE_REPORT_HEADERS]
 
         # Track total amount
         total_amount = 0.0
 
         # Write data rows
-        for row_num, invoice in enumerate(invoices, 2):
+        for row_num, invoice in enumerate(invoices, 1):
             inv_num = invoice.get('invoice_number', '')
-            payment = payment_lookup.get(inv_num, {})
+            payment = payment_lookup.get(inv_num)
             amount = invoice.get('amount', 0) or 0
 
             # Try to convert amount to float
@@ -1036,60 +1550,33 @@ def download_invoice_report():
 
             total_amount += amount
 
-            # Invoice details
-            ws.cell(row=row_num, column=1, value=inv_num)
-            ws.cell(row=row_num, column=2, value=invoice.get('supplier_name', ''))
-            ws.cell(row=row_num, column=3, value=invoice.get('contact_email', ''))
-            ws.cell(row=row_num, column=4, value=invoice.get('contact_phone', ''))
-            ws.cell(row=row_num, column=5, value=invoice.get('invoice_date', ''))
-            ws.cell(row=row_num, column=6, value=invoice.get('due_date', ''))
-            ws.cell(row=row_num, column=7, value=amount)
-            ws.cell(row=row_num, column=8, value=invoice.get('currency', 'GBP'))
-            ws.cell(row=row_num, column=9, value=invoice.get('status', ''))
-            ws.cell(row=row_num, column=10, value=invoice.get('payment_date', ''))
-            ws.cell(row=row_num, column=11, value=invoice.get('notes', ''))
-
-            # Payment details
-            ws.cell(row=row_num, column=12, value=payment.get('beneficiary_account_name', ''))
-            ws.cell(row=row_num, column=13, value=payment.get('bank_name', ''))
-            ws.cell(row=row_num, column=14, value=payment.get('account_number', ''))
-            ws.cell(row=row_num, column=15, value=payment.get('sort_code', ''))
-            ws.cell(row=row_num, column=16, value=payment.get('iban', ''))
-            ws.cell(row=row_num, column=17, value=payment.get('swift_code', ''))
-            ws.cell(row=row_num, column=18, value=payment.get('payment_reference', ''))
-            ws.cell(row=row_num, column=19, value=payment.get('bank_address', ''))
+            # Invoice details followed by payment details
+            values = list(_invoice_report_row(invoice))
+            values[6] = amount
+            values.extend(_invoice_report_payment_row(payment) if payment else _NO_PAYMENT_ROW)
+
+            ws.write_row(row_num, 0, values)
+            track_column_widths(widths, values)
 
         # Add total row
-        total_row = len(invoices) + 2
-        ws.cell(row=total_row, column=1, value='')
-        ws.cell(row=total_row, column=6, value='TOTAL:')
-        ws.cell(row=total_row, column=6).font = bold_font
-        ws.cell(row=total_row, column=7, value=total_amount)
-        ws.cell(row=total_row, column=7).font = bold_font
-
-        # Auto-size columns
-        for col in range(1, len(headers) + 1):
-            max_length = 0
-            column_letter = get_column_letter(col)
-            for row in range(1, len(invoices) + 3):
-                cell_value = ws.cell(row=row, column=col).value
-                if cell_value:
-                    max_length = max(max_length, len(str(cell_value)))
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Save to memory buffer
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        total_row = len(invoices) + 1
+        ws.write(total_row, 5, 'TOTAL:', bold)
+        ws.write(total_row, 6, total_amount, bold)
+        track_column_widths(widths, ('', '', '', '', '', 'TOTAL:', total_amount))
 
-        # Create response
-        today = datetime.now().strftime('%Y-%m-%d')
-        filename = f'Invoice_Report_{today}.xlsx'
+        apply_column_widths(ws, widths)
+
+        wb.close()
 
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        # Stream the workbook back without copying the buffer
+        output.seek(0)
+        today = datetime.now().strftime('%Y-%m-%d')
+        response = send_file(
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=f'Invoice_Report_{today}.xlsx'
+        )
 
         logger.info(f"Invoice report downloaded: {len(invoices)} invoices, total: {total_amount}")
         return response
@@ -1108,14 +1595,11 @@ def download_invoice_report():
 @handle_errors
 @login_required
 def api_get_invoices():
-    """API: Get all invoices from Google Sheets"""
+    """API: Get all invoices from Google Sheets (?stream=1 streams large sheets)"""
     try:
-        invoices = get_invoices()
-        return jsonify({
-            'success': True,
-            'data': invoices,
-            'count': len(invoices)
-        })
+        if request.args.get('stream') == '1':
+            return stream_invoices_response(get_sheets_manager())
+        return cached_list_response('invoices', get_cached_invoices)
     except Exception as e:
         logger.error(f"API error getting invoices: {e}")
         return jsonify({
@@ -1157,8 +1641,7 @@ def api_get_invoice(invoice_number):
 def api_get_invoice_stats():
     """API: Get invoice statistics"""
     try:
-        manager = get_sheets_manager()
-        stats = manager.get_invoice_stats()
+        stats = get_cached_invoice_stats()
         return jsonify({
             'success': True,
             'data': stats
@@ -1177,12 +1660,7 @@ def api_get_invoice_stats():
 def api_get_payment_details():
     """API: Get all payment details from Google Sheets"""
     try:
-        payments = get_payments()
-        return jsonify({
-            'success': True,
-            'data': payments,
-            'count': len(payments)
-        })
+        return cached_list_response('payment_details', get_cached_payment_details)
     except Exception as e:
         logger.error(f"API error getting payment details: {e}")
         return jsonify({
@@ -1226,6 +1704,7 @@ def api_delete_payment_details(supplier_name):
     try:
         manager = get_sheets_manager()
         result = manager.delete_payment_by_supplier(supplier_name)
+        invalidate_sheets_cache()
 
         if result.get('success'):
             logger.info(f"Payment details deleted for: {supplier_name}")
@@ -1252,8 +1731,7 @@ def api_delete_payment_details(supplier_name):
 def api_get_suppliers():
     """API: Get list of unique suppliers"""
     try:
-        manager = get_sheets_manager()
-        suppliers = manager.get_unique_suppliers()
+        suppliers = get_cached_suppliers()
         return jsonify({
             'success': True,
             'data': suppliers,
@@ -1281,6 +1759,7 @@ def api_delete_invoice(invoice_number):
 
         # Delete the invoice
         result = manager.delete_invoice(invoice_number)
+        invalidate_sheets_cache()
 
         if result.get('success'):
             logger.info(f"Invoice deleted: {invoice_number}")
@@ -1299,6 +1778,7 @@ def api_delete_invoice(invoice_number):
             # Also delete associated payment details by invoice number
             try:
                 payment_result = manager.delete_payment_by_invoice(invoice_number)
+                invalidate_sheets_cache()
                 if payment_result.get('success'):
                     logger.info(f"Payment details deleted for invoice: {invoice_number}")
             except Exception as e:
@@ -1344,6 +1824,7 @@ def api_approve_payments():
         for invoice_number in invoice_numbers:
             try:
                 result = manager.update_invoice_status(invoice_number, 'Approved')
+                invalidate_sheets_cache()
                 if result.get('success'):
                     approved_count += 1
                     logger.info(f"Invoice approved: {invoice_number}")
@@ -1387,6 +1868,7 @@ def api_reject_invoices():
         for invoice_number in invoice_numbers:
             try:
                 result = manager.update_invoice_status(invoice_number, 'Rejected')
+                invalidate_sheets_cache()
                 if result.get('success'):
                     rejected_count += 1
                     logger.info(f"Invoice rejected: {invoice_number}")
@@ -1449,8 +1931,8 @@ def api_download_invoice_files():
                 if filename.endswith('_data.json'):
                     json_path = os.path.join(uploads_folder, filename)
                     try:
-                        with open(json_path, 'r') as f:
-                            file_data = json.load(f)
+                        with open(json_path, 'rb') as f:
+                            file_data = orjson.loads(f.read())
                             if file_data.get('invoice_number') in missing_file_ids:
                                 base_name = filename.replace('_data.json', '')
                                 for ext in ['.pdf', '.png', '.jpg', '.jpeg']:
@@ -1563,6 +2045,7 @@ def api_initialize_sheets():
     try:
         manager = get_sheets_manager()
         result = manager.initialize_sheets()
+        invalidate_sheets_cache()
         return jsonify(result)
     except Exception as e:
         return jsonify({
@@ -1571,6 +2054,18 @@ def api_initialize_sheets():
         }), 500
 
 
+@app.route('/api/invalidate-cache', methods=['POST'])
+@handle_errors
+@login_required
+def api_invalidate_cache():
+    """API: Drop cached Sheets data (e.g. after editing the sheet directly)"""
+    invalidate_sheets_cache()
+    return jsonify({
+        'success': True,
+        'message': 'Cache cleared'
+    })
+
+
 # ========== Error Handlers ==========
 
 @app.errorhandler(400)
@@ -1626,13 +2121,17 @@ def server_error(e):
 
 # ========== Template Context ==========
 
+# Static template utilities, built once rather than on every render
+TEMPLATE_UTILITIES = {
+    'now': datetime.now,
+    'app_name': 'Invoice Tracker'
+}
+
+
 @app.context_processor
 def utility_processor():
     """Add utility functions to template context"""
-    return {
-        'now': datetime.now,
-        'app_name': 'Invoice Tracker'
-    }
+    return TEMPLATE_UTILITIES
 
 
 # ========== Main Entry Point ==========
@@ -0,0 +1,65 @@
+"""
+Helpers - Pure string/date helpers shared by the Flask routes
+
+Kept free of Flask state and fully type-annotated so the module can be
+compiled ahead of time (e.g. `mypyc helpers.py`) without call-site changes.
+"""
+
+import re
+from datetime import datetime
+from werkzeug.utils import secure_filename
+
+# File types accepted for upload
+ALLOWED_EXTENSIONS: frozenset[str] = frozenset({'pdf', 'png', 'jpg', 'jpeg'})
+
+# Allowed extensions as suffixes for a single str.endswith check
+_ALLOWED_SUFFIXES: tuple[str, ...] = tuple('.' + ext for ext in ALLOWED_EXTENSIONS)
+
+_YMD_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_DMY_DATE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+
+# Invoice fields rendered in HTML date inputs
+FORM_DATE_FIELDS: tuple[str, ...] = ('invoice_date', 'due_date', 'payment_date')
+
+
+def allowed_file(filename: str) -> bool:
+    """Check if file extension is allowed"""
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
+
+
+def get_file_extension(filename: str) -> str:
+    """Get file extension"""
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def generate_unique_filename(original_filename: str) -> str:
+    """Generate a unique filename with timestamp"""
+    # Split on the last dot (not os.path.splitext, which treats ".pdf" as a
+    # name with no extension)
+    ext = get_file_extension(original_filename)
+    base_name = secure_filename(original_filename.rsplit('.', 1)[0])
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"{base_name}_{timestamp}.{ext}"
+
+
+def convert_date_for_form(date_str: str) -> str:
+    """Convert date from DD/MM/YYYY to YYYY-MM-DD format for HTML date inputs"""
+    if not date_str:
+        return ''
+    # If already in YYYY-MM-DD format, return as is
+    if _YMD_DATE.match(date_str):
+        return date_str
+    # Try to parse DD/MM/YYYY format
+    match = _DMY_DATE.match(date_str)
+    if match:
+        day, month, year = match.groups()
+        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+    return date_str
+
+
+def convert_dates_for_form(records: list[dict], fields: tuple[str, ...] = FORM_DATE_FIELDS) -> list[dict]:
+    """Convert the date fields of each record in place for HTML date inputs"""
+    for record in records:
+        for field in fields:
+            record[field] = convert_date_for_form(record.get(field, ''))
+    return records
@@ -3,92 +3,67 @@ Invoice Processor - Extracts data from invoice PDFs and images using Claude API
 """
 
 import os
+import asyncio
 import json
 import re
+import string
+import orjson
 import base64
+import contextvars
+import functools
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
-from anthropic import Anthropic
+from typing import Final, Optional
+from anthropic import Anthropic, AsyncAnthropic
+from dateutil import parser as date_parser
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Number of invoices sent to Claude at once by process_multiple
+INVOICE_CONCURRENCY = int(os.getenv('INVOICE_CONCURRENCY', '8'))
 
-class InvoiceProcessor:
-    """Process invoices using Claude API for OCR and data extraction"""
-
-    # Supported file extensions
-    SUPPORTED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg'}
-
-    # Media type mapping
-    MEDIA_TYPE_MAP = {
-        '.pdf': 'application/pdf',
-        '.png': 'image/png',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg'
-    }
+# Retries (with exponential backoff) for rate-limited or 5xx API calls
+API_MAX_RETRIES = int(os.getenv('ANTHROPIC_MAX_RETRIES', '4'))
 
-    def __init__(self):
-        """Initialize the processor with API key"""
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found in environment")
-
-        self.client = Anthropic(api_key=api_key)
-        self.model = "claude-sonnet-4-20250514"
+# Upload invoices through the Files API (streamed binary) instead of
+# inlining them as base64; set ANTHROPIC_FILES_API=0 to always inline
+USE_FILES_API = os.getenv('ANTHROPIC_FILES_API', '1') == '1'
+FILES_API_BETA = 'files-api-2025-04-14'
 
-    def _validate_file(self, file_path: str) -> Path:
-        """
-        Validate the file exists and is a supported type
-
-        Args:
-            file_path: Path to the file
-
-        Returns:
-            Path object
-
-        Raises:
-            FileNotFoundError: If file doesn't exist
-            ValueError: If file type not supported
-        """
-        path = Path(file_path)
-
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        if path.suffix.lower() not in self.SUPPORTED_EXTENSIONS:
-            raise ValueError(
-                f"Unsupported file type: {path.suffix}. "
-                f"Supported types: {', '.join(self.SUPPORTED_EXTENSIONS)}"
-            )
+# Files at or below this size are inlined: for small receipts an extra
+# upload + delete round-trip costs more than encoding them
+INLINE_MAX_BYTES = int(os.getenv('INVOICE_INLINE_MAX_BYTES', 256 * 1024))
 
-        return path
+# Read size for base64 encoding (a multiple of 3, so chunks encode independently)
+_ENCODE_CHUNK = 3 * 64 * 1024
 
-    def _encode_file(self, file_path: Path) -> tuple[str, str]:
-        """
-        Read and encode file to base64
+# Patterns used on every invoice, compiled once
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
 
-        Args:
-            file_path: Path to the file
+# Characters dropped from amounts (currency symbols, thousands separators
+# and whitespace), applied with str.translate
+_AMOUNT_STRIP = str.maketrans('', '', '£$€,' + string.whitespace + '\xa0\u2009\u202f')
 
-        Returns:
-            Tuple of (base64_data, media_type)
-        """
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
+VALID_CURRENCIES = frozenset({'GBP', 'USD', 'EUR', 'CAD', 'AUD', 'JPY', 'CHF', 'CNY', 'INR', 'MXN'})
 
-        media_type = self.MEDIA_TYPE_MAP.get(
-            file_path.suffix.lower(),
-            'application/pdf'
-        )
-        file_base64 = base64.b64encode(file_data).decode('utf-8')
+# Date shapes mapped to the strptime formats that can parse them (tried in
+# order), so each date costs at most two strptime attempts
+_DATE_FORMATS = (
+    (re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$'), ('%Y-%m-%d',)),                 # 2024-01-15
+    (re.compile(r'^\d{1,2}/\d{1,2}/\d{4}$'), ('%d/%m/%Y', '%m/%d/%Y')),      # 15/01/2024, 01/15/2024
+    (re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$'), ('%d-%m-%Y',)),                 # 15-01-2024
+    (re.compile(r'^\d{1,2} [A-Za-z]+ \d{4}$'), ('%d %B %Y', '%d %b %Y')),     # 15 January 2024, 15 Jan 2024
+    (re.compile(r'^[A-Za-z]+ \d{1,2}, \d{4}$'), ('%B %d, %Y', '%b %d, %Y')),  # January 15, 2024
+    (re.compile(r'^\d{4}/\d{1,2}/\d{1,2}$'), ('%Y/%m/%d',)),                 # 2024/01/15
+)
+_HAS_YEAR = re.compile(r'\d{4}')
 
-        return file_base64, media_type
+# Two defaults differing in every date part, to detect parts dateutil filled in
+_DATEUTIL_DEFAULTS = (datetime(2000, 1, 1), datetime(2001, 2, 2))
 
-    def _build_extraction_prompt(self) -> str:
-        """Build the extraction prompt for Claude"""
-        return """Analyze this invoice document and extract the following information. Return a JSON object with these exact fields:
+# Instructions sent alongside every invoice (identical for every call)
+EXTRACTION_PROMPT = """Analyze this invoice document and extract the following information. Return a JSON object with these exact fields:
 
 {
   "invoice_number": "The invoice/reference number",
@@ -141,6 +116,397 @@ Important instructions:
 
 Return ONLY the JSON object, no additional text or markdown formatting."""
 
+
+# Defaults for fields Claude leaves out
+_DEFAULT_PAYMENT_DETAILS = {
+    'beneficiary_account_name': '',
+    'account_number': '',
+    'iban': '',
+    'sort_code': '',
+    'swift_code': '',
+    'bank_name': '',
+    'bank_address': '',
+    'payment_reference': ''
+}
+_DEFAULT_CONFIDENCE = {
+    'invoice_number': 'low',
+    'supplier_name': 'low',
+    'amount': 'low',
+    'dates': 'low',
+    'payment_details': 'low'
+}
+_DEFAULTS = {
+    'invoice_number': '',
+    'supplier_name': '',
+    'contact_email': '',
+    'contact_phone': '',
+    'invoice_date': '',
+    'due_date': '',
+    'amount': 0.0,
+    'currency': 'GBP',
+    'line_items': [],
+    'subtotal': 0.0,
+    'tax_amount': 0.0,
+    'tax_rate': '',
+    'notes': '',
+    'payment_details': _DEFAULT_PAYMENT_DETAILS,
+    'confidence': _DEFAULT_CONFIDENCE
+}
+
+
+# Start of the assistant turn, so the reply continues a JSON object
+JSON_PREFILL = '{'
+
+
+def _parse_full_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse a free-form date with dateutil, only if it names a day, month and year
+
+    dateutil fills missing parts from its default date ("March 2024" would
+    get a made-up day), so a date that parses differently against a second
+    default is rejected.
+    """
+    first_default, second_default = _DATEUTIL_DEFAULTS
+    try:
+        parsed = date_parser.parse(date_str, dayfirst=True, default=first_default)
+        if parsed.day == first_default.day or parsed.month == first_default.month or parsed.year == first_default.year:
+            if date_parser.parse(date_str, dayfirst=True, default=second_default).date() != parsed.date():
+                return None
+        return parsed
+    except (ValueError, OverflowError):
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_date(date_str: str) -> str:
+    """
+    Normalize date string to YYYY-MM-DD format
+
+    Args:
+        date_str: Date string in various formats
+
+    Returns:
+        Date in YYYY-MM-DD format or empty string
+    """
+    date_str = date_str.strip()
+    if not date_str:
+        return ''
+
+    for pattern, formats in _DATE_FORMATS:
+        if pattern.match(date_str):
+            for fmt in formats:
+                try:
+                    return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d')
+                except ValueError:
+                    continue
+            break
+
+    # Fall back to dateutil for anything else that includes a full year
+    if _HAS_YEAR.search(date_str):
+        parsed = _parse_full_date(date_str)
+        if parsed:
+            return parsed.strftime('%Y-%m-%d')
+
+    # If nothing parsed, return as-is if it looks like YYYY-MM-DD
+    if _ISO_DATE.match(date_str):
+        return date_str
+
+    return ''
+
+
+# Timestamp shared by every invoice in a process_multiple batch
+_batch_processed_at = contextvars.ContextVar('batch_processed_at', default=None)
+
+
+def _processed_at() -> str:
+    """Timestamp for a processed invoice (the batch's, when in a batch)"""
+    return _batch_processed_at.get() or datetime.now().isoformat()
+
+
+def _absolute_path(file_path) -> str:
+    """Absolute form of file_path, skipping the getcwd() call when it already is"""
+    file_path = os.fspath(file_path)
+    return file_path if os.path.isabs(file_path) else os.path.abspath(file_path)
+
+
+def _clean_money(value) -> float:
+    """Convert an amount (number or string with symbols/commas) to a float"""
+    # Numbers (the usual case for JSON output) need no cleaning
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return float(value)
+    try:
+        if isinstance(value, str):
+            # Remove currency symbols and commas
+            value = value.translate(_AMOUNT_STRIP)
+        return float(value) if value else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _clean_date(value):
+    """Normalize a date to YYYY-MM-DD, leaving empty values as they are"""
+    return normalize_date(value) if value else value
+
+
+def _clean_currency(value) -> str:
+    """Uppercase a currency code (validated once all fields are cleaned)"""
+    return value.upper().strip()
+
+
+def _clean_phone(value):
+    """Collapse extra whitespace in a phone number, keeping its formatting"""
+    # Convert to string in case AI returned a number
+    return ' '.join(str(value).split()) if value else value
+
+
+def _clean_email(value):
+    """Lowercase and trim an email address"""
+    return value.lower().strip() if value else value
+
+
+# Line item count at which cleaning switches to a vectorized pandas pass
+LINE_ITEMS_VECTORIZE_MIN = 32
+
+# Line item numeric fields, cleaned with _clean_money
+_LINE_ITEM_AMOUNTS = ('quantity', 'unit_price', 'total')
+
+# Largest integer a float64 column holds exactly
+_MAX_EXACT_INT = 2 ** 53
+
+
+def _clean_description(value) -> str:
+    """Line item description as a string (missing or null becomes empty)"""
+    return '' if value is None else str(value)
+
+
+def _is_plain_number(value) -> bool:
+    """Whether a float64 column converts value exactly as _clean_money does"""
+    if value is None:
+        return True
+    if type(value) is float:
+        # NaN can't be told apart from a missing value once in a column
+        return value == value
+    return type(value) is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT
+
+
+def _clean_line_items_each(items: list[dict]) -> list[dict]:
+    """Clean line items one at a time"""
+    return [
+        {
+            'description': _clean_description(item.get('description')),
+            # A missing or zero quantity means one unit
+            'quantity': _clean_money(item.get('quantity')) or 1.0,
+            'unit_price': _clean_money(item.get('unit_price')),
+            'total': _clean_money(item.get('total'))
+        }
+        for item in items
+    ]
+
+
+def _clean_line_items_vectorized(items: list[dict]) -> list[dict]:
+    """
+    Vectorized _clean_line_items_each for long invoices
+
+    Only plain numbers are converted column-wise; items with strings or
+    other values in their amounts go through the per-item path, so both
+    paths give the same output.
+    """
+    if not all(_is_plain_number(item.get(field)) for item in items for field in _LINE_ITEM_AMOUNTS):
+        return _clean_line_items_each(items)
+
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(items, columns=list(_LINE_ITEM_AMOUNTS)).astype(float).fillna(0.0)
+    # A missing or zero quantity means one unit
+    df.loc[df['quantity'] == 0, 'quantity'] = 1.0
+    return [
+        {'description': _clean_description(item.get('description')), 'quantity': quantity,
+         'unit_price': unit_price, 'total': total}
+        for item, quantity, unit_price, total in zip(
+            items, df['quantity'].tolist(), df['unit_price'].tolist(), df['total'].tolist()
+        )
+    ]
+
+
+def _clean_line_items(value) -> list:
+    """Keep well-formed line items, coercing their numeric fields"""
+    if not isinstance(value, list):
+        return []
+    items = [item for item in value if isinstance(item, dict)]
+    if len(items) >= LINE_ITEMS_VECTORIZE_MIN:
+        return _clean_line_items_vectorized(items)
+    return _clean_line_items_each(items)
+
+
+def _clean_payment_details(value) -> dict:
+    """Trim bank details, uppercasing IBAN and SWIFT codes"""
+    if not isinstance(value, dict):
+        return _DEFAULT_PAYMENT_DETAILS.copy()
+    return {
+        'beneficiary_account_name': str(value.get('beneficiary_account_name', '')).strip(),
+        'account_number': str(value.get('account_number', '')).strip(),
+        'iban': str(value.get('iban', '')).strip().upper(),
+        'sort_code': str(value.get('sort_code', '')).strip(),
+        'swift_code': str(value.get('swift_code', '')).strip().upper(),
+        'bank_name': str(value.get('bank_name', '')).strip(),
+        'bank_address': str(value.get('bank_address', '')).strip(),
+        'payment_reference': str(value.get('payment_reference', '')).strip()
+    }
+
+
+def _clean_confidence(value) -> dict:
+    """Ensure confidence is properly structured"""
+    return value if isinstance(value, dict) else _DEFAULT_CONFIDENCE.copy()
+
+
+# Cleaner applied to each extracted field, keyed by field name
+_FIELD_CLEANERS = {
+    'amount': _clean_money,
+    'subtotal': _clean_money,
+    'tax_amount': _clean_money,
+    'invoice_date': _clean_date,
+    'due_date': _clean_date,
+    'currency': _clean_currency,
+    'contact_phone': _clean_phone,
+    'contact_email': _clean_email,
+    'line_items': _clean_line_items,
+    'payment_details': _clean_payment_details,
+    'confidence': _clean_confidence
+}
+
+
+class InvoiceProcessor:
+    """Process invoices using Claude API for OCR and data extraction"""
+
+    # Media type mapping (keys are lowercase suffixes)
+    MEDIA_TYPE_MAP: Final = {
+        '.pdf': 'application/pdf',
+        '.png': 'image/png',
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg'
+    }
+
+    # Supported file extensions
+    SUPPORTED_EXTENSIONS: Final = frozenset(MEDIA_TYPE_MAP)
+
+    def __init__(self):
+        """Initialize the processor with API key"""
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY not found in environment")
+
+        # The SDK retries 429/5xx responses with exponential backoff, so
+        # concurrent processing doesn't turn throttling into failures
+        self.client = Anthropic(api_key=api_key, max_retries=API_MAX_RETRIES)
+        self.api_key = api_key
+        self.model = "claude-sonnet-4-20250514"
+
+    def _validate_file(self, file_path: str) -> tuple[Path, str]:
+        """
+        Validate the file exists and is a supported type
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Tuple of (Path object, media type)
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If file type not supported
+        """
+        path = Path(file_path)
+
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        media_type = self.MEDIA_TYPE_MAP.get(path.suffix.lower())
+        if media_type is None:
+            raise ValueError(
+                f"Unsupported file type: {path.suffix}. "
+                f"Supported types: {', '.join(self.MEDIA_TYPE_MAP)}"
+            )
+
+        return path, media_type
+
+    def _upload_file(self, file_path: Path, media_type: str) -> str:
+        """
+        Upload a file to the Anthropic Files API
+
+        The file is streamed from disk, avoiding the base64 copy of the
+        whole document in memory and on the wire.
+
+        Args:
+            file_path: Path to the file
+            media_type: MIME type of the file
+
+        Returns:
+            The uploaded file's ID
+        """
+        with open(file_path, 'rb') as f:
+            uploaded = self.client.beta.files.upload(
+                file=(file_path.name, f, media_type),
+                betas=[FILES_API_BETA]
+            )
+        return uploaded.id
+
+    def _delete_uploaded_file(self, file_id: str) -> None:
+        """Delete a file uploaded by _upload_file, ignoring failures"""
+        try:
+            self.client.beta.files.delete(file_id, betas=[FILES_API_BETA])
+        except Exception:
+            pass
+
+    def _async_client(self) -> AsyncAnthropic:
+        """
+        Create an AsyncAnthropic client for one event loop
+
+        Its connection pool is bound to the loop it is first used on, so
+        callers create one per asyncio.run and close it when done
+        (``async with self._async_client() as client``).
+        """
+        return AsyncAnthropic(api_key=self.api_key, max_retries=API_MAX_RETRIES)
+
+    async def _aupload_file(self, client: AsyncAnthropic, file_path: Path, media_type: str) -> str:
+        """Async version of _upload_file"""
+        with open(file_path, 'rb') as f:
+            uploaded = await client.beta.files.upload(
+                file=(file_path.name, f, media_type),
+                betas=[FILES_API_BETA]
+            )
+        return uploaded.id
+
+    async def _adelete_uploaded_file(self, client: AsyncAnthropic, file_id: str) -> None:
+        """Async version of _delete_uploaded_file"""
+        try:
+            await client.beta.files.delete(file_id, betas=[FILES_API_BETA])
+        except Exception:
+            pass
+
+    def _encode_file(self, file_path: Path) -> str:
+        """
+        Read and encode file to base64 (small files, or when the Files API is unavailable)
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Base64-encoded file contents
+        """
+        # Encode chunk by chunk so the raw file is never held in memory whole
+        encoded = bytearray()
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(_ENCODE_CHUNK):
+                encoded += base64.b64encode(chunk)
+
+        return encoded.decode('ascii')
+
+    def _build_extraction_prompt(self) -> str:
+        """Build the extraction prompt for Claude"""
+        return EXTRACTION_PROMPT
+
     def _parse_response(self, response_text: str) -> dict:
         """
         Parse the Claude response into a dictionary
@@ -154,25 +520,28 @@ Return ONLY the JSON object, no additional text or markdown formatting."""
         # Clean up the response
         text = response_text.strip()
 
+        # Fast path: the reply is already a bare JSON object
+        if text[:1] == '{' and text[-1:] == '}':
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass
+
         # Remove markdown code blocks if present
         if text.startswith('```json'):
-            text = text[7:]
-        elif text.startswith('```'):
-            text = text[3:]
-
-        if text.endswith('```'):
-            text = text[:-3]
-
-        text = text.strip()
+            text = text.removeprefix('```json')
+        else:
+            text = text.removeprefix('```')
+        text = text.removesuffix('```').strip()
 
         # Parse JSON
         try:
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\{[\s\S]*\}', text)
-            if json_match:
-                return json.loads(json_match.group())
+            return orjson.loads(text)
+        except orjson.JSONDecodeError as e:
+            # Try to extract JSON from the response (first '{' to last '}')
+            start, end = text.find('{'), text.rfind('}')
+            if start != -1 and end > start:
+                return orjson.loads(text[start:end + 1])
             raise ValueError(f"Failed to parse JSON response: {e}")
 
     def _validate_and_clean_data(self, data: dict) -> dict:
@@ -185,136 +554,28 @@ Return ONLY the JSON object, no additional text or markdown formatting."""
         Returns:
             Cleaned and validated data
         """
-        # Define default values
-        defaults = {
-            'invoice_number': '',
-            'supplier_name': '',
-            'contact_email': '',
-            'contact_phone': '',
-            'invoice_date': '',
-            'due_date': '',
-            'amount': 0.0,
-            'currency': 'GBP',
-            'line_items': [],
-            'subtotal': 0.0,
-            'tax_amount': 0.0,
-            'tax_rate': '',
-            'notes': '',
-            'payment_details': {
-                'beneficiary_account_name': '',
-                'account_number': '',
-                'iban': '',
-                'sort_code': '',
-                'swift_code': '',
-                'bank_name': '',
-                'bank_address': '',
-                'payment_reference': ''
-            },
-            'confidence': {
-                'invoice_number': 'low',
-                'supplier_name': 'low',
-                'amount': 'low',
-                'dates': 'low',
-                'payment_details': 'low'
-            }
-        }
-
-        # Merge with defaults
-        result = {**defaults, **data}
-
-        # Clean and validate specific fields
-
-        # Clean amount - ensure it's a float
-        try:
-            amount = result.get('amount', 0)
-            if isinstance(amount, str):
-                # Remove currency symbols and commas
-                amount = re.sub(r'[£$€,\s]', '', amount)
-            result['amount'] = float(amount) if amount else 0.0
-        except (ValueError, TypeError):
-            result['amount'] = 0.0
-
-        # Clean subtotal and tax
-        for field in ['subtotal', 'tax_amount']:
-            try:
-                value = result.get(field, 0)
-                if isinstance(value, str):
-                    value = re.sub(r'[£$€,\s]', '', value)
-                result[field] = float(value) if value else 0.0
-            except (ValueError, TypeError):
-                result[field] = 0.0
-
-        # Validate and format dates
-        for date_field in ['invoice_date', 'due_date']:
-            date_value = result.get(date_field, '')
-            if date_value:
-                result[date_field] = self._normalize_date(date_value)
-
-        # Clean currency
-        currency = result.get('currency', 'GBP').upper().strip()
-        valid_currencies = {'GBP', 'USD', 'EUR', 'CAD', 'AUD', 'JPY', 'CHF', 'CNY', 'INR', 'MXN'}
-        if currency not in valid_currencies:
-            # Try to detect from symbols in the original data
-            if '£' in str(data.get('amount', '')):
-                currency = 'GBP'
-            elif '$' in str(data.get('amount', '')):
-                currency = 'USD'
-            elif '€' in str(data.get('amount', '')):
-                currency = 'EUR'
+        # Start from the defaults, with fresh copies of the nested dicts
+        result = _DEFAULTS.copy()
+        result['line_items'] = []
+        result['payment_details'] = _DEFAULT_PAYMENT_DETAILS.copy()
+        result['confidence'] = _DEFAULT_CONFIDENCE.copy()
+
+        # Clean each extracted field once; fields without a cleaner pass through
+        for key, value in data.items():
+            cleaner = _FIELD_CLEANERS.get(key)
+            result[key] = cleaner(value) if cleaner else value
+
+        # Fall back to detecting the currency from symbols in the original amount
+        if result['currency'] not in VALID_CURRENCIES:
+            raw_amount = str(data.get('amount', ''))
+            if '£' in raw_amount:
+                result['currency'] = 'GBP'
+            elif '$' in raw_amount:
+                result['currency'] = 'USD'
+            elif '€' in raw_amount:
+                result['currency'] = 'EUR'
             else:
-                currency = 'GBP'  # Default
-        result['currency'] = currency
-
-        # Clean phone number - ensure it's a string first
-        phone = result.get('contact_phone', '')
-        if phone:
-            # Convert to string in case AI returned a number
-            phone = str(phone)
-            # Remove extra spaces but keep formatting
-            result['contact_phone'] = ' '.join(phone.split())
-
-        # Clean email
-        email = result.get('contact_email', '')
-        if email:
-            result['contact_email'] = email.lower().strip()
-
-        # Validate line items
-        line_items = result.get('line_items', [])
-        if isinstance(line_items, list):
-            cleaned_items = []
-            for item in line_items:
-                if isinstance(item, dict):
-                    cleaned_item = {
-                        'description': str(item.get('description', '')),
-                        'quantity': float(item.get('quantity', 1) or 1),
-                        'unit_price': float(item.get('unit_price', 0) or 0),
-                        'total': float(item.get('total', 0) or 0)
-                    }
-                    cleaned_items.append(cleaned_item)
-            result['line_items'] = cleaned_items
-        else:
-            result['line_items'] = []
-
-        # Clean and validate payment_details
-        payment_details = result.get('payment_details', {})
-        if isinstance(payment_details, dict):
-            cleaned_payment = {
-                'beneficiary_account_name': str(payment_details.get('beneficiary_account_name', '')).strip(),
-                'account_number': str(payment_details.get('account_number', '')).strip(),
-                'iban': str(payment_details.get('iban', '')).strip().upper(),
-                'sort_code': str(payment_details.get('sort_code', '')).strip(),
-                'swift_code': str(payment_details.get('swift_code', '')).strip().upper(),
-                'bank_name': str(payment_details.get('bank_name', '')).strip(),
-                'bank_address': str(payment_details.get('bank_address', '')).strip(),
-                'payment_reference': str(payment_details.get('payment_reference', '')).strip()
-            }
-            result['payment_details'] = cleaned_payment
-        else:
-            result['payment_details'] = defaults['payment_details']
-
-        # Ensure confidence is properly structured
-        if not isinstance(result.get('confidence'), dict):
-            result['confidence'] = defaults['confidence']
+                result['currency'] = 'GBP'  # Default
 
         return result
 
@@ -331,34 +592,7 @@ Return ONLY the JSON object, no additional text or markdown formatting."""
         if not date_str:
             return ''
 
-        # Common date formats to try
-        formats = [
-            '%Y-%m-%d',      # 2024-01-15
-            '%d/%m/%Y',      # 15/01/2024
-            '%m/%d/%Y',      # 01/15/2024
-            '%d-%m-%Y',      # 15-01-2024
-            '%d %B %Y',      # 15 January 2024
-            '%d %b %Y',      # 15 Jan 2024
-            '%B %d, %Y',     # January 15, 2024
-            '%b %d, %Y',     # Jan 15, 2024
-            '%Y/%m/%d',      # 2024/01/15
-        ]
-
-        # Clean the date string
-        date_str = date_str.strip()
-
-        for fmt in formats:
-            try:
-                parsed = datetime.strptime(date_str, fmt)
-                return parsed.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-
-        # If no format matched, return as-is if it looks like YYYY-MM-DD
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
-            return date_str
-
-        return ''
+        return normalize_date(date_str)
 
     def process_invoice(self, file_path: str) -> dict:
         """
@@ -387,82 +621,186 @@ Return ONLY the JSON object, no additional text or markdown formatting."""
                 - processed_at (timestamp)
         """
         try:
+            # Resolve once so results and error responses report the same path
+            file_path = _absolute_path(file_path)
+
             # Validate file
-            path = self._validate_file(file_path)
-
-            # Encode file
-            file_base64, media_type = self._encode_file(path)
-
-            # Build prompt
-            prompt = self._build_extraction_prompt()
-
-            # Build message content based on file type
-            if media_type == 'application/pdf':
-                content = [
-                    {
-                        "type": "document",
-                        "source": {
-                            "type": "base64",
-                            "media_type": media_type,
-                            "data": file_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ]
+            path, media_type = self._validate_file(file_path)
+
+            # Upload larger files via the Files API, falling back to inline base64
+            file_id = None
+            if USE_FILES_API and path.stat().st_size > INLINE_MAX_BYTES:
+                try:
+                    file_id = self._upload_file(path, media_type)
+                except Exception:
+                    file_id = None
+
+            if file_id:
+                messages = self._build_messages(media_type, {"type": "file", "file_id": file_id})
             else:
-                # For images
-                content = [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": media_type,
-                            "data": file_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ]
+                file_base64 = self._encode_file(path)
+                messages = self._build_messages(media_type, {
+                    "type": "base64",
+                    "media_type": media_type,
+                    "data": file_base64
+                })
 
             # Call Claude API
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ]
-            )
+            try:
+                if file_id:
+                    message = self.client.beta.messages.create(
+                        model=self.model,
+                        max_tokens=2000,
+                        messages=messages,
+                        betas=[FILES_API_BETA]
+                    )
+                else:
+                    message = self.client.messages.create(
+                        model=self.model,
+                        max_tokens=2000,
+                        messages=messages
+                    )
+            finally:
+                if file_id:
+                    self._delete_uploaded_file(file_id)
+
+            return self._build_result(message, file_path)
 
-            # Parse response
-            response_text = message.content[0].text
-            extracted_data = self._parse_response(response_text)
+        except Exception as e:
+            return self._exception_response(e, file_path)
 
-            # Validate and clean
-            cleaned_data = self._validate_and_clean_data(extracted_data)
+    async def aprocess_invoice(self, file_path: str, client: Optional[AsyncAnthropic] = None) -> dict:
+        """
+        Async version of process_invoice, using an AsyncAnthropic client
 
-            # Add metadata
-            cleaned_data['file_path'] = str(path.absolute())
-            cleaned_data['processed_at'] = datetime.now().isoformat()
-            cleaned_data['status'] = 'pending'  # Default status for new invoices
+        Args:
+            file_path: Path to the invoice file
+            client: Client to share across a batch; a short-lived one is
+                created when omitted
 
-            return cleaned_data
+        Returns:
+            dict: Extracted invoice data (see process_invoice)
+        """
+        if client is None:
+            async with self._async_client() as client:
+                return await self.aprocess_invoice(file_path, client)
+
+        try:
+            # Resolve once so results and error responses report the same path
+            file_path = _absolute_path(file_path)
+
+            # Validate file
+            path, media_type = self._validate_file(file_path)
+
+            # Upload larger files via the Files API, falling back to inline base64
+            file_id = None
+            if USE_FILES_API and path.stat().st_size > INLINE_MAX_BYTES:
+                try:
+                    file_id = await self._aupload_file(client, path, media_type)
+                except Exception:
+                    file_id = None
+
+            if file_id:
+                messages = self._build_messages(media_type, {"type": "file", "file_id": file_id})
+            else:
+                # Encoding reads the file, so keep it off the event loop
+                file_base64 = await asyncio.to_thread(self._encode_file, path)
+                messages = self._build_messages(media_type, {
+                    "type": "base64",
+                    "media_type": media_type,
+                    "data": file_base64
+                })
+
+            # Call Claude API
+            try:
+                if file_id:
+                    message = await client.beta.messages.create(
+                        model=self.model,
+                        max_tokens=2000,
+                        messages=messages,
+                        betas=[FILES_API_BETA]
+                    )
+                else:
+                    message = await client.messages.create(
+                        model=self.model,
+                        max_tokens=2000,
+                        messages=messages
+                    )
+            finally:
+                if file_id:
+                    await self._adelete_uploaded_file(client, file_id)
+
+            return self._build_result(message, file_path)
 
-        except FileNotFoundError as e:
-            return self._error_response(str(e), file_path, 'file_not_found')
-        except ValueError as e:
-            return self._error_response(str(e), file_path, 'validation_error')
-        except json.JSONDecodeError as e:
-            return self._error_response(f"Failed to parse API response: {e}", file_path, 'parse_error')
         except Exception as e:
-            return self._error_response(f"Processing failed: {e}", file_path, 'processing_error')
+            return self._exception_response(e, file_path)
+
+    def _build_messages(self, media_type: str, source: dict) -> list[dict]:
+        """
+        Build the messages payload for an invoice
+
+        Args:
+            media_type: MIME type of the invoice file
+            source: Document/image source block (file ID or base64 data)
+
+        Returns:
+            List of messages for messages.create
+        """
+        # PDFs go in a document block, everything else is an image
+        content = [
+            {
+                "type": "document" if media_type == 'application/pdf' else "image",
+                "source": source
+            },
+            {
+                "type": "text",
+                "text": self._build_extraction_prompt()
+            }
+        ]
+        return [
+            {
+                "role": "user",
+                "content": content
+            },
+            # Prefill the reply so Claude answers with the bare JSON object
+            {
+                "role": "assistant",
+                "content": JSON_PREFILL
+            }
+        ]
+
+    def _build_result(self, message, file_path: str) -> dict:
+        """
+        Parse and clean Claude's reply, adding file metadata
+
+        Args:
+            message: Message returned by messages.create
+            file_path: Absolute path of the processed file
+
+        Returns:
+            Cleaned invoice data dictionary
+        """
+        # Parse response
+        response_text = JSON_PREFILL + message.content[0].text
+        extracted_data = self._parse_response(response_text)
+
+        # Validate and clean
+        cleaned_data = self._validate_and_clean_data(extracted_data)
+
+        # Add metadata
+        cleaned_data['file_path'] = file_path
+        cleaned_data['processed_at'] = _processed_at()
+        cleaned_data['status'] = 'pending'  # Default status for new invoices
+
+        return cleaned_data
+
+    def _exception_response(self, error: Exception, file_path: str) -> dict:
+        """Map an exception raised while processing to an error response"""
+        if isinstance(error, FileNotFoundError):
+            return self._error_response(str(error), file_path, 'file_not_found')
+        if isinstance(error, ValueError):
+            return self._error_response(str(error), file_path, 'validation_error')
+        return self._error_response(f"Processing failed: {error}", file_path, 'processing_error')
 
     def _error_response(self, error_message: str, file_path: str, error_type: str) -> dict:
         """
@@ -497,7 +835,7 @@ Return ONLY the JSON object, no additional text or markdown formatting."""
                 'dates': 'low'
             },
             'file_path': str(file_path),
-            'processed_at': datetime.now().isoformat(),
+            'processed_at': _processed_at(),
             'status': 'error',
             'error': error_message,
             'error_type': error_type
@@ -505,19 +843,48 @@ Return ONLY the JSON object, no additional text or markdown formatting."""
 
     def process_multiple(self, file_paths: list[str]) -> list[dict]:
         """
-        Process multiple invoice files
+        Process multiple invoice files concurrently
+
+        Each invoice is dominated by the Claude API round-trip, so they are
+        sent in parallel (up to INVOICE_CONCURRENCY at a time).
 
         Args:
             file_paths: List of file paths
 
         Returns:
-            List of extracted data dictionaries
+            List of extracted data dictionaries, in the same order as file_paths
         """
-        results = []
-        for path in file_paths:
-            result = self.process_invoice(path)
-            results.append(result)
-        return results
+        if len(file_paths) <= 1:
+            return [self.process_invoice(path) for path in file_paths]
+
+        # Resolve relative paths against the working directory once
+        cwd = os.getcwd()
+        file_paths = [path if os.path.isabs(path) else os.path.join(cwd, path) for path in file_paths]
+
+        return asyncio.run(self.aprocess_multiple(file_paths))
+
+    async def aprocess_multiple(self, file_paths: list[str]) -> list[dict]:
+        """
+        Async version of process_multiple
+
+        Args:
+            file_paths: List of file paths
+
+        Returns:
+            List of extracted data dictionaries, in the same order as file_paths
+        """
+        semaphore = asyncio.Semaphore(INVOICE_CONCURRENCY)
+
+        # Stamp the whole batch with one timestamp (tasks inherit the context)
+        _batch_processed_at.set(datetime.now().isoformat())
+
+        # One client for the batch, created and closed inside this event loop
+        async with self._async_client() as client:
+            async def process(path):
+                async with semaphore:
+                    return await self.aprocess_invoice(path, client)
+
+            return await asyncio.gather(*(process(path) for path in file_paths))
 
 
 def process_invoice(file_path: str) -> dict:
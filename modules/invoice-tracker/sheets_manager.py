@@ -6,7 +6,7 @@ import os
 import json
 import base64
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
@@ -98,13 +98,16 @@ class SheetNotFoundError(SheetsManagerError):
 class SheetsManager:
     """Manage Google Sheets operations for invoice and payment tracking"""
 
-    def __init__(self, credentials_path: str = 'credentials.json', token_path: str = 'token.pickle'):
+    def __init__(self, credentials_path: str = 'credentials.json', token_path: str = 'token.pickle',
+                 credentials: Optional[Credentials] = None):
         """
         Initialize the sheets manager and authenticate
 
         Args:
             credentials_path: Path to Google OAuth credentials file
             token_path: Path to store/load authentication token
+            credentials: Already-loaded credentials to reuse (e.g. from
+                another manager), skipping the token load
         """
         self.credentials_path = credentials_path
         self.token_path = token_path
@@ -113,7 +116,7 @@ class SheetsManager:
         if not self.spreadsheet_id:
             raise ValueError("GOOGLE_SHEET_ID not found in environment variables")
 
-        self.creds = None
+        self.creds = credentials
         self.service = None
         self.drive_service = None
 
@@ -144,7 +147,10 @@ class SheetsManager:
             # Try to load existing token from environment variable first (for Render/production)
             google_token_b64 = os.environ.get('GOOGLE_TOKEN')
 
-            if google_token_b64:
+            if self.creds:
+                # Reusing credentials passed in by the caller
+                pass
+            elif google_token_b64:
                 # Load from base64 encoded environment variable
                 logger.info("Loading token from GOOGLE_TOKEN environment variable")
                 token_bytes = base64.b64decode(google_token_b64)
@@ -232,6 +238,105 @@ class SheetsManager:
         value = data.get(key, default)
         return value if value is not None else default
 
+    def _invoice_row(self, invoice_data: dict) -> list:
+        """Build an Invoice Tracker row in column order"""
+        return [
+            self._safe_get(invoice_data, 'invoice_number'),
+            self._safe_get(invoice_data, 'supplier_name'),
+            self._safe_get(invoice_data, 'contact_email'),
+            self._escape_formula(self._safe_get(invoice_data, 'contact_phone')),
+            self._safe_get(invoice_data, 'invoice_date'),
+            self._safe_get(invoice_data, 'due_date'),
+            self._safe_get(invoice_data, 'amount', 0),
+            self._safe_get(invoice_data, 'currency', 'GBP'),
+            self._safe_get(invoice_data, 'status', 'Pending Review'),
+            self._safe_get(invoice_data, 'payment_date'),
+            self._safe_get(invoice_data, 'notes'),
+            self._safe_get(invoice_data, 'file_id')
+        ]
+
+    def _payment_row(self, payment_data: dict) -> list:
+        """Build a Payment Details row in column order"""
+        return [
+            self._safe_get(payment_data, 'invoice_number'),
+            self._safe_get(payment_data, 'supplier_name'),
+            self._safe_get(payment_data, 'beneficiary_account_name'),
+            self._safe_get(payment_data, 'account_number'),
+            self._safe_get(payment_data, 'iban'),
+            self._safe_get(payment_data, 'sort_code'),
+            self._safe_get(payment_data, 'swift_code'),
+            self._safe_get(payment_data, 'bank_name'),
+            self._safe_get(payment_data, 'bank_address'),
+            self._safe_get(payment_data, 'payment_reference'),
+            self._safe_get(payment_data, 'status', 'Ready for Upload'),
+            self._safe_get(payment_data, 'upload_date'),
+            self._safe_get(payment_data, 'notes')
+        ]
+
+    def build_invoice_update(self, row_number: int, invoice_data: dict) -> tuple[str, list]:
+        """
+        Build the (range, values) pair that overwrites an invoice row
+
+        Args:
+            row_number: The row number to update (1-indexed)
+            invoice_data: Updated invoice data
+
+        Returns:
+            Tuple of (A1 range, list of rows) for update or batch_write
+        """
+        range_name = f"'{self.invoice_sheet}'!A{row_number}:L{row_number}"
+        return range_name, [self._invoice_row(invoice_data)]
+
+    def build_payment_update(self, row_number: int, payment_data: dict) -> tuple[str, list]:
+        """
+        Build the (range, values) pair that overwrites a payment details row
+
+        Args:
+            row_number: The row number to update (1-indexed)
+            payment_data: Updated payment data
+
+        Returns:
+            Tuple of (A1 range, list of rows) for update or batch_write
+        """
+        range_name = f"'{self.payment_sheet}'!A{row_number}:M{row_number}"
+        return range_name, [self._payment_row(payment_data)]
+
+    def batch_write(self, updates: list[tuple[str, list]]) -> dict:
+        """
+        Write several ranges in a single values.batchUpdate request
+
+        Args:
+            updates: List of (range, values) tuples, e.g. from build_invoice_update
+
+        Returns:
+            dict: Result with 'success' and 'message'
+        """
+        self._ensure_authenticated()
+
+        try:
+            body = {
+                'valueInputOption': 'USER_ENTERED',
+                'data': [{'range': range_name, 'values': values} for range_name, values in updates]
+            }
+
+            result = self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body=body
+            ).execute()
+
+            updated_cells = result.get('totalUpdatedCells', 0)
+            logger.info(f"Batch wrote {len(updates)} range(s): {updated_cells} cells updated")
+            return {
+                'success': True,
+                'message': "Batch update successful",
+                'updated_cells': updated_cells
+            }
+
+        except HttpError as e:
+            error_msg = f"Failed to batch update: {e}"
+            logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
     def _escape_formula(self, value: str) -> str:
         """
         Escape values that Google Sheets might interpret as formulas.
@@ -283,20 +388,7 @@ class SheetsManager:
 
         try:
             # Prepare row data in column order
-            row = [
-                self._safe_get(invoice_data, 'invoice_number'),
-                self._safe_get(invoice_data, 'supplier_name'),
-                self._safe_get(invoice_data, 'contact_email'),
-                self._escape_formula(self._safe_get(invoice_data, 'contact_phone')),
-                self._safe_get(invoice_data, 'invoice_date'),
-                self._safe_get(invoice_data, 'due_date'),
-                self._safe_get(invoice_data, 'amount', 0),
-                self._safe_get(invoice_data, 'currency', 'GBP'),
-                self._safe_get(invoice_data, 'status', 'Pending Review'),
-                self._safe_get(invoice_data, 'payment_date'),
-                self._safe_get(invoice_data, 'notes'),
-                self._safe_get(invoice_data, 'file_id')
-            ]
+            row = self._invoice_row(invoice_data)
 
             # Append to sheet
             range_name = f"'{self.invoice_sheet}'!A:K"
@@ -327,53 +419,77 @@ class SheetsManager:
             logger.error(error_msg)
             return {'success': False, 'message': error_msg, 'error': str(e)}
 
-    def get_all_invoices(self) -> list[dict]:
+    def _batch_get(self, ranges: list[str]) -> list[list]:
         """
-        Get all invoices from the Invoice Tracker sheet
+        Read several ranges in a single values.batchGet request
+
+        Args:
+            ranges: A1 ranges to read
 
         Returns:
-            List of invoice dictionaries
+            List of row lists, one per requested range (in the same order)
+
+        Raises:
+            HttpError: If the request fails
         """
         self._ensure_authenticated()
 
-        try:
-            range_name = f"'{self.invoice_sheet}'!A2:L"
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            ).execute()
+        result = self.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=ranges
+        ).execute()
 
-            rows = result.get('values', [])
-            invoices = []
+        value_ranges = result.get('valueRanges', [])
+        return [
+            value_ranges[i].get('values', []) if i < len(value_ranges) else []
+            for i in range(len(ranges))
+        ]
 
-            for idx, row in enumerate(rows):
-                # Pad row to ensure all columns exist
-                while len(row) < 12:
-                    row.append('')
+    def _parse_invoice_rows(self, rows: list[list], first_row: int = 2) -> list[dict]:
+        """Convert raw Invoice Tracker rows (starting at first_row) into invoice dictionaries"""
+        invoices = []
 
-                # Parse amount safely (handle comma-formatted numbers like "10,000.00")
-                try:
-                    amount_str = str(row[6]).replace(',', '') if row[6] else '0'
-                    amount = float(amount_str)
-                except (ValueError, TypeError):
-                    amount = 0.0
-
-                invoice = {
-                    'id': idx + 2,  # Row number (1-indexed, +1 for header)
-                    'invoice_number': row[0],
-                    'supplier_name': row[1],
-                    'contact_email': row[2],
-                    'contact_phone': row[3],
-                    'invoice_date': excel_date_to_string(row[4]),
-                    'due_date': excel_date_to_string(row[5]),
-                    'amount': amount,
-                    'currency': row[7] or 'GBP',
-                    'status': row[8] or 'Pending Review',
-                    'payment_date': excel_date_to_string(row[9]),
-                    'notes': row[10],
-                    'file_id': row[11]
-                }
-                invoices.append(invoice)
+        for idx, row in enumerate(rows):
+            # Pad row to ensure all columns exist
+            while len(row) < 12:
+                row.append('')
+
+            # Parse amount safely (handle comma-formatted numbers like "10,000.00")
+            try:
+                amount_str = str(row[6]).replace(',', '') if row[6] else '0'
+                amount = float(amount_str)
+            except (ValueError, TypeError):
+                amount = 0.0
+
+            invoice = {
+                'id': idx + first_row,  # Row number (1-indexed)
+                'invoice_number': row[0],
+                'supplier_name': row[1],
+                'contact_email': row[2],
+                'contact_phone': row[3],
+                'invoice_date': excel_date_to_string(row[4]),
+                'due_date': excel_date_to_string(row[5]),
+                'amount': amount,
+                'currency': row[7] or 'GBP',
+                'status': row[8] or 'Pending Review',
+                'payment_date': excel_date_to_string(row[9]),
+                'notes': row[10],
+                'file_id': row[11]
+            }
+            invoices.append(invoice)
+
+        return invoices
+
+    def get_all_invoices(self) -> list[dict]:
+        """
+        Get all invoices from the Invoice Tracker sheet
+
+        Returns:
+            List of invoice dictionaries
+        """
+        try:
+            rows, = self._batch_get([f"'{self.invoice_sheet}'!A2:L"])
+            invoices = self._parse_invoice_rows(rows)
 
             logger.info(f"Retrieved {len(invoices)} invoices")
             return invoices
@@ -382,6 +498,51 @@ class SheetsManager:
             logger.error(f"Failed to get invoices: {e}")
             return []
 
+    def iter_invoices(self, page_size: int = 1000) -> Iterator[dict]:
+        """
+        Iterate over all invoices, reading the sheet one page of rows at a time
+
+        Keeps memory proportional to page_size rather than the whole sheet.
+        Pages run up to the sheet's last row, so invoices after a fully
+        blank block of rows are still read.
+
+        Args:
+            page_size: Number of rows fetched per request
+
+        Yields:
+            Invoice dictionaries, in sheet order
+
+        Raises:
+            HttpError: If a page request fails
+        """
+        last_row = self._get_row_count(self.invoice_sheet)
+        for start in range(2, last_row + 1, page_size):
+            end = min(start + page_size - 1, last_row)
+            rows, = self._batch_get([f"'{self.invoice_sheet}'!A{start}:L{end}"])
+            yield from self._parse_invoice_rows(rows, first_row=start)
+
+    def get_invoices_and_payments(self) -> tuple[list[dict], list[dict]]:
+        """
+        Get all invoices and all payment details in one round-trip
+
+        Returns:
+            Tuple of (invoice dictionaries, payment detail dictionaries)
+        """
+        try:
+            invoice_rows, payment_rows = self._batch_get([
+                f"'{self.invoice_sheet}'!A2:L",
+                f"'{self.payment_sheet}'!A2:M"
+            ])
+            invoices = self._parse_invoice_rows(invoice_rows)
+            payments = self._parse_payment_rows(payment_rows)
+
+            logger.info(f"Retrieved {len(invoices)} invoices and {len(payments)} payment details")
+            return invoices, payments
+
+        except HttpError as e:
+            logger.error(f"Failed to get invoices and payment details: {e}")
+            return [], []
+
     def get_invoice_by_number(self, invoice_number: str) -> Optional[dict]:
         """
         Get a specific invoice by its invoice number
@@ -462,6 +623,21 @@ class SheetsManager:
             logger.error(f"Error deleting invoice: {e}")
             raise SheetsManagerError(f"Failed to delete invoice: {e}")
 
+    def _get_row_count(self, sheet_name: str) -> int:
+        """Get the number of rows in a sheet's grid (including blank rows)"""
+        self._ensure_authenticated()
+
+        spreadsheet = self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields='sheets.properties(title,gridProperties.rowCount)'
+        ).execute()
+
+        for sheet in spreadsheet.get('sheets', []):
+            if sheet['properties']['title'] == sheet_name:
+                return sheet['properties']['gridProperties']['rowCount']
+
+        raise SheetsManagerError(f"Sheet '{sheet_name}' not found")
+
     def _get_sheet_id(self, sheet_name: str) -> int:
         """Get the sheet ID for a given sheet name"""
         spreadsheet = self.service.spreadsheets().get(
@@ -616,23 +792,8 @@ class SheetsManager:
         self._ensure_authenticated()
 
         try:
-            row = [
-                self._safe_get(invoice_data, 'invoice_number'),
-                self._safe_get(invoice_data, 'supplier_name'),
-                self._safe_get(invoice_data, 'contact_email'),
-                self._escape_formula(self._safe_get(invoice_data, 'contact_phone')),
-                self._safe_get(invoice_data, 'invoice_date'),
-                self._safe_get(invoice_data, 'due_date'),
-                self._safe_get(invoice_data, 'amount', 0),
-                self._safe_get(invoice_data, 'currency', 'GBP'),
-                self._safe_get(invoice_data, 'status', 'Pending Review'),
-                self._safe_get(invoice_data, 'payment_date'),
-                self._safe_get(invoice_data, 'notes'),
-                self._safe_get(invoice_data, 'file_id')
-            ]
-
-            range_name = f"'{self.invoice_sheet}'!A{row_number}:L{row_number}"
-            body = {'values': [row]}
+            range_name, values = self.build_invoice_update(row_number, invoice_data)
+            body = {'values': values}
 
             result = self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
@@ -702,14 +863,18 @@ class SheetsManager:
         invoices = self.get_all_invoices()
         return [inv for inv in invoices if inv.get('status', '').lower() == status.lower()]
 
-    def get_invoice_stats(self) -> dict:
+    def get_invoice_stats(self, invoices: Optional[list[dict]] = None) -> dict:
         """
         Get statistics about invoices
 
+        Args:
+            invoices: Already-fetched invoices (read from the sheet if omitted)
+
         Returns:
             Dictionary with invoice statistics
         """
-        invoices = self.get_all_invoices()
+        if invoices is None:
+            invoices = self.get_all_invoices()
 
         stats = {
             'total_invoices': len(invoices),
@@ -799,21 +964,7 @@ class SheetsManager:
         self._ensure_authenticated()
 
         try:
-            row = [
-                self._safe_get(payment_data, 'invoice_number'),
-                self._safe_get(payment_data, 'supplier_name'),
-                self._safe_get(payment_data, 'beneficiary_account_name'),
-                self._safe_get(payment_data, 'account_number'),
-                self._safe_get(payment_data, 'iban'),
-                self._safe_get(payment_data, 'sort_code'),
-                self._safe_get(payment_data, 'swift_code'),
-                self._safe_get(payment_data, 'bank_name'),
-                self._safe_get(payment_data, 'bank_address'),
-                self._safe_get(payment_data, 'payment_reference'),
-                self._safe_get(payment_data, 'status', 'Ready for Upload'),
-                self._safe_get(payment_data, 'upload_date'),
-                self._safe_get(payment_data, 'notes')
-            ]
+            row = self._payment_row(payment_data)
 
             range_name = f"'{self.payment_sheet}'!A:M"
             body = {'values': [row]}
@@ -840,6 +991,34 @@ class SheetsManager:
             logger.error(error_msg)
             return {'success': False, 'message': error_msg}
 
+    def _parse_payment_rows(self, rows: list[list]) -> list[dict]:
+        """Convert raw Payment Details rows (from row 2) into payment dictionaries"""
+        payments = []
+
+        for idx, row in enumerate(rows):
+            while len(row) < 13:
+                row.append('')
+
+            payment = {
+                'id': idx + 2,
+                'invoice_number': row[0],
+                'supplier_name': row[1],
+                'beneficiary_account_name': row[2],
+                'account_number': row[3],
+                'iban': row[4],
+                'sort_code': row[5],
+                'swift_code': row[6],
+                'bank_name': row[7],
+                'bank_address': row[8],
+                'payment_reference': row[9],
+                'status': row[10] or 'Ready for Upload',
+                'upload_date': excel_date_to_string(row[11]),
+                'notes': row[12]
+            }
+            payments.append(payment)
+
+        return payments
+
     def get_all_payment_details(self) -> list[dict]:
         """
         Get all payment details from the Payment Details sheet
@@ -847,39 +1026,9 @@ class SheetsManager:
         Returns:
             List of payment detail dictionaries
         """
-        self._ensure_authenticated()
-
         try:
-            range_name = f"'{self.payment_sheet}'!A2:M"
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            ).execute()
-
-            rows = result.get('values', [])
-            payments = []
-
-            for idx, row in enumerate(rows):
-                while len(row) < 13:
-                    row.append('')
-
-                payment = {
-                    'id': idx + 2,
-                    'invoice_number': row[0],
-                    'supplier_name': row[1],
-                    'beneficiary_account_name': row[2],
-                    'account_number': row[3],
-                    'iban': row[4],
-                    'sort_code': row[5],
-                    'swift_code': row[6],
-                    'bank_name': row[7],
-                    'bank_address': row[8],
-                    'payment_reference': row[9],
-                    'status': row[10] or 'Ready for Upload',
-                    'upload_date': excel_date_to_string(row[11]),
-                    'notes': row[12]
-                }
-                payments.append(payment)
+            rows, = self._batch_get([f"'{self.payment_sheet}'!A2:M"])
+            payments = self._parse_payment_rows(rows)
 
             logger.info(f"Retrieved {len(payments)} payment details")
             return payments
@@ -904,6 +1053,24 @@ class SheetsManager:
                 return payment
         return None
 
+    def get_payment_by_invoice(self, invoice_number: str) -> Optional[dict]:
+        """
+        Get the (first) payment details for an invoice, read fresh from the sheet
+
+        Use this rather than a cached index before writing to the returned
+        row, since rows may have been edited or deleted in the sheet itself.
+
+        Args:
+            invoice_number: The invoice number to search for
+
+        Returns:
+            Payment details dictionary (with its current row 'id') or None if not found
+        """
+        for payment in self.get_all_payment_details():
+            if payment.get('invoice_number') == invoice_number:
+                return payment
+        return None
+
     def update_payment_details(self, row_number: int, payment_data: dict) -> dict:
         """
         Update existing payment details
@@ -918,24 +1085,8 @@ class SheetsManager:
         self._ensure_authenticated()
 
         try:
-            row = [
-                self._safe_get(payment_data, 'invoice_number'),
-                self._safe_get(payment_data, 'supplier_name'),
-                self._safe_get(payment_data, 'beneficiary_account_name'),
-                self._safe_get(payment_data, 'account_number'),
-                self._safe_get(payment_data, 'iban'),
-                self._safe_get(payment_data, 'sort_code'),
-                self._safe_get(payment_data, 'swift_code'),
-                self._safe_get(payment_data, 'bank_name'),
-                self._safe_get(payment_data, 'bank_address'),
-                self._safe_get(payment_data, 'payment_reference'),
-                self._safe_get(payment_data, 'status', 'Ready for Upload'),
-                self._safe_get(payment_data, 'upload_date'),
-                self._safe_get(payment_data, 'notes')
-            ]
-
-            range_name = f"'{self.payment_sheet}'!A{row_number}:M{row_number}"
-            body = {'values': [row]}
+            range_name, values = self.build_payment_update(row_number, payment_data)
+            body = {'values': values}
 
             result = self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
@@ -958,24 +1109,31 @@ class SheetsManager:
 
     # ========== Utility Methods ==========
 
-    def get_unique_suppliers(self) -> list[str]:
+    def get_unique_suppliers(self, invoices: Optional[list[dict]] = None,
+                             payments: Optional[list[dict]] = None) -> list[str]:
         """
         Get a list of unique supplier names from both sheets
 
+        Args:
+            invoices: Already-fetched invoices (optional)
+            payments: Already-fetched payment details (optional)
+
         Returns:
             Sorted list of unique supplier names
         """
         suppliers = set()
 
+        # Read both sheets in one request unless the caller already has them
+        if invoices is None or payments is None:
+            invoices, payments = self.get_invoices_and_payments()
+
         # Get suppliers from invoices
-        invoices = self.get_all_invoices()
         for inv in invoices:
             name = inv.get('supplier_name', '').strip()
             if name:
                 suppliers.add(name)
 
         # Get suppliers from payment details
-        payments = self.get_all_payment_details()
         for pay in payments:
             name = pay.get('supplier_name', '').strip()
             if name:
@@ -0,0 +1,33 @@
+"""
+Tests for the string helpers in helpers.py
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+helpers = pytest.importorskip('helpers')
+
+
+@pytest.mark.parametrize('original, pattern', [
+    ('invoice.PDF', r'invoice_\d{8}_\d{6}\.pdf'),
+    ('acme.invoice.png', r'acme.invoice_\d{8}_\d{6}\.png'),
+    ('.pdf', r'_\d{8}_\d{6}\.pdf'),
+    ('.JPG', r'_\d{8}_\d{6}\.jpg'),
+])
+def test_generate_unique_filename_keeps_extension(original, pattern):
+    filename = helpers.generate_unique_filename(original)
+    assert re.fullmatch(pattern, filename)
+    assert helpers.allowed_file(filename)
+
+
+@pytest.mark.parametrize('filename, ext', [
+    ('invoice.PDF', 'pdf'),
+    ('.pdf', 'pdf'),
+    ('no_extension', ''),
+])
+def test_get_file_extension(filename, ext):
+    assert helpers.get_file_extension(filename) == ext
@@ -0,0 +1,41 @@
+"""
+Tests for line item cleaning in invoice_processor.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+invoice_processor = pytest.importorskip('invoice_processor')
+pytest.importorskip('pandas')
+
+ITEMS = [
+    {'description': 'Consulting', 'quantity': 2, 'unit_price': 150.0, 'total': 300.0},
+    {'description': None, 'quantity': None, 'unit_price': 10, 'total': 10},
+    {'quantity': 0, 'unit_price': 0.5},
+    {'description': 42, 'quantity': 1.5, 'unit_price': -20, 'total': -30.0},
+]
+STRING_ITEMS = ITEMS + [
+    {'description': 'Licence', 'quantity': '3', 'unit_price': '£5', 'total': '1,500.00'},
+    {'description': 'Unparseable', 'quantity': 'n/a', 'unit_price': 'TBC', 'total': ''},
+]
+
+
+@pytest.mark.parametrize('items', [ITEMS, STRING_ITEMS], ids=['numbers', 'strings'])
+def test_vectorized_matches_per_item(items):
+    items = items * 10
+    assert invoice_processor._clean_line_items_vectorized(items) == invoice_processor._clean_line_items_each(items)
+
+
+@pytest.mark.parametrize('count', [
+    invoice_processor.LINE_ITEMS_VECTORIZE_MIN - 1,
+    invoice_processor.LINE_ITEMS_VECTORIZE_MIN
+])
+def test_same_result_either_side_of_threshold(count):
+    items = (STRING_ITEMS * count)[:count]
+    cleaned = invoice_processor._clean_line_items(items)
+    assert cleaned == invoice_processor._clean_line_items_each(items)
+    assert {'description': 'Licence', 'quantity': 3.0, 'unit_price': 5.0, 'total': 1500.0} in cleaned
+    assert {'description': '', 'quantity': 1.0, 'unit_price': 10.0, 'total': 10.0} in cleaned
@@ -0,0 +1,23 @@
+"""
+Tests for date normalization in invoice_processor.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+invoice_processor = pytest.importorskip('invoice_processor')
+
+
+@pytest.mark.parametrize('date_str, expected', [
+    ('15/01/2024', '2024-01-15'),
+    ('1st March 2024', '2024-03-01'),
+    ('Jan 1 2000', '2000-01-01'),
+    ('March 2024', ''),
+    ('2024', ''),
+    ('', ''),
+])
+def test_normalize_date(date_str, expected):
+    assert invoice_processor.normalize_date(date_str) == expected